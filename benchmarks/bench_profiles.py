@@ -0,0 +1,76 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.db_manager import DatabaseManager
+from database.profiles import PROFILES
+
+# Compare le débit d'écriture (add_student, une validation par appel) et de
+# lecture (get_unpaid_fees) selon le profil de connexion.
+#
+#     python benchmarks/bench_profiles.py --students 2000 --reads 50
+#
+# "legacy" reproduit l'ancienne connexion nue : journal DELETE, synchronous FULL,
+# cache par défaut, pas de mmap.
+
+LEGACY = {
+    'journal_mode': 'DELETE',
+    'synchronous': 'FULL',
+    'cache_size': -2000,
+    'mmap_size': 0,
+    'temp_store': 'DEFAULT',
+    'foreign_keys': 'OFF',
+}
+
+
+def bench_profile(name, profile, students, reads):
+    # Le profil reporting est en lecture seule : la base est remplie avec le
+    # profil interactive puis rouverte pour mesurer les lectures
+    read_only = name == 'reporting'
+    with tempfile.TemporaryDirectory() as directory:
+        db_name = os.path.join(directory, 'bench.db')
+        db_manager = DatabaseManager(db_name, profile='interactive' if read_only else profile)
+        class_id = db_manager.add_class(('CP', None))
+
+        start = time.perf_counter()
+        for i in range(students):
+            db_manager.add_student(('Nom', f'Prenom{i}', '2015-01-01', 'Gabonaise', 'M', 'Inscription', class_id))
+        write_seconds = time.perf_counter() - start
+
+        db_manager.generate_fees_for_year(mode_paiement='echéancier')
+        if read_only:
+            db_manager.close()
+            db_manager = DatabaseManager(db_name, profile=profile)
+        start = time.perf_counter()
+        for _ in range(reads):
+            db_manager.get_unpaid_fees()
+        read_seconds = time.perf_counter() - start
+        db_manager.close()
+
+    return {
+        'profile': name,
+        'add_student_per_s': None if read_only else students / write_seconds,
+        'get_unpaid_fees_ms': read_seconds / reads * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Débit add_student / get_unpaid_fees par profil de connexion')
+    parser.add_argument('--students', type=int, default=2000)
+    parser.add_argument('--reads', type=int, default=20)
+    args = parser.parse_args()
+
+    candidates = [('legacy', LEGACY)] + [(name, name) for name in PROFILES]
+    results = [bench_profile(name, profile, args.students, args.reads) for name, profile in candidates]
+    print(f"{'profil':<14}{'add_student/s':>16}{'get_unpaid_fees (ms)':>24}")
+    for result in results:
+        writes = '-' if result['add_student_per_s'] is None else f"{result['add_student_per_s']:.0f}"
+        print(f"{result['profile']:<14}{writes:>16}{result['get_unpaid_fees_ms']:>24.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.datagen import NOMS, generate
+from database.db_manager import DatabaseManager
+
+# Mesure les opérations principales de DatabaseManager sur des bases générées
+# par benchmarks/datagen.py, et écrit un rapport JSON comparable d'un commit
+# à l'autre.
+#
+#     python benchmarks/bench_suite.py --sizes 1000 10000 --output avant.json
+#     python benchmarks/bench_suite.py --sizes 1000 10000 --compare avant.json
+#
+# --compare signale les opérations dont le p50 dépasse la référence de plus de
+# --threshold (20 % par défaut) et termine avec un code d'erreur.
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+
+
+def _timed(function, calls):
+    durations = []
+    for call in calls:
+        start = time.perf_counter()
+        function(*call)
+        durations.append(time.perf_counter() - start)
+    durations.sort()
+    return {
+        'calls': len(durations),
+        'mean_ms': sum(durations) / len(durations) * 1000,
+        'p50_ms': durations[len(durations) // 2] * 1000,
+        'p95_ms': durations[min(len(durations) - 1, int(len(durations) * 0.95))] * 1000,
+        'max_ms': durations[-1] * 1000,
+    }
+
+
+def bench_size(students, calls, seed):
+    rng = random.Random(seed)
+    with tempfile.TemporaryDirectory() as directory:
+        db_name = os.path.join(directory, 'bench.db')
+        db_manager = DatabaseManager(db_name, profile='bulk_import')
+        dataset = generate(db_manager, students=students, seed=seed)
+        db_manager.close()
+
+        db_manager = DatabaseManager(db_name)
+        student_ids = [row[0] for row in db_manager.conn.execute('SELECT id FROM students')]
+        class_ids = [row[0] for row in db_manager.get_all_classes()]
+        sample = [rng.choice(student_ids) for _ in range(calls)]
+        new_student = ('Bench', 'Eleve', '2016-01-01', 'Gabonaise', 'M', 'Inscription', class_ids[0])
+
+        operations = {
+            'add_student': _timed(db_manager.add_student, [(new_student,)] * calls),
+            'update_student': _timed(db_manager.update_student, [
+                (student_id, new_student[:6] + (rng.choice(class_ids),)) for student_id in sample
+            ]),
+            'search_responsables': _timed(db_manager.search_responsables, [
+                (rng.choice(NOMS)[:rng.randint(2, 5)],) for _ in range(calls)
+            ]),
+            'get_unpaid_fees': _timed(db_manager.get_unpaid_fees, [()] * max(3, calls // 50)),
+            'add_frais_scolarite': _timed(db_manager.add_frais_scolarite, [
+                (student_id, rng.choice(['standard', 'echéancier'])) for student_id in sample
+            ]),
+            'get_echeances_by_student_id': _timed(db_manager.get_echeances_by_student_id, [
+                (student_id,) for student_id in sample
+            ]),
+        }
+        db_manager.close()
+    return {'students': students, 'dataset': dataset, 'operations': operations}
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(report, baseline, threshold):
+    # Retourne [(taille, opération, p50 référence, p50 actuel)] des régressions
+    previous = {run['students']: run['operations'] for run in baseline['runs']}
+    regressions = []
+    for run in report['runs']:
+        for name, result in run['operations'].items():
+            before = previous.get(run['students'], {}).get(name)
+            if before and result['p50_ms'] > before['p50_ms'] * (1 + threshold):
+                regressions.append((run['students'], name, before['p50_ms'], result['p50_ms']))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks de DatabaseManager')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--calls', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='fichier JSON du rapport (sortie standard par défaut)')
+    parser.add_argument('--compare', help='rapport JSON de référence')
+    parser.add_argument('--threshold', type=float, default=0.2)
+    args = parser.parse_args()
+
+    report = {
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'seed': args.seed,
+        'calls': args.calls,
+        'runs': [],
+    }
+    for size in args.sizes:
+        print(f'{size} élèves...', file=sys.stderr)
+        report['runs'].append(bench_size(size, args.calls, args.seed))
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output)
+    else:
+        print(output)
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        for size, name, before, after in regressions:
+            print(f'RÉGRESSION {name} ({size} élèves) : p50 {before:.2f} ms -> {after:.2f} ms', file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
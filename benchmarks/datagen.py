@@ -0,0 +1,178 @@
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.db_manager import DatabaseManager
+from database.fee_rules import current_school_year
+
+# Générateur de jeux de données synthétiques, reproductible (graine fixe).
+# Écoles x classes x élèves x responsables x années d'historique de frais :
+# les années passées sont entièrement payées, l'année en cours l'est en partie.
+#
+#     python benchmarks/datagen.py bench.db --students 10000 --schools 2 --years 3
+
+NOMS = [
+    'Martin', 'Bernard', 'Dubois', 'Thomas', 'Robert', 'Richard', 'Petit', 'Durand', 'Leroy', 'Moreau',
+    'Simon', 'Laurent', 'Lefebvre', 'Michel', 'Garcia', 'David', 'Bertrand', 'Roux', 'Vincent', 'Fournier',
+    'Mbongo', 'Nguema', 'Obiang', 'Ondo', 'Mba', 'Ndong', 'Ella', 'Nzé', 'Moussavou', 'Koumba',
+    'Mouketou', 'Bongo', 'Essono', 'Minko', 'Ovono', 'Boussougou', 'Mabika', 'Nkoghe', 'Obame', 'Engone',
+]
+PRENOMS_M = [
+    'Paul', 'Lucas', 'Hugo', 'Louis', 'Jules', 'Arthur', 'Nathan', 'Léo', 'Gabriel', 'Raphaël',
+    'Jean', 'Pierre', 'Thomas', 'Noah', 'Ethan', 'Junior', 'Ulrich', 'Rodrigue', 'Cédric', 'Aimé',
+]
+PRENOMS_F = [
+    'Emma', 'Jade', 'Louise', 'Alice', 'Chloé', 'Lina', 'Léa', 'Manon', 'Rose', 'Anna',
+    'Sophie', 'Marie', 'Claire', 'Sarah', 'Inès', 'Grâce', 'Prisca', 'Nadège', 'Murielle', 'Ornella',
+]
+NATIONALITES = [('Gabonaise', 55), ('Française', 30), ('Camerounaise', 5), ('Congolaise', 4),
+                ('Sénégalaise', 3), ('Américaine', 3)]
+NIVEAUX = ['PS', 'MS', 'GS', 'CP', 'CE1', 'CE2', 'CM1', 'CM2']
+MODES = [('standard', 60), ('echéancier', 40)]
+
+
+def _weighted(rng, choices):
+    return rng.choices([c for c, _ in choices], weights=[w for _, w in choices])[0]
+
+
+def _students(rng, count, class_ids, first_year):
+    for i in range(count):
+        sexe = rng.choice('MF')
+        prenom = rng.choice(PRENOMS_M if sexe == 'M' else PRENOMS_F)
+        age = rng.randint(3, 11)
+        naissance = f'{first_year - age}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}'
+        statut = 'Inscription' if rng.random() < 0.3 else 'Réinscription'
+        yield (rng.choice(NOMS), prenom, naissance, _weighted(rng, NATIONALITES), sexe, statut,
+               class_ids[i % len(class_ids)])
+
+
+def _responsable(rng, nom, index):
+    sexe = rng.choice('MF')
+    prenom = rng.choice(PRENOMS_M if sexe == 'M' else PRENOMS_F)
+    type_ = 'Tuteur' if rng.random() < 0.05 else ('Père' if sexe == 'M' else 'Mère')
+    tel = f'0{rng.choice("67")}{rng.randint(0, 99999999):08d}'
+    tel2 = f'0{rng.choice("67")}{rng.randint(0, 99999999):08d}' if rng.random() < 0.5 else None
+    email = f'{prenom}.{nom}.{index}@example.com'.lower()
+    return (type_, nom, prenom, tel, tel2, email)
+
+
+def generate(db_manager, students=1000, schools=1, classes_per_school=None, years=2,
+             guardians_per_student=1.5, siblings_rate=0.2, seed=42):
+    """Remplit db_manager et retourne un résumé du volume généré.
+
+    Une "école" est un groupe de classes (le schéma ne gère qu'un établissement) :
+    "CP A", "CP B"... years : nombre d'années de frais, la dernière étant en cours.
+    """
+    rng = random.Random(seed)
+    classes_per_school = classes_per_school or max(len(NIVEAUX), students // (25 * schools))
+    started = time.perf_counter()
+
+    with db_manager.transaction():
+        teacher_ids = []
+        class_ids = []
+        for school in range(schools):
+            for i in range(classes_per_school):
+                teacher_ids.append(db_manager.add_teacher(
+                    (rng.choice(NOMS), rng.choice(PRENOMS_F + PRENOMS_M),
+                     f'enseignant{len(teacher_ids)}@example.com', f'01{rng.randint(0, 999999):06d}')))
+                nom = f'{NIVEAUX[i % len(NIVEAUX)]} {chr(ord("A") + school)}{i // len(NIVEAUX) + 1}'
+                class_ids.append(db_manager.add_class((nom, teacher_ids[-1])))
+
+    first_year = date.today().year - years
+    report = db_manager.bulk_import_students(_students(rng, students, class_ids, first_year))
+    student_ids = [report.ids[i] for i in sorted(report.ids)]
+
+    # Responsables : en moyenne guardians_per_student par élève, une part des
+    # familles regroupant plusieurs enfants (fratries)
+    families = []
+    for student_id in student_ids:
+        if families and rng.random() < siblings_rate:
+            rng.choice(families)[1].append(student_id)
+        else:
+            families.append(([], [student_id]))
+    responsables = []
+    for guardians, _ in families:
+        nom = rng.choice(NOMS)
+        count = 2 if rng.random() < guardians_per_student - 1 else 1
+        for _ in range(count):
+            guardians.append(len(responsables))
+            responsables.append(_responsable(rng, nom, len(responsables)))
+    report = db_manager.bulk_import_responsables(responsables)
+    links = [
+        (student_id, report.ids[guardian])
+        for guardians, children in families
+        for guardian in guardians
+        for student_id in children
+    ]
+    with db_manager.transaction():
+        db_manager.conn.executemany(
+            'INSERT OR IGNORE INTO student_responsable (student_id, responsable_id) VALUES (?, ?)', links)
+
+    # Historique : un frais par élève et par année, les plus anciens d'abord
+    modes = {student_id: _weighted(rng, MODES) for student_id in student_ids}
+    bourses = {student_id: rng.choice([10, 20, 25, 50]) for student_id in student_ids if rng.random() < 0.1}
+    current_start = int(current_school_year()[:4])
+    for start in range(current_start - years + 1, current_start + 1):
+        for mode in ('standard', 'echéancier'):
+            db_manager.generate_fees_for_year(
+                student_ids=[s for s in student_ids if modes[s] == mode], mode_paiement=mode, bourse_map=bourses,
+                annee_scolaire=f'{start}-{start + 1}')
+
+    # Paiements : années passées soldées, année en cours payée en partie.
+    # Les virements sont répartis sur les échéances les plus anciennes.
+    dues = dict(db_manager.conn.execute('''
+        SELECT f.student_id, SUM(e.montant)
+        FROM echeancier e JOIN frais_scolarite f ON f.id = e.frais_id
+        GROUP BY f.student_id
+    '''))
+    transfers = []
+    for n, student_id in enumerate(student_ids):
+        due = dues.get(student_id, 0)
+        current = due // years
+        montant = due - current + int(current * rng.choice([0, 0.25, 0.5, 0.75, 1]))
+        if montant > 0:
+            transfers.append((student_id, montant, f'{first_year + years - 1}-10-{rng.randint(1, 28):02d}',
+                              rng.choice(['virement', 'espèces', 'chèque', 'mobile money']), f'GEN-{n}'))
+    payments = db_manager.reconcile_payments(transfers)
+
+    return {
+        'seed': seed,
+        'schools': schools,
+        'classes': len(class_ids),
+        'students': len(student_ids),
+        'responsables': len(responsables),
+        'links': len(links),
+        'years': years,
+        'echeances': db_manager.conn.execute('SELECT COUNT(*) FROM echeancier').fetchone()[0],
+        'paiements': len(payments.allocations),
+        'seconds': time.perf_counter() - started,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Génère une base de données synthétique')
+    parser.add_argument('db_name')
+    parser.add_argument('--students', type=int, default=1000)
+    parser.add_argument('--schools', type=int, default=1)
+    parser.add_argument('--classes-per-school', type=int, default=None)
+    parser.add_argument('--years', type=int, default=2)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    if os.path.exists(args.db_name):
+        parser.error(f'{args.db_name} existe déjà')
+    db_manager = DatabaseManager(args.db_name, profile='bulk_import')
+    summary = generate(db_manager, students=args.students, schools=args.schools,
+                       classes_per_school=args.classes_per_school, years=args.years, seed=args.seed)
+    db_manager.close()
+    for key, value in summary.items():
+        print(f'{key:<14}{value:>12.2f}' if isinstance(value, float) else f'{key:<14}{value:>12}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.datagen import generate
+from database.db_manager import DatabaseManager
+from database.rows import Student, row_factory
+
+# Mémoire et temps de lecture de la table students selon la représentation
+# des lignes : tuples, namedtuple de database/rows.py, sqlite3.Row et
+# dictionnaires. Résultats ramenés à 100 000 lignes.
+#
+#     python benchmarks/row_memory.py --students 100000
+
+
+def _dict_factory(cursor, row):
+    return {column[0]: value for column, value in zip(cursor.description, row)}
+
+
+FACTORIES = {
+    'tuple': None,
+    'namedtuple': row_factory(Student),
+    'sqlite3.Row': sqlite3.Row,
+    'dict': _dict_factory,
+}
+
+
+def measure(conn, factory):
+    cursor = conn.cursor()
+    if factory is not None:
+        cursor.row_factory = factory
+    tracemalloc.start()
+    start = time.perf_counter()
+    rows = cursor.execute('SELECT * FROM students').fetchall()
+    elapsed = time.perf_counter() - start
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    count = len(rows)
+    del rows
+    return {'rows': count, 'bytes_per_row': size / count, 'ms_per_100k': elapsed * 1000 * 100000 / count}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Coût mémoire des lignes par représentation')
+    parser.add_argument('--students', type=int, default=100000)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        db_name = os.path.join(directory, 'rows.db')
+        db_manager = DatabaseManager(db_name, profile='bulk_import')
+        generate(db_manager, students=args.students, years=1, seed=args.seed)
+        db_manager.close()
+
+        conn = sqlite3.connect(db_name)
+        print(f'{"représentation":<14}{"octets/ligne":>14}{"Mo/100k":>10}{"ms/100k":>10}')
+        for name, factory in FACTORIES.items():
+            result = measure(conn, factory)
+            print(f'{name:<14}{result["bytes_per_row"]:>14.0f}'
+                  f'{result["bytes_per_row"] * 100000 / 2 ** 20:>10.1f}{result["ms_per_100k"]:>10.0f}')
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,191 @@
+import os
+from contextlib import contextmanager
+
+from database.fee_rules import current_school_year
+from database.migrations import create_payment_triggers
+
+# Archivage des années scolaires closes.
+# Les frais d'une année close, avec leurs échéances et paiements, quittent la
+# base principale pour une base d'archive (par défaut ecole_archive.db à côté
+# de ecole.db). La base principale ne garde que les années ouvertes : index,
+# soldes et rapports ne grossissent plus avec l'historique. L'archive reste
+# interrogeable : elle est attachée (ATTACH ... AS archive) aux connexions qui
+# la lisent, voir DatabaseManager.get_student_history.
+#
+# Copie et suppression se font dans une même transaction. La base principale
+# étant en WAL, la validation n'est pas atomique entre les deux fichiers : en
+# cas de coupure, une année peut se retrouver dans les deux bases, jamais dans
+# aucune, et relancer archive_year termine l'opération (les lignes déjà
+# archivées à l'identique sont ignorées).
+#
+# Une ligne archivée n'est jamais écrasée : les identifiants ne sont pas
+# réutilisés (AUTOINCREMENT, migration 10, et sqlite_sequence relevé au-dessus
+# des identifiants archivés) et une collision fait échouer l'archivage.
+
+SCHEMA = 'archive'
+
+# Tables archivées, parents d'abord
+ARCHIVE_TABLES = ('frais_scolarite', 'echeancier', 'paiements')
+
+# Identifiants des lignes d'une année scolaire, par table
+YEAR_ROWS = {
+    'frais_scolarite': 'SELECT id FROM main.frais_scolarite WHERE annee_scolaire = ?',
+    'echeancier': '''
+        SELECT e.id FROM main.frais_scolarite f
+        JOIN main.echeancier e ON e.frais_id = f.id
+        WHERE f.annee_scolaire = ?
+    ''',
+    'paiements': '''
+        SELECT p.id FROM main.frais_scolarite f
+        JOIN main.echeancier e ON e.frais_id = f.id
+        JOIN main.paiements p ON p.echeance_id = e.id
+        WHERE f.annee_scolaire = ?
+    ''',
+}
+
+ARCHIVE_INDEXES = (
+    f'CREATE INDEX IF NOT EXISTS {SCHEMA}.idx_frais_scolarite_annee ON frais_scolarite(annee_scolaire, student_id)',
+    f'CREATE INDEX IF NOT EXISTS {SCHEMA}.idx_frais_scolarite_student_id ON frais_scolarite(student_id)',
+    f'CREATE INDEX IF NOT EXISTS {SCHEMA}.idx_echeancier_frais_id ON echeancier(frais_id)',
+    f'CREATE INDEX IF NOT EXISTS {SCHEMA}.idx_paiements_echeance_id ON paiements(echeance_id)',
+)
+
+
+def default_archive_path(db_name):
+    # ecole.db -> ecole_archive.db ; pas d'archive pour une base en mémoire
+    if not db_name or db_name == ':memory:':
+        return None
+    root, ext = os.path.splitext(db_name)
+    return f'{root}_archive{ext or ".db"}'
+
+
+def is_attached(conn):
+    return any(row[1] == SCHEMA for row in conn.execute('PRAGMA database_list'))
+
+
+def attach(conn, path):
+    # Attache l'archive à conn si elle existe ; retourne True si elle est lisible.
+    # Une connexion garde l'archive attachée pour les lectures suivantes.
+    if is_attached(conn):
+        return True
+    if not path or not os.path.exists(path):
+        return False
+    conn.execute(f'ATTACH DATABASE ? AS {SCHEMA}', (path,))
+    return True
+
+
+def _columns(conn, schema, table):
+    return [(row[1], row[2]) for row in conn.execute(f'PRAGMA {schema}.table_info({table})')]
+
+
+def _prepare(conn):
+    # Tables de l'archive aux colonnes de la base principale, sans clés
+    # étrangères (élèves et classes restent dans la base principale)
+    for table in ARCHIVE_TABLES:
+        columns = _columns(conn, 'main', table)
+        existing = {name for name, _ in _columns(conn, SCHEMA, table)}
+        if not existing:
+            definition = ', '.join(
+                f'{name} {type_}' + (' PRIMARY KEY' if name == 'id' else '') for name, type_ in columns
+            )
+            conn.execute(f'CREATE TABLE {SCHEMA}.{table} ({definition})')
+            continue
+        for name, type_ in columns:
+            if name not in existing:
+                conn.execute(f'ALTER TABLE {SCHEMA}.{table} ADD COLUMN {name} {type_}')
+    for ddl in ARCHIVE_INDEXES:
+        conn.execute(ddl)
+
+
+def _reserve_archived_ids(db, name, table):
+    # La séquence de la base principale ne redescend jamais sous le plus grand
+    # identifiant archivé (archives antérieures à la migration 10 comprises)
+    db._execute(name, f'''
+        INSERT INTO sqlite_sequence (name, seq)
+        SELECT '{table}', 0 WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = '{table}')
+    ''')
+    db._execute(name, f'''
+        UPDATE sqlite_sequence SET seq = MAX(seq, (SELECT IFNULL(MAX(id), 0) FROM {SCHEMA}.{table}))
+        WHERE name = '{table}'
+    ''')
+
+
+def _copy_sql(table, columns):
+    # INSERT simple : un identifiant déjà archivé avec un autre contenu lève
+    # sqlite3.IntegrityError ; une ligne identique (reprise) est ignorée
+    same = ''.join(f' AND a.{name} IS m.{name}' for name in columns if name != 'id')
+    return f'''
+        INSERT INTO {SCHEMA}.{table} ({', '.join(columns)})
+        SELECT {', '.join(f'm.{name}' for name in columns)} FROM main.{table} m
+        WHERE m.id IN ({YEAR_ROWS[table]})
+          AND NOT EXISTS (SELECT 1 FROM {SCHEMA}.{table} a WHERE a.id = m.id{same})
+    '''
+
+
+@contextmanager
+def _attached_writer(db, path):
+    # Connexion d'écriture avec l'archive attachée (créée au besoin)
+    if db.in_transaction():
+        # ATTACH est refusé par SQLite à l'intérieur d'une transaction
+        raise RuntimeError('L\'archive ne peut pas être attachée dans une transaction')
+    with db.pool.write() as conn:
+        if conn.in_transaction:
+            conn.commit()
+        attached = not is_attached(conn)
+        if attached:
+            conn.execute(f'ATTACH DATABASE ? AS {SCHEMA}', (path,))
+            conn.execute(f'PRAGMA {SCHEMA}.journal_mode = WAL')
+        try:
+            yield conn
+        finally:
+            if attached:
+                conn.execute(f'DETACH DATABASE {SCHEMA}')
+
+
+def reserve_archived_ids(db, path):
+    # Appelé après la migration 10 sur une base qui a déjà une archive
+    if not path or not os.path.exists(path):
+        return
+    with _attached_writer(db, path) as conn, db.transaction():
+        _prepare(conn)
+        for table in ARCHIVE_TABLES:
+            _reserve_archived_ids(db, 'migrate', table)
+
+
+def archive_year(db, annee_scolaire, path, force=False):
+    """Déplace les frais de annee_scolaire vers l'archive ; retourne {table: lignes déplacées}.
+
+    Seules les années closes (antérieures à l'année en cours) sont acceptées.
+    Une année qui compte encore des échéances impayées est refusée, sauf
+    force=True : ces impayés sortent alors des soldes de la base principale.
+    Un identifiant déjà archivé pour une autre ligne lève sqlite3.IntegrityError
+    et rien n'est déplacé.
+    """
+    if not path:
+        raise ValueError('Pas de base d\'archive pour une base en mémoire')
+    if annee_scolaire >= current_school_year():
+        raise ValueError(f'L\'année {annee_scolaire} n\'est pas close')
+
+    with _attached_writer(db, path) as conn, db.transaction():
+        unpaid = db._fetchone('archive_year', f'''
+            SELECT COUNT(*) FROM echeancier WHERE paye = 0 AND id IN ({YEAR_ROWS['echeancier']})
+        ''', (annee_scolaire,))[0]
+        if unpaid and not force:
+            raise ValueError(f'{unpaid} échéance(s) impayée(s) en {annee_scolaire}')
+        _prepare(conn)
+        moved = {}
+        for table in ARCHIVE_TABLES:
+            columns = [name for name, _ in _columns(conn, 'main', table)]
+            moved[table] = db._execute('archive_year', _copy_sql(table, columns), (annee_scolaire,)).rowcount
+            _reserve_archived_ids(db, 'archive_year', table)
+        # Le registre des paiements est en ajout seul : le trigger qui
+        # l'interdit est levé le temps de la suppression, dans la transaction
+        conn.execute('DROP TRIGGER IF EXISTS paiements_no_delete')
+        for table in reversed(ARCHIVE_TABLES):
+            db._execute('archive_year', f'DELETE FROM main.{table} WHERE id IN ({YEAR_ROWS[table]})',
+                        (annee_scolaire,))
+        create_payment_triggers(conn)
+        # Les triggers des soldes ont retiré les échéances ; les mois vidés disparaissent
+        db._execute('archive_year', 'DELETE FROM soldes_eleves WHERE du = 0 AND paye = 0')
+        db._execute('archive_year', 'DELETE FROM soldes_classes WHERE du = 0 AND paye = 0')
+    return moved
@@ -0,0 +1,152 @@
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+from database.db_manager import DatabaseManager
+
+# Façade asyncio de DatabaseManager pour l'interface et les tâches de relance.
+# Toutes les requêtes s'exécutent sur un thread dédié qui possède son propre
+# DatabaseManager (donc ses propres connexions) : la boucle d'événements n'est
+# jamais bloquée. Chaque méthode publique de DatabaseManager existe ici en
+# version coroutine, avec un argument supplémentaire timeout (secondes).
+#
+#     db = await AsyncDatabaseManager.open('ecole.db')
+#     impayes = await db.get_unpaid_fees(timeout=5)
+#     async for row in db.iter_students():
+#         ...
+#
+# Une coroutine annulée (ou expirée) retire sa requête de la file si elle n'a
+# pas commencé, sinon l'interrompt avec sqlite3.Connection.interrupt(). Les
+# lectures identiques lancées en même temps ne donnent lieu qu'à une requête ;
+# les résultats sont alors partagés et ne doivent pas être modifiés.
+
+# Méthodes sans équivalent asynchrone : transaction() et in_transaction() sont
+# liées au thread appelant, utiliser run() pour grouper plusieurs écritures
+EXCLUDED = ('transaction', 'in_transaction', 'close')
+
+# Lectures pouvant être regroupées entre appelants concurrents
+READ_PREFIXES = ('get_', 'search_', 'is_', 'calculate_', 'find_')
+
+
+class AsyncDatabaseManager:
+    def __init__(self, db_name='ecole.db', timeout=None, **kwargs):
+        # Bloquant (migrations) : depuis une boucle, préférer AsyncDatabaseManager.open()
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='database')
+        self.db = self._executor.submit(DatabaseManager, db_name, **kwargs).result()
+        # Appel en cours d'exécution sur le thread dédié (voir _interrupt)
+        self._running = None
+        self._running_lock = threading.Lock()
+        # {(méthode, args, kwargs): [tâche, nombre d'appelants en attente]}
+        self._inflight = {}
+
+    @classmethod
+    async def open(cls, db_name='ecole.db', timeout=None, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(cls, db_name, timeout, **kwargs))
+
+    # ---------------- Exécution sur le thread dédié ----------------
+    def _run_on_thread(self, token, function, args, kwargs):
+        with self._running_lock:
+            self._running = token
+        try:
+            return function(*args, **kwargs)
+        finally:
+            with self._running_lock:
+                self._running = None
+
+    def _interrupt(self, token):
+        # Interrompt la requête en cours, seulement si c'est encore celle de token
+        with self._running_lock:
+            if self._running is token:
+                self.db.pool.interrupt()
+
+    async def _run_cancellable(self, function, args=(), kwargs=None):
+        token = object()
+        future = self._executor.submit(self._run_on_thread, token, function, args, kwargs or {})
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            # Pas encore commencée : retirée de la file ; sinon interrompue
+            if not future.cancel():
+                self._interrupt(token)
+            raise
+
+    async def _submit(self, function, args=(), kwargs=None, timeout=None):
+        timeout = self.timeout if timeout is None else timeout
+        return await asyncio.wait_for(self._run_cancellable(function, args, kwargs), timeout)
+
+    async def _coalesced(self, name, function, args, kwargs, timeout):
+        key = (name, args, tuple(sorted(kwargs.items())))
+        try:
+            hash(key)
+        except TypeError:
+            return await self._submit(function, args, kwargs, timeout)
+        entry = self._inflight.get(key)
+        if entry is None:
+            # La requête partagée n'a pas de délai propre : chaque appelant a le sien
+            task = asyncio.ensure_future(self._run_cancellable(function, args, kwargs))
+            entry = self._inflight[key] = [task, 0]
+            task.add_done_callback(lambda _: self._inflight.pop(key, None)
+                                   if self._inflight.get(key) is entry else None)
+        entry[1] += 1
+        try:
+            return await asyncio.wait_for(asyncio.shield(entry[0]), self.timeout if timeout is None else timeout)
+        except (asyncio.CancelledError, asyncio.TimeoutError):
+            # Le dernier appelant qui abandonne annule la requête partagée
+            entry[1] -= 1
+            if entry[1] == 0:
+                entry[0].cancel()
+            raise
+
+    async def run(self, function, *args, timeout=None):
+        # Exécute function(db, *args) sur le thread dédié, par exemple une
+        # transaction regroupant plusieurs écritures :
+        #     await adb.run(lambda db: ...)
+        return await self._submit(function, (self.db,) + args, timeout=timeout)
+
+    async def close(self):
+        await self._submit(self.db.close)
+        self._executor.shutdown(wait=True)
+
+
+def _coroutine(name):
+    method = getattr(DatabaseManager, name)
+    coalesce = name.startswith(READ_PREFIXES)
+
+    @functools.wraps(method)
+    async def call(self, *args, timeout=None, **kwargs):
+        function = getattr(self.db, name)
+        if coalesce:
+            return await self._coalesced(name, function, args, kwargs, timeout)
+        return await self._submit(function, args, kwargs, timeout)
+    return call
+
+
+def _async_iterator(name):
+    method = getattr(DatabaseManager, name)
+
+    @functools.wraps(method)
+    async def iterate(self, *args, batch_size=500, timeout=None, **kwargs):
+        # Le curseur reste sur le thread dédié ; chaque paquet est lu par un appel
+        rows = await self._submit(getattr(self.db, name), args, dict(kwargs, batch_size=batch_size), timeout)
+        try:
+            while True:
+                batch = await self._submit(lambda: list(islice(rows, batch_size)), timeout=timeout)
+                if not batch:
+                    break
+                for row in batch:
+                    yield row
+        finally:
+            await self._submit(rows.close)
+    return iterate
+
+
+for _name in dir(DatabaseManager):
+    if _name.startswith('_') or _name in EXCLUDED or not callable(getattr(DatabaseManager, _name)):
+        continue
+    setattr(AsyncDatabaseManager, _name,
+            _async_iterator(_name) if _name.startswith('iter_') else _coroutine(_name))
+del _name
@@ -0,0 +1,245 @@
+import gzip
+import logging
+import os
+import re
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+# Sauvegardes à chaud de la base avec l'API de sauvegarde de SQLite.
+# La copie se fait par paquets de pages depuis une connexion dédiée qui garde
+# une transaction de lecture ouverte : en WAL, elle copie un instantané
+# cohérent pendant que l'application continue d'écrire, sans jamais
+# recommencer (une écriture d'une autre connexion relance sinon la copie
+# depuis le début). Entre deux paquets la copie cède la main (sleep), pour ne
+# pas concurrencer les requêtes de l'interface : Connection.backup ne dort
+# qu'après un paquet refusé (BUSY / LOCKED), ce qui n'arrive pas avec un
+# instantané WAL, la pause est donc faite dans le rappel de progression.
+#
+#     db.backup('copie.db', progress_cb=lambda status, remaining, total: ...)
+#     path = db.snapshot('sauvegardes/')        # sauvegardes/ecole-20241015-103000.db.gz
+#     db.restore(path)
+#     BackupScheduler(db, 'sauvegardes/').start()
+
+logger = logging.getLogger('database.backup')
+
+DEFAULT_PAGES_PER_STEP = 256
+# Pause entre deux paquets de pages (secondes)
+DEFAULT_STEP_SLEEP = 0.005
+SNAPSHOT_SUFFIX = '.db.gz'
+
+
+def _throttled(progress_cb, sleep):
+    # Rappel de progression qui marque une pause tant qu'il reste des pages
+    def progress(status, remaining, total):
+        if progress_cb is not None:
+            progress_cb(status, remaining, total)
+        if remaining > 0 and sleep > 0:
+            time.sleep(sleep)
+    return progress
+
+
+def backup(db, dest, pages_per_step=DEFAULT_PAGES_PER_STEP, progress_cb=None, sleep=DEFAULT_STEP_SLEEP):
+    # dest : chemin du fichier de sauvegarde (remplacé s'il existe).
+    # progress_cb(status, remaining, total) est appelé après chaque paquet.
+    target = sqlite3.connect(dest)
+    try:
+        if db.pool.db_name == ':memory:':
+            # Une base en mémoire n'est lisible que par sa propre connexion ;
+            # l'écrivain étant réservé pendant toute la copie, pas de pause
+            with db.pool.write() as conn:
+                conn.backup(target, pages=pages_per_step, progress=progress_cb, sleep=sleep)
+            return
+        source = sqlite3.connect(db.pool.db_name, isolation_level=None)
+        try:
+            source.execute('PRAGMA query_only = ON')
+            # Instantané figé pour toute la durée de la copie
+            source.execute('BEGIN')
+            source.execute('SELECT COUNT(*) FROM sqlite_master').fetchone()
+            source.backup(target, pages=pages_per_step, progress=_throttled(progress_cb, sleep), sleep=sleep)
+            source.execute('COMMIT')
+        finally:
+            source.close()
+    finally:
+        # La copie est un fichier autonome : pas de -wal ni de -shm à côté
+        target.execute('PRAGMA journal_mode = DELETE')
+        target.close()
+
+
+def check_integrity(path, quick=False):
+    # Retourne la liste des problèmes trouvés (vide si la base est saine).
+    # Un instantané compressé est d'abord décompressé dans un fichier temporaire.
+    with _uncompressed(path) as db_path:
+        conn = sqlite3.connect(f'file:{db_path}?mode=ro', uri=True)
+        try:
+            pragma = 'quick_check' if quick else 'integrity_check'
+            rows = [row[0] for row in conn.execute(f'PRAGMA {pragma}')]
+        except sqlite3.DatabaseError as e:
+            return [str(e)]
+        finally:
+            conn.close()
+    return [] if rows == ['ok'] else rows
+
+
+def snapshot(db, directory, compress=True, pages_per_step=DEFAULT_PAGES_PER_STEP, sleep=DEFAULT_STEP_SLEEP):
+    # Sauvegarde horodatée et vérifiée dans directory ; retourne son chemin.
+    # Une copie corrompue lève sqlite3.DatabaseError et n'est pas conservée.
+    os.makedirs(directory, exist_ok=True)
+    name = f'{_snapshot_base(db)}-{datetime.now().strftime("%Y%m%d-%H%M%S")}'
+    dest = os.path.join(directory, name + (SNAPSHOT_SUFFIX if compress else '.db'))
+    fd, tmp = tempfile.mkstemp(suffix='.db', dir=directory)
+    os.close(fd)
+    try:
+        backup(db, tmp, pages_per_step=pages_per_step, sleep=sleep)
+        problems = check_integrity(tmp)
+        if problems:
+            raise sqlite3.DatabaseError(f'Sauvegarde corrompue : {problems[:5]}')
+        if compress:
+            with open(tmp, 'rb') as src, gzip.open(dest + '.part', 'wb') as out:
+                shutil.copyfileobj(src, out)
+            os.replace(dest + '.part', dest)
+        else:
+            os.replace(tmp, dest)
+    finally:
+        for path in (tmp, dest + '.part'):
+            if os.path.exists(path):
+                os.remove(path)
+    return dest
+
+
+def restore(db, source, pages_per_step=-1):
+    # Remplace le contenu de la base par la sauvegarde source (.db ou .db.gz),
+    # après vérification. La connexion d'écriture est réservée pendant la
+    # copie : les écritures attendent, les lectures en cours finissent sur
+    # l'ancien contenu. Les caches sont vidés et les migrations manquantes
+    # appliquées à la base restaurée. Les copies synchronisées par le journal
+    # des modifications devront se recharger (changes_since lève ValueError).
+    problems = check_integrity(source)
+    if problems:
+        raise sqlite3.DatabaseError(f'Sauvegarde corrompue : {problems[:5]}')
+    if db.in_transaction():
+        raise RuntimeError('restore ne peut pas être appelé dans une transaction')
+    with _uncompressed(source) as db_path:
+        backup_conn = sqlite3.connect(f'file:{db_path}?mode=ro', uri=True)
+        try:
+            with db.pool.write() as conn:
+                if conn.in_transaction:
+                    conn.commit()
+                live_seq = db.get_change_seq()
+                backup_conn.backup(conn, pages=pages_per_step)
+                db.reference_cache.clear()
+                db.migrate()
+                _expire_change_feed(conn, live_seq + 1)
+                conn.commit()
+        finally:
+            backup_conn.close()
+
+
+def _expire_change_feed(conn, seq):
+    # Les séquences reprennent au-delà de celles déjà distribuées et toute
+    # séquence antérieure est déclarée purgée
+    conn.execute('UPDATE changes_horizon SET seq = ? WHERE id = 1', (seq,))
+    if conn.execute("UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = 'changes'", (seq,)).rowcount == 0:
+        conn.execute("INSERT INTO sqlite_sequence (name, seq) VALUES ('changes', ?)", (seq,))
+
+
+class _uncompressed:
+    # Contexte : chemin d'une copie décompressée de path (ou path lui-même)
+    def __init__(self, path):
+        self.path = path
+        self.tmp = None
+
+    def __enter__(self):
+        if not self.path.endswith('.gz'):
+            return self.path
+        fd, self.tmp = tempfile.mkstemp(suffix='.db')
+        with os.fdopen(fd, 'wb') as out, gzip.open(self.path, 'rb') as src:
+            shutil.copyfileobj(src, out)
+        return self.tmp
+
+    def __exit__(self, *exc):
+        if self.tmp is not None:
+            os.remove(self.tmp)
+
+
+def _snapshot_base(db):
+    if db.pool.db_name == ':memory:':
+        return 'memoire'
+    return os.path.splitext(os.path.basename(db.pool.db_name))[0]
+
+
+def prune_snapshots(db, directory, keep):
+    # Supprime les instantanés de db les plus anciens au-delà de keep ; seuls
+    # les fichiers nommés par snapshot() sont concernés. Retourne les chemins supprimés.
+    pattern = re.compile(re.escape(_snapshot_base(db)) + r'-\d{8}-\d{6}\.db(\.gz)?$')
+    snapshots = sorted(
+        os.path.join(directory, name) for name in os.listdir(directory) if pattern.match(name)
+    )
+    removed = snapshots[:-keep] if keep > 0 else []
+    for path in removed:
+        os.remove(path)
+    return removed
+
+
+class BackupScheduler:
+    """Instantané toutes les interval secondes pendant les heures de cours.
+
+    hours : [début, fin) en heures locales ; weekdays : 0 = lundi. Seuls les
+    keep derniers instantanés sont conservés. La copie utilise sa propre
+    connexion de lecture : elle ne prend aucun verrou du pool.
+    """
+
+    def __init__(self, db, directory, interval=3600, hours=(7, 18), weekdays=(0, 1, 2, 3, 4), keep=48,
+                 compress=True, pages_per_step=DEFAULT_PAGES_PER_STEP, sleep=DEFAULT_STEP_SLEEP, clock=datetime.now):
+        self.db = db
+        self.directory = directory
+        self.interval = interval
+        self.hours = hours
+        self.weekdays = weekdays
+        self.keep = keep
+        self.compress = compress
+        self.pages_per_step = pages_per_step
+        self.sleep = sleep
+        self.clock = clock
+        self.last = None
+        self.last_error = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def in_school_hours(self, now=None):
+        now = now or self.clock()
+        return now.weekday() in self.weekdays and self.hours[0] <= now.hour < self.hours[1]
+
+    def run_once(self):
+        # Un instantané si l'on est dans les heures de cours ; retourne son chemin ou None
+        if not self.in_school_hours():
+            return None
+        try:
+            self.last = snapshot(self.db, self.directory, self.compress, self.pages_per_step, self.sleep)
+            prune_snapshots(self.db, self.directory, self.keep)
+            self.last_error = None
+        except (OSError, sqlite3.Error) as e:
+            self.last_error = e
+            logger.exception('Échec de la sauvegarde planifiée')
+            return None
+        return self.last
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.run_once()
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='backup', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
@@ -0,0 +1,213 @@
+import sqlite3
+from itertools import islice
+
+# Import en masse des élèves, responsables et liens élève-responsable.
+# Les enregistrements sont lus au fil de l'eau depuis n'importe quel itérable
+# (csv.reader, csv.DictReader, générateur...) et insérés par paquets avec
+# executemany dans une seule transaction. Une ligne invalide est signalée
+# dans le rapport sans interrompre le reste de l'import.
+
+STUDENT_FIELDS = ('nom', 'prenom', 'date_naissance', 'nationalite', 'sexe', 'statut', 'classe_id')
+STUDENT_REQUIRED = ('nom', 'prenom')
+
+RESPONSABLE_FIELDS = ('type', 'nom', 'prenom', 'tel1', 'tel2', 'email')
+RESPONSABLE_REQUIRED = ('nom', 'prenom', 'tel1', 'email')
+
+DEFAULT_CHUNK_SIZE = 500
+
+
+class ImportReport:
+    def __init__(self):
+        self.inserted = 0
+        self.linked = 0
+        # {index de la ligne dans l'itérable: id inséré}
+        self.ids = {}
+        # [(index de la ligne, message)]
+        self.errors = []
+
+    def add_error(self, index, message):
+        self.errors.append((index, message))
+
+    def __repr__(self):
+        return f'ImportReport(inserted={self.inserted}, linked={self.linked}, errors={len(self.errors)})'
+
+
+def student_key(nom, prenom, date_naissance):
+    # Clé naturelle d'un élève : nom, prénom et date de naissance
+    return (_clean(nom).lower(), _clean(prenom).lower(), _clean(date_naissance))
+
+
+def responsable_key(email):
+    # Clé naturelle d'un responsable : son email
+    return _clean(email).lower()
+
+
+def _clean(value):
+    if value is None:
+        return ''
+    return str(value).strip()
+
+
+def _chunks(iterable, size):
+    iterator = enumerate(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _normalize(record, fields, required):
+    # Accepte un tuple dans l'ordre des colonnes ou un dictionnaire (csv.DictReader)
+    if isinstance(record, dict):
+        values = [record.get(field) for field in fields]
+    else:
+        values = list(record)
+        if len(values) != len(fields):
+            raise ValueError(f'{len(fields)} colonnes attendues, {len(values)} reçues')
+    values = [None if isinstance(v, str) and not v.strip() else v for v in values]
+    missing = [field for field, value in zip(fields, values) if field in required and value is None]
+    if missing:
+        raise ValueError(f'champ(s) obligatoire(s) manquant(s) : {", ".join(missing)}')
+    return tuple(values)
+
+
+def _next_id(db, name, table):
+    return db._fetchone(name, f'SELECT COALESCE(MAX(id), 0) + 1 FROM {table}')[0]
+
+
+def _insert_chunk(db, name, sql, rows, report):
+    # rows : [(index, valeurs avec id)]. Un seul executemany par paquet ; si le
+    # paquet échoue, il est annulé (transaction imbriquée) puis rejoué ligne
+    # par ligne pour isoler les erreurs.
+    try:
+        with db.transaction():
+            db._executemany(name, sql, [values for _, values in rows])
+    except sqlite3.DatabaseError:
+        inserted = []
+        for index, values in rows:
+            try:
+                with db.transaction():
+                    db._execute(name, sql, values)
+            except sqlite3.DatabaseError as e:
+                report.add_error(index, str(e))
+            else:
+                inserted.append((index, values))
+        rows = inserted
+    for index, values in rows:
+        report.ids[index] = values[0]
+    report.inserted += len(rows)
+    return rows
+
+
+def _import(db, name, table, fields, required, records, chunk_size, report, on_inserted=None):
+    # name : nom des requêtes dans le registre de DatabaseManager
+    sql = f'INSERT INTO {table} (id, {", ".join(fields)}) VALUES ({", ".join("?" * (len(fields) + 1))})'
+    for chunk in _chunks(records, chunk_size):
+        rows = []
+        next_id = _next_id(db, name, table)
+        for index, record in chunk:
+            try:
+                values = _normalize(record, fields, required)
+            except (ValueError, TypeError) as e:
+                report.add_error(index, str(e))
+                continue
+            rows.append((index, (next_id,) + values))
+            next_id += 1
+        if not rows:
+            continue
+        inserted = _insert_chunk(db, name, sql, rows, report)
+        if on_inserted is not None:
+            on_inserted(chunk, inserted)
+
+
+def _student_key_map(db, name):
+    return {
+        student_key(nom, prenom, date_naissance): student_id
+        for student_id, nom, prenom, date_naissance in db._stream(
+            name, 'SELECT id, nom, prenom, date_naissance FROM students'
+        )
+    }
+
+
+def _responsable_key_map(db, name):
+    keys = {}
+    for responsable_id, email in db._stream(name, 'SELECT id, email FROM responsables'):
+        keys.setdefault(responsable_key(email), responsable_id)
+    return keys
+
+
+def _insert_links(db, name, links, report):
+    # links : [(index, student_id, responsable_id)] ; les liens déjà présents sont ignorés
+    if not links:
+        return
+    # rowcount et non total_changes : ce dernier compte aussi les écritures
+    # des triggers (journal des modifications)
+    report.linked += db._executemany(name, '''
+        INSERT OR IGNORE INTO student_responsable (student_id, responsable_id)
+        VALUES (?, ?)
+    ''', [(student_id, responsable_id) for _, student_id, responsable_id in links]).rowcount
+
+
+def bulk_import_students(db, records, chunk_size=DEFAULT_CHUNK_SIZE):
+    report = ImportReport()
+    with db.transaction():
+        _import(db, 'bulk_import_students', 'students', STUDENT_FIELDS, STUDENT_REQUIRED, records, chunk_size, report)
+    return report
+
+
+def bulk_import_responsables(db, records, chunk_size=DEFAULT_CHUNK_SIZE):
+    # Chaque enregistrement peut porter une clé "students" : liste de clés
+    # naturelles (nom, prenom, date_naissance) des élèves à lier.
+    report = ImportReport()
+    student_ids = None
+
+    def link_students(chunk, inserted):
+        nonlocal student_ids
+        records_by_index = dict(chunk)
+        links = []
+        for index, values in inserted:
+            record = records_by_index[index]
+            keys = record.get('students') if isinstance(record, dict) else None
+            if not keys:
+                continue
+            if student_ids is None:
+                student_ids = _student_key_map(db, 'bulk_import_responsables')
+            for key in keys:
+                student_id = student_ids.get(student_key(*key))
+                if student_id is None:
+                    report.add_error(index, f'élève introuvable : {" ".join(_clean(k) for k in key)}')
+                else:
+                    links.append((index, student_id, values[0]))
+        _insert_links(db, 'bulk_import_responsables', links, report)
+
+    with db.transaction():
+        _import(db, 'bulk_import_responsables', 'responsables', RESPONSABLE_FIELDS, RESPONSABLE_REQUIRED,
+                records, chunk_size, report, on_inserted=link_students)
+    return report
+
+
+def bulk_link_student_responsable(db, links, chunk_size=DEFAULT_CHUNK_SIZE):
+    # links : itérable de ((nom, prenom, date_naissance), email_responsable)
+    report = ImportReport()
+    with db.transaction():
+        student_ids = _student_key_map(db, 'bulk_link_student_responsable')
+        responsable_ids = _responsable_key_map(db, 'bulk_link_student_responsable')
+        for chunk in _chunks(links, chunk_size):
+            resolved = []
+            for index, link in chunk:
+                try:
+                    student, email = link
+                    student_id = student_ids.get(student_key(*student))
+                except (ValueError, TypeError) as e:
+                    report.add_error(index, f'lien invalide : {e}')
+                    continue
+                responsable_id = responsable_ids.get(responsable_key(email))
+                if student_id is None:
+                    report.add_error(index, f'élève introuvable : {" ".join(_clean(k) for k in student)}')
+                elif responsable_id is None:
+                    report.add_error(index, f'responsable introuvable : {email}')
+                else:
+                    resolved.append((index, student_id, responsable_id))
+            _insert_links(db, 'bulk_link_student_responsable', resolved, report)
+    return report
@@ -0,0 +1,62 @@
+import threading
+import time
+from collections import OrderedDict
+
+# Cache en lecture des données de référence (classes, enseignants, infos de
+# l'école) : elles changent quelques fois par an mais sont lues à chaque écran.
+# Éviction LRU au-delà de maxsize entrées et expiration après ttl secondes ;
+# les méthodes d'écriture de DatabaseManager vident le cache.
+
+DEFAULT_CACHE_SIZE = 256
+DEFAULT_CACHE_TTL = 300  # secondes
+
+
+class ReferenceCache:
+    def __init__(self, maxsize=DEFAULT_CACHE_SIZE, ttl=DEFAULT_CACHE_TTL, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._entries = OrderedDict()  # clé -> (expiration, valeur)
+        self._lock = threading.Lock()
+        # Incrémenté à chaque invalidation
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_load(self, key, loader):
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            generation = self._generation
+
+        value = loader()
+
+        with self._lock:
+            # Une invalidation survenue pendant le chargement rend la valeur douteuse
+            if generation == self._generation:
+                self._entries[key] = (now + self.ttl, value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'size': len(self._entries),
+            }
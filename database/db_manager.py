@@ -1,522 +1,1312 @@
-import sqlite3
+import json
+import re
+import threading
+from contextlib import contextmanager
+
+from database import archive, backup, bulk_import, payments
+from database.cache import DEFAULT_CACHE_SIZE, DEFAULT_CACHE_TTL, ReferenceCache
+from database.fee_rules import ANY, FeeRules, current_school_year
+from database.migrations import (
+    BALANCE_BY_YEAR, BALANCE_PAID_SQL, apply_migrations, balance_recompute_sql, get_schema_version,
+    rebuild_balance_tables,
+)
+from database.money import percentage_of, to_fcfa
+from database.pool import DEFAULT_BUSY_TIMEOUT, DEFAULT_READERS, ConnectionPool
+from database.profiles import DEFAULT_PROFILE
+from database.rows import Change, Classe, Echeance, Enseignant, Frais, Responsable, Student, row_factory
+from database.statements import StatementRegistry, clock
+
+INSERT_FRAIS = '''
+    INSERT INTO frais_scolarite (id, student_id, total_annee, bourse_pourcentage, bourse_montant, frais_inscription, mode_paiement,
+                                 annee_scolaire)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+'''
+# Prochain identifiant de frais (AUTOINCREMENT, migration 10) : connu avant
+# l'insertion pour construire l'échéancier, jamais celui d'une ligne supprimée
+# ou archivée. Lu dans la transaction d'écriture qui insère.
+NEXT_FRAIS_ID = "SELECT IFNULL((SELECT seq FROM sqlite_sequence WHERE name = 'frais_scolarite'), 0) + 1"
+INSERT_ECHEANCE = '''
+    INSERT INTO echeancier (frais_id, mois, montant, paye, type)
+    VALUES (?, ?, ?, ?, ?)
+'''
+
+# Tables supprimées par reset_database. Les clés étrangères étant vérifiées,
+# chaque table fille passe avant ses parents.
+RESET_TABLES = (
+    'paiements', 'echeancier', 'frais_scolarite', 'student_responsable',
+    'students_fts', 'responsables_fts', 'students', 'responsables', 'classes', 'enseignants', 'school_info',
+    'soldes_eleves', 'soldes_classes', 'tarif_nationalites', 'tarifs', 'calendriers', 'changes', 'changes_horizon',
+)
+
+# Niveaux de pertinence d'une recherche, du meilleur au moins bon : tous les
+# mots saisis sont des mots entiers d'une colonne indexée, puis des débuts de
+# mots. À niveau égal, les fiches les plus récentes passent d'abord.
+SEARCH_TIERS = ('{exact}', '{prefix}')
+
 
 class DatabaseManager:
-    def __init__(self, db_name='ecole.db'):
-        self.conn = sqlite3.connect(db_name)
-        self.cursor = self.conn.cursor()
-        self.reset_database()
-
-    def reset_database(self):
-        self.cursor.execute('DROP TABLE IF EXISTS students')
-        self.cursor.execute('DROP TABLE IF EXISTS responsables')
-        self.cursor.execute('DROP TABLE IF EXISTS student_responsable')
-        self.cursor.execute('DROP TABLE IF EXISTS frais_scolarite')
-        self.cursor.execute('DROP TABLE IF EXISTS echeancier')
-        self.cursor.execute('DROP TABLE IF EXISTS classes')
-        self.cursor.execute('DROP TABLE IF EXISTS enseignants')
-        self.cursor.execute('DROP TABLE IF EXISTS school_info')
-        self.conn.commit()
+    def __init__(self, db_name='ecole.db', seed=False, readers=DEFAULT_READERS, busy_timeout=DEFAULT_BUSY_TIMEOUT,
+                 profile=DEFAULT_PROFILE, cache_size=DEFAULT_CACHE_SIZE, cache_ttl=DEFAULT_CACHE_TTL,
+                 slow_query_ms=None, archive_path=None):
+        # Une connexion d'écriture et des connexions de lecture partagées entre
+        # threads (voir database/pool.py) ; self.conn désigne l'écrivain.
+        # profile : "interactive", "bulk_import", "reporting" ou dictionnaire de PRAGMA
+        self.pool = ConnectionPool(db_name, readers=readers, busy_timeout=busy_timeout, profile=profile)
+        self.conn = self.pool.writer
+        # Profondeur des transactions imbriquées ouvertes par transaction(), par thread
+        self._local = threading.local()
+        # Cache des données de référence (classes, enseignants, infos de l'école)
+        self.reference_cache = ReferenceCache(maxsize=cache_size, ttl=cache_ttl)
+        # Durées par requête ; slow_query_ms : seuil de journalisation des requêtes lentes
+        self.statements = StatementRegistry(slow_query_ms=slow_query_ms)
+        # Base d'archive des années closes (voir database/archive.py)
+        self.archive_path = archive_path or archive.default_archive_path(db_name)
+        self.migrate()
+        # Les données de test ne sont insérées que sur demande et dans une base vide
+        if seed and self.get_student_count() == 0:
+            self.populate_test_data()
+        self.pool.apply_deferred_pragmas()
+
+    def migrate(self):
+        # Applique uniquement les migrations en attente (PRAGMA user_version)
+        with self.pool.write() as conn:
+            applied = apply_migrations(conn)
+        if 10 in applied:
+            # Identifiants jamais réutilisés : la séquence passe au-dessus de l'archive existante
+            archive.reserve_archived_ids(self, self.archive_path)
+        return applied
+
+    def get_schema_version(self):
+        with self.pool.read() as conn:
+            return get_schema_version(conn)
+
+    def reset_database(self, seed=True):
+        # Opération destructive : à n'appeler qu'explicitement (tests, démo)
+        with self.transaction():
+            for table in RESET_TABLES:
+                self._execute('reset_database', f'DROP TABLE IF EXISTS {table}')
+            self._execute_reference('reset_database', 'PRAGMA user_version = 0')
         self.create_tables()
-        self.populate_test_data()
+        if seed:
+            self.populate_test_data()
 
     def create_tables(self):
-        # Table étudiants
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS students (
-                id INTEGER PRIMARY KEY,
-                nom TEXT NOT NULL,
-                prenom TEXT NOT NULL,
-                date_naissance TEXT,
-                nationalite TEXT,
-                sexe TEXT,
-                statut TEXT,
-                classe_id INTEGER,
-                FOREIGN KEY (classe_id) REFERENCES classes(id)
-            )
-        ''')
-
-        # Table responsables
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS responsables (
-                id INTEGER PRIMARY KEY,
-                type TEXT,
-                nom TEXT NOT NULL,
-                prenom TEXT NOT NULL,
-                tel1 TEXT NOT NULL,
-                tel2 TEXT,
-                email TEXT NOT NULL
-            )
-        ''')
-
-        # Table de liaison étudiants-responsables
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS student_responsable (
-                student_id INTEGER,
-                responsable_id INTEGER,
-                FOREIGN KEY (student_id) REFERENCES students(id),
-                FOREIGN KEY (responsable_id) REFERENCES repsonsables(id),
-                PRIMARY KEY (student_id, responsable_id)
-            )
-        ''')
-
-        # Modification de la table frais_scolarite
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS frais_scolarite (
-                id INTEGER PRIMARY KEY,
-                student_id INTEGER,
-                total_annee REAL,
-                bourse_pourcentage REAL,
-                bourse_montant REAL,
-                frais_inscription REAL,
-                mode_paiement TEXT,
-                FOREIGN KEY (student_id) REFERENCES students(id)
-            )
-        ''')
-
-        # Modification de la table echeancier
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS echeancier (
-                id INTEGER PRIMARY KEY,
-                frais_id INTEGER,
-                mois TEXT,
-                montant REAL,
-                paye BOOLEAN,
-                type TEXT,
-                FOREIGN KEY (frais_id) REFERENCES frais_scolarite(id)
-            )
-        ''')
+        # Le schéma est désormais défini par les migrations (database/migrations.py)
+        self.migrate()
 
+    # ---------------- Exécution des requêtes ----------------
+    # Chaque appel utilise son propre curseur : deux threads ne peuvent plus
+    # écraser mutuellement leurs résultats. Les écritures passent par la
+    # connexion d'écriture, les lectures par une connexion de lecture du pool.
+    # name : nom de la requête dans le registre (voir database/statements.py),
+    # par convention la méthode publique qui la lance.
+    @contextmanager
+    def _write(self):
+        # Hors transaction explicite, chaque méthode CRUD valide immédiatement.
+        # En cas d'échec, la transaction implicite ouverte par sqlite3 est
+        # annulée : sinon l'écrivain garderait le verrou d'écriture et les
+        # autres connexions recevraient "database is locked".
+        with self.pool.write() as conn:
+            if self.in_transaction():
+                yield conn
+                return
+            try:
+                yield conn
+            except BaseException:
+                conn.rollback()
+                raise
+            conn.commit()
 
-        # Table classes
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS classes (
-                id INTEGER PRIMARY KEY,
-                nom TEXT NOT NULL,
-                enseignant_id INTEGER,
-                FOREIGN KEY (enseignant_id) REFERENCES enseignants(id)
-            )
-        ''')
-
-        # Table enseignants
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS enseignants (
-                id INTEGER PRIMARY KEY,
-                nom TEXT NOT NULL,
-                prenom TEXT NOT NULL,
-                email TEXT,
-                tel TEXT,
-                date_entree DATE
-                contrat TEXT -- "Détaché Français", "Titulaire Gabonais", "Contractuel" 
-                id_gabonais INTEGER
-            )
-        ''')
-
-        # Table avec informations sur l'école
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS school_info (
-                id INTEGER PRIMARY KEY,
-                school_name TEXT,
-                phone_number TEXT,
-                email TEXT,
-                director_name TEXT,
-                signature BLOB
-            )
-        ''')
+    def _execute(self, name, query, params=()):
+        start = clock()
+        with self._write() as conn:
+            cursor = conn.execute(query, params)
+        self.statements.record(name, query, clock() - start, cursor.rowcount)
+        return cursor
+
+    def _executemany(self, name, query, rows):
+        start = clock()
+        with self._write() as conn:
+            cursor = conn.executemany(query, rows)
+        self.statements.record(name, query, clock() - start, cursor.rowcount)
+        return cursor
 
-        self.conn.commit()
+    def _execute_reference(self, name, query, params=()):
+        # Écriture sur une table de référence : le cache est vidé après la
+        # validation (ou immédiatement hors transaction)
+        cursor = self._execute(name, query, params)
+        if self.in_transaction():
+            self._local.reference_dirty = True
+        else:
+            self.reference_cache.clear()
+        return cursor
+
+    def _cached(self, key, loader):
+        # Dans une transaction les lectures peuvent voir des données non
+        # validées : elles ne passent pas par le cache
+        if self.in_transaction():
+            return loader()
+        return self.reference_cache.get_or_load(key, loader)
+
+    def cache_stats(self):
+        return self.reference_cache.stats()
+
+    @staticmethod
+    def _cursor(conn, row_type=None):
+        # row_type : type de ligne de database/rows.py, sinon tuples
+        cursor = conn.cursor()
+        if row_type is not None:
+            cursor.row_factory = row_factory(row_type)
+        return cursor
+
+    def _capture(self, query, params):
+        # Requêtes relevées par explain_query_plans sur le thread courant
+        captured = getattr(self._local, 'captured', None)
+        if captured is not None:
+            captured.append((query, params))
+
+    def _fetchone(self, name, query, params=(), row_type=None):
+        self._capture(query, params)
+        start = clock()
+        with self.pool.read() as conn:
+            row = self._cursor(conn, row_type).execute(query, params).fetchone()
+        self.statements.record(name, query, clock() - start, int(row is not None))
+        return row
+
+    def _fetchall(self, name, query, params=(), row_type=None):
+        self._capture(query, params)
+        start = clock()
+        with self.pool.read() as conn:
+            rows = self._cursor(conn, row_type).execute(query, params).fetchall()
+        self.statements.record(name, query, clock() - start, len(rows))
+        return rows
+
+    # ---------------- Mesure des requêtes ----------------
+    def query_stats(self):
+        # {méthode: {count, rows, total_ms, p50_ms, p95_ms, max_ms}}, la plus coûteuse en premier
+        return self.statements.stats()
+
+    def reset_query_stats(self):
+        self.statements.reset()
+
+    # ---------------- Gestion des transactions ----------------
+    def _transaction_depth(self):
+        return getattr(self._local, 'depth', 0)
+
+    def in_transaction(self):
+        return self._transaction_depth() > 0
+
+    @contextmanager
+    def transaction(self):
+        # Regroupe plusieurs appels CRUD dans une seule validation atomique :
+        #     with db.transaction():
+        #         student_id = db.add_student(...)
+        #         db.link_student_responsable(student_id, responsable_id)
+        # Les blocs imbriqués utilisent des SAVEPOINT ; une exception annule
+        # uniquement le bloc concerné puis se propage. La connexion d'écriture
+        # est réservée au thread courant jusqu'à la fin du bloc.
+        depth = self._transaction_depth()
+        savepoint = f'sp_{depth}'
+        self.pool.pin_writer()
+        conn = self.conn
+        try:
+            if depth == 0:
+                if conn.in_transaction:
+                    conn.commit()
+                conn.execute('BEGIN')
+            else:
+                conn.execute(f'SAVEPOINT {savepoint}')
+            self._local.depth = depth + 1
+            try:
+                yield self
+            except BaseException:
+                self._local.depth = depth
+                if depth == 0:
+                    conn.rollback()
+                else:
+                    conn.execute(f'ROLLBACK TO SAVEPOINT {savepoint}')
+                    conn.execute(f'RELEASE SAVEPOINT {savepoint}')
+                raise
+            else:
+                self._local.depth = depth
+                if depth == 0:
+                    conn.commit()
+                else:
+                    conn.execute(f'RELEASE SAVEPOINT {savepoint}')
+        finally:
+            if depth == 0 and getattr(self._local, 'reference_dirty', False):
+                self._local.reference_dirty = False
+                self.reference_cache.clear()
+            self.pool.unpin_writer()
 
     # ---------------- Méthodes CRUD pour la table étudiants ----------------
     def add_student(self, student_data):
         # Méthode pour ajouter un étudiant
-        self.cursor.execute('''
+        return self._execute('add_student', '''
             INSERT INTO students (nom, prenom, date_naissance, nationalite, sexe, statut, classe_id)
             VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', student_data)
-        self.conn.commit()
-        return self.cursor.lastrowid
+        ''', student_data).lastrowid
 
     def get_student(self, student_id):
         # Méthode pour récupérer les informations d'un étudiant
-        self.cursor.execute('SELECT * FROM students WHERE id = ?', (student_id,))
-        return self.cursor.fetchone()
+        return self._fetchone('get_student', 'SELECT * FROM students WHERE id = ?', (student_id,), Student)
     
     def get_students(self):
         # Méthode pour récupérer tous les étudiants
-        self.cursor.execute('SELECT * FROM students')
-        return self.cursor.fetchall()
+        return self._fetchall('get_students', 'SELECT * FROM students', (), Student)
+
+    def get_student_count(self):
+        return self._fetchone('get_student_count', 'SELECT COUNT(*) FROM students')[0]
 
     def update_student(self, student_id, student_data):
         # Méthode pour mettre à jour les informations d'un étudiant
-        self.cursor.execute('''
+        self._execute('update_student', '''
             UPDATE students
             SET nom=?, prenom=?, date_naissance=?, nationalite=?, sexe=?, statut=?, classe_id=?
             WHERE id=?
         ''', student_data + (student_id,))
-        self.conn.commit()
 
     def delete_student(self, student_id):
-        # Méthode pour supprimer un étudiant
-        self.cursor.execute('DELETE FROM students WHERE id = ?', (student_id,))
-        self.conn.commit()
+        # Méthode pour supprimer un étudiant ; ses liens avec les responsables
+        # partent avec lui, ses frais (clé étrangère) bloquent la suppression
+        with self.transaction():
+            self._execute('delete_student', 'DELETE FROM student_responsable WHERE student_id = ?', (student_id,))
+            self._execute('delete_student', 'DELETE FROM students WHERE id = ?', (student_id,))
 
     # ---------------- Méthodes CRUD pour la table responsable ----------------
     def add_responsable(self, responsable_data):
-        self.cursor.execute('''
+        return self._execute('add_responsable', '''
             INSERT INTO responsables (type, nom, prenom, tel1, tel2, email)
             VALUES (?, ?, ?, ?, ?, ?)
-        ''', responsable_data)
-        self.conn.commit()
-        return self.cursor.lastrowid
+        ''', responsable_data).lastrowid
 
     def get_responsable(self, responsable_id):
-        self.cursor.execute('SELECT * FROM responsables WHERE id = ?', (responsable_id,))
-        return self.cursor.fetchone()
+        return self._fetchone('get_responsable', 'SELECT * FROM responsables WHERE id = ?',
+                              (responsable_id,), Responsable)
 
     def update_responsable(self, responsable_id, responsable_data):
-        self.cursor.execute('''
+        self._execute('update_responsable', '''
             UPDATE responsables
             SET type=?, nom=?, prenom=?, tel1=?, tel2=?, email=?
             WHERE id=?
         ''', responsable_data + (responsable_id,))
-        self.conn.commit()
 
     def delete_responsable(self, responsable_id):
-        self.cursor.execute('DELETE FROM responsables WHERE id = ?', (responsable_id,))
-        self.conn.commit()
+        with self.transaction():
+            self._execute('delete_responsable', 'DELETE FROM student_responsable WHERE responsable_id = ?',
+                          (responsable_id,))
+            self._execute('delete_responsable', 'DELETE FROM responsables WHERE id = ?', (responsable_id,))
 
     # Méthode pour lier un étudiant à un responsable
     def link_student_responsable(self, student_id, responsable_id):
-        self.cursor.execute('''
+        self._execute('link_student_responsable', '''
             INSERT INTO student_responsable (student_id, responsable_id)
             VALUES (?, ?)
         ''', (student_id, responsable_id))
-        self.conn.commit()
 
     def unlink_student_responsable(self, student_id, responsable_id):
-        self.cursor.execute('''
+        self._execute('unlink_student_responsable', '''
             DELETE FROM student_responsable
             WHERE student_id = ? AND responsable_id = ?
         ''', (student_id, responsable_id))
-        self.conn.commit()
 
 
     # Méthode pour obtenir tous les responsables d'un étudiant
     def get_student_responsables(self, student_id):
-        self.cursor.execute('''
+        return self._fetchall('get_student_responsables', '''
             SELECT r.* FROM responsables r
             JOIN student_responsable sr ON r.id = sr.responsable_id
             WHERE sr.student_id = ?
-        ''', (student_id,))
-        return self.cursor.fetchall()
+        ''', (student_id,), Responsable)
     
-    def search_responsables(self, search_text):
-        self.cursor.execute('''
-            SELECT id, nom, prenom
-            FROM responsables
-            WHERE nom LIKE ? OR prenom LIKE ?
-        ''', (f'%{search_text}%', f'%{search_text}%'))
-        results = self.cursor.fetchall()
-        print(f"Database query results for '{search_text}': {results}")  # Debugging statement
-        return results
+    # Méthode pour obtenir tous les étudiants d'un responsable
+    def get_responsable_students(self, responsable_id):
+        return self._fetchall('get_responsable_students', '''
+            SELECT s.* FROM students s
+            JOIN student_responsable sr ON s.id = sr.student_id
+            WHERE sr.responsable_id = ?
+        ''', (responsable_id,), Student)
+
+    @staticmethod
+    def _fts_tiers(search_text):
+        # Une requête FTS5 par niveau de pertinence (voir SEARCH_TIERS), les
+        # caractères spéciaux sont ignorés ("dur pi" -> "dur" "pi", "dur"* "pi"*)
+        words = re.findall(r'\w+', search_text or '')
+        if not words:
+            return []
+        exact = ' '.join(f'"{word}"' for word in words)
+        prefix = ' '.join(f'"{word}"*' for word in words)
+        return [tier.format(exact=exact, prefix=prefix) for tier in SEARCH_TIERS]
+
+    def _search(self, name, fts_table, table, queries, limit):
+        # Chaque niveau est lu du plus récent au plus ancien et s'arrête après
+        # limit lignes (ORDER BY rowid DESC LIMIT est servi par FTS5 sans tri) :
+        # le coût ne dépend pas du nombre de correspondances et aucune ligne
+        # mieux classée n'est écartée. Les niveaux étant emboîtés, une ligne
+        # garde le meilleur des siens.
+        tiers = ' UNION ALL '.join(f'''
+            SELECT * FROM (
+                SELECT rowid AS id, {tier} AS tier FROM {fts_table}
+                WHERE {fts_table} MATCH ? ORDER BY rowid DESC LIMIT ?
+            )''' for tier in range(len(queries)))
+        return self._fetchall(name, f'''
+            SELECT t.id, t.nom, t.prenom
+            FROM (SELECT id AS match_id, MIN(tier) AS match_tier FROM ({tiers}) GROUP BY id)
+            JOIN {table} t ON t.id = match_id
+            ORDER BY match_tier, match_id DESC
+            LIMIT ?
+        ''', tuple(param for query in queries for param in (query, limit)) + (limit,))
+
+    def search_responsables(self, search_text, limit=50):
+        # Recherche plein texte (nom, prénom, email, téléphones), triée par pertinence
+        queries = self._fts_tiers(search_text)
+        if not queries:
+            return self._fetchall('search_responsables', '''
+                SELECT id, nom, prenom FROM responsables
+                ORDER BY nom COLLATE NOCASE, prenom COLLATE NOCASE
+                LIMIT ?
+            ''', (limit,))
+        return self._search('search_responsables', 'responsables_fts', 'responsables', queries, limit)
+
+    def search_students(self, search_text, limit=50):
+        queries = self._fts_tiers(search_text)
+        if not queries:
+            return self._fetchall('search_students', '''
+                SELECT id, nom, prenom FROM students
+                ORDER BY nom, prenom
+                LIMIT ?
+            ''', (limit,))
+        return self._search('search_students', 'students_fts', 'students', queries, limit)
     
     def print_responsables(self):
-        self.cursor.execute('SELECT * FROM responsables')
-        results = self.cursor.fetchall()
-        for row in results:
+        for row in self.iter_responsables():
             print(row)
     
     def is_responsable_linked(self, student_id, responsable_id):
-        self.cursor.execute('''
+        count = self._fetchone('is_responsable_linked', '''
             SELECT COUNT(*) FROM student_responsable
             WHERE student_id = ? AND responsable_id = ?
-        ''', (student_id, responsable_id))
-        count = self.cursor.fetchone()[0]
+        ''', (student_id, responsable_id))[0]
         return count > 0
     
+    # ---------------- Import en masse (voir database/bulk_import.py) ----------------
+    def bulk_import_students(self, records, chunk_size=bulk_import.DEFAULT_CHUNK_SIZE):
+        return bulk_import.bulk_import_students(self, records, chunk_size)
+
+    def bulk_import_responsables(self, records, chunk_size=bulk_import.DEFAULT_CHUNK_SIZE):
+        return bulk_import.bulk_import_responsables(self, records, chunk_size)
+
+    def bulk_link_student_responsable(self, links, chunk_size=bulk_import.DEFAULT_CHUNK_SIZE):
+        return bulk_import.bulk_link_student_responsable(self, links, chunk_size)
+
     # ---------------- Méthodes CRUD pour la table frais_scolarite ---------------- 
-    def add_frais_scolarite_manuel(self, frais_data):
-        self.cursor.execute('''
-            INSERT INTO frais_scolarite (student_id, total_annee, bourse_pourcentage, frais_inscription)
-            VALUES (?, ?, ?, ?)
-        ''', frais_data)
-        self.conn.commit()
-        return self.cursor.lastrowid
+    def add_frais_scolarite_manuel(self, frais_data, annee_scolaire=None):
+        student_id, total_annee, bourse_pourcentage, frais_inscription = frais_data
+        return self._execute('add_frais_scolarite_manuel', '''
+            INSERT INTO frais_scolarite (student_id, total_annee, bourse_pourcentage, frais_inscription, annee_scolaire)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (student_id, to_fcfa(total_annee), bourse_pourcentage, to_fcfa(frais_inscription),
+              annee_scolaire or current_school_year())).lastrowid
 
     def get_frais_scolarite(self, frais_id):
-        self.cursor.execute('SELECT * FROM frais_scolarite WHERE id = ?', (frais_id,))
-        return self.cursor.fetchone()
+        return self._fetchone('get_frais_scolarite', 'SELECT * FROM frais_scolarite WHERE id = ?', (frais_id,), Frais)
 
     def update_frais_scolarite(self, frais_id, frais_data):
-        self.cursor.execute('''
+        student_id, total_annee, bourse_pourcentage, frais_inscription = frais_data
+        self._execute('update_frais_scolarite', '''
             UPDATE frais_scolarite
             SET student_id=?, total_annee=?, bourse_pourcentage=?, frais_inscription=?
             WHERE id=?
-        ''', frais_data + (frais_id,))
-        self.conn.commit()
+        ''', (student_id, to_fcfa(total_annee), bourse_pourcentage, to_fcfa(frais_inscription), frais_id))
 
     def delete_frais_scolarite(self, frais_id):
-        self.cursor.execute('DELETE FROM frais_scolarite WHERE id = ?', (frais_id,))
-        self.conn.commit()
+        # Les échéances partent avec le frais ; un frais dont une échéance
+        # figure au registre des paiements (en ajout seul) est refusé
+        with self.transaction():
+            paid = self._fetchone('delete_frais_scolarite', '''
+                SELECT EXISTS (SELECT 1 FROM echeancier e JOIN paiements p ON p.echeance_id = e.id
+                               WHERE e.frais_id = ?)
+            ''', (frais_id,))[0]
+            if paid:
+                raise ValueError(f'Le frais {frais_id} a des paiements enregistrés : suppression refusée')
+            self._execute('delete_frais_scolarite', 'DELETE FROM echeancier WHERE frais_id = ?', (frais_id,))
+            self._execute('delete_frais_scolarite', 'DELETE FROM frais_scolarite WHERE id = ?', (frais_id,))
     
     # ---------------- Méthodes CRUD pour la table classes ----------------
     def add_class(self, class_data):
-        self.cursor.execute('''
+        return self._execute_reference('add_class', '''
             INSERT INTO classes (nom, enseignant_id)
             VALUES (?, ?)
-        ''', class_data)
-        self.conn.commit()
-        return self.cursor.lastrowid
+        ''', class_data).lastrowid
 
     def get_class(self, class_id):
-        self.cursor.execute('SELECT * FROM classes WHERE id = ?', (class_id,))
-        return self.cursor.fetchone()
+        return self._cached(('get_class', class_id),
+                            lambda: self._fetchone('get_class', 'SELECT * FROM classes WHERE id = ?',
+                                                   (class_id,), Classe))
 
     def get_all_classes(self):
-        self.cursor.execute('SELECT * FROM classes')
-        return self.cursor.fetchall
+        return list(self._cached(('get_all_classes',),
+                                 lambda: tuple(self._fetchall('get_all_classes', 'SELECT * FROM classes', (), Classe))))
 
     def get_all_classes_names(self):
-        self.cursor.execute('SELECT nom FROM classes')
-        return self.cursor.fetchall()
+        return list(self._cached(('get_all_classes_names',),
+                                 lambda: tuple(self._fetchall('get_all_classes_names', 'SELECT nom FROM classes'))))
 
     def update_class(self, class_id, class_data):
-        self.cursor.execute('''
+        self._execute_reference('update_class', '''
             UPDATE classes
             SET nom=?, enseignant_id=?
             WHERE id=?
         ''', class_data + (class_id,))
-        self.conn.commit()
 
     def delete_class(self, class_id):
-        self.cursor.execute('DELETE FROM classes WHERE id = ?', (class_id,))
-        self.conn.commit()
+        self._execute_reference('delete_class', 'DELETE FROM classes WHERE id = ?', (class_id,))
 
     # ---------------- Méthodes CRUD pour la table enseignants ----------------
     def add_teacher(self, teacher_data):
-        self.cursor.execute('''
+        return self._execute_reference('add_teacher', '''
             INSERT INTO enseignants (nom, prenom, email, tel)
             VALUES (?, ?, ?, ?)
-        ''', teacher_data)
-        self.conn.commit()
-        return self.cursor.lastrowid
+        ''', teacher_data).lastrowid
 
     def get_teacher(self, teacher_id):
-        self.cursor.execute('SELECT * FROM enseignants WHERE id = ?', (teacher_id,))
-        return self.cursor.fetchone()
+        return self._cached(('get_teacher', teacher_id),
+                            lambda: self._fetchone('get_teacher', 'SELECT * FROM enseignants WHERE id = ?',
+                                                   (teacher_id,), Enseignant))
 
     def update_teacher(self, teacher_id, teacher_data):
-        self.cursor.execute('''
+        self._execute_reference('update_teacher', '''
             UPDATE enseignants
             SET nom=?, prenom=?, email=?, tel=?
             WHERE id=?
         ''', teacher_data + (teacher_id,))
-        self.conn.commit()
 
     def delete_teacher(self, teacher_id):
-        self.cursor.execute('DELETE FROM enseignants WHERE id = ?', (teacher_id,))
-        self.conn.commit()
+        self._execute_reference('delete_teacher', 'DELETE FROM enseignants WHERE id = ?', (teacher_id,))
 
     # ---------------- Méthodes CRUD pour la table echeancier ----------------
     def add_echeance(self, echeance_data):
-        self.cursor.execute('''
-            INSERT INTO echeancier (frais_id, mois, montant, paye)
-            VALUES (?, ?, ?, ?)
-        ''', echeance_data)
-        self.conn.commit()
-        return self.cursor.lastrowid
+        # echeance_data : (frais_id, mois, montant, paye) ; une échéance créée
+        # payée est réglée au registre des paiements
+        frais_id, mois, montant, paye = echeance_data
+        with self.transaction():
+            echeance_id = self._execute('add_echeance', '''
+                INSERT INTO echeancier (frais_id, mois, montant, paye)
+                VALUES (?, ?, ?, 0)
+            ''', (frais_id, mois, to_fcfa(montant))).lastrowid
+            if paye:
+                self._settle_echeance('add_echeance', echeance_id, True)
+        return echeance_id
 
     def get_echeance(self, echeance_id):
-        self.cursor.execute('SELECT * FROM echeancier WHERE id = ?', (echeance_id,))
-        return self.cursor.fetchone()
+        return self._fetchone('get_echeance', 'SELECT * FROM echeancier WHERE id = ?', (echeance_id,), Echeance)
     
     def get_echeances_by_student_id(self, student_id):
-        self.cursor.execute('''
-            SELECT e.id, e.frais_id, e.mois, e.montant, e.paye, e.type
+        return self._fetchall('get_echeances_by_student_id', '''
+            SELECT e.*
             FROM echeancier e
             JOIN frais_scolarite f ON e.frais_id = f.id
             WHERE f.student_id = ?
-        ''', (student_id,))
-        return self.cursor.fetchall()
+        ''', (student_id,), Echeance)
 
     def update_echeance(self, echeance_id, echeance_data):
-        self.cursor.execute('''
-            UPDATE echeancier
-            SET frais_id=?, mois=?, montant=?, paye=?
-            WHERE id=?
-        ''', echeance_data + (echeance_id,))
-        self.conn.commit()
+        frais_id, mois, montant, paye = echeance_data
+        with self.transaction():
+            self._execute('update_echeance', '''
+                UPDATE echeancier
+                SET frais_id=?, mois=?, montant=?, paye = montant_paye >= ?
+                WHERE id=?
+            ''', (frais_id, mois, to_fcfa(montant), to_fcfa(montant), echeance_id))
+            self._settle_echeance('update_echeance', echeance_id, paye)
+
+    def update_echeance_payment(self, echeance_id, paye, date_paiement=None, methode='manuel'):
+        # Conservé pour l'interface : marquer payé enregistre le reste dû au
+        # registre, marquer impayé enregistre une contre-passation
+        with self.transaction():
+            self._settle_echeance('update_echeance_payment', echeance_id, paye, date_paiement, methode)
+
+    def _settle_echeance(self, name, echeance_id, paye, date_paiement=None, methode='manuel'):
+        row = self._fetchone(name, 'SELECT montant, montant_paye FROM echeancier WHERE id = ?', (echeance_id,))
+        if row is None:
+            return None
+        montant, montant_paye = row
+        delta = montant - montant_paye if paye else -montant_paye
+        if delta == 0:
+            return None
+        return self.record_payment(echeance_id, delta, date_paiement, methode)
+
+    # ---------------- Registre des paiements ----------------
+    # Ajout seul (triggers de la migration 5) : une erreur se corrige par une
+    # écriture de montant négatif.
+    def record_payment(self, echeance_id, montant, date_paiement=None, methode=None, reference=None):
+        return self._execute('record_payment',
+            payments.INSERT_PAYMENT,
+            (echeance_id, to_fcfa(montant), date_paiement or payments.today(), methode, reference),
+        ).lastrowid
+
+    def get_payments(self, echeance_id):
+        return self._fetchall('get_payments', 'SELECT * FROM paiements WHERE echeance_id = ? ORDER BY id',
+                              (echeance_id,))
+
+    def get_student_payments(self, student_id):
+        return self._fetchall('get_student_payments', '''
+            SELECT p.id, p.echeance_id, p.montant, p.date_paiement, p.methode, p.reference
+            FROM paiements p
+            JOIN echeancier e ON e.id = p.echeance_id
+            JOIN frais_scolarite f ON f.id = e.frais_id
+            WHERE f.student_id = ?
+            ORDER BY p.id
+        ''', (student_id,))
 
-    def update_echeance_payment(self, echeance_id, paye):
-        self.cursor.execute('UPDATE echeancier SET paye = ? WHERE id = ?', (paye, echeance_id))
-        self.conn.commit()
+    def reconcile_payments(self, transfers):
+        return payments.reconcile_payments(self, transfers)
 
     def delete_echeance(self, echeance_id):
-        self.cursor.execute('DELETE FROM echeancier WHERE id = ?', (echeance_id,))
-        self.conn.commit()
+        self._execute('delete_echeance', 'DELETE FROM echeancier WHERE id = ?', (echeance_id,))
 
     # Méthodes supplémentaires utiles
     def get_students_in_class(self, class_id):
-        self.cursor.execute('SELECT * FROM students WHERE classe_id = ?', (class_id,))
-        return self.cursor.fetchall()
+        return self._fetchall('get_students_in_class', 'SELECT * FROM students WHERE classe_id = ?',
+                              (class_id,), Student)
+
+    # Les lectures des frais se limitent à une année scolaire : l'année en
+    # cours par défaut, ANY ('*') pour toutes les années de la base principale
+    @staticmethod
+    def _school_year_filter(annee_scolaire):
+        annee_scolaire = annee_scolaire or current_school_year()
+        if annee_scolaire == ANY:
+            return '', ()
+        return ' AND f.annee_scolaire = ?', (annee_scolaire,)
+
+    def get_unpaid_fees(self, annee_scolaire=None):
+        condition, params = self._school_year_filter(annee_scolaire)
+        return self._fetchall('get_unpaid_fees', f'''
+            SELECT s.nom, s.prenom, e.mois, e.montant
+            FROM students s
+            JOIN frais_scolarite f ON s.id = f.student_id
+            JOIN echeancier e ON f.id = e.frais_id
+            WHERE e.paye = 0{condition}
+        ''', params)
+
+    # ---------------- Soldes ----------------
+    # Lus dans soldes_eleves / soldes_classes, tenues à jour par des triggers
+    # (migration 4) : quelques lignes par clé primaire, sans parcourir echeancier.
+    # Les soldes sont tenus par année scolaire (migration 11) : l'année en cours
+    # par défaut, ANY pour cumuler toutes les années de la base principale.
+    # Chaque solde est un tuple (du, paye, reste).
+    @staticmethod
+    def _balance(row):
+        du, paye = row
+        return (du or 0, paye or 0, (du or 0) - (paye or 0))
+
+    @staticmethod
+    def _balance_year_filter(annee_scolaire):
+        annee_scolaire = annee_scolaire or current_school_year()
+        if annee_scolaire == ANY:
+            return '', ()
+        return ' AND annee_scolaire = ?', (annee_scolaire,)
+
+    def get_student_balance(self, student_id, mois=None, annee_scolaire=None):
+        condition, params = self._balance_year_filter(annee_scolaire)
+        query = f'SELECT SUM(du), SUM(paye) FROM soldes_eleves WHERE student_id = ?{condition}'
+        params = (student_id,) + params
+        if mois is not None:
+            query += ' AND mois = ?'
+            params += (mois,)
+        return self._balance(self._fetchone('get_student_balance', query, params))
+
+    def get_class_balance(self, class_id, mois=None, annee_scolaire=None):
+        # class_id None = élèves sans classe
+        condition, params = self._balance_year_filter(annee_scolaire)
+        query = f'SELECT SUM(du), SUM(paye) FROM soldes_classes WHERE classe_id = ?{condition}'
+        params = (class_id or 0,) + params
+        if mois is not None:
+            query += ' AND mois = ?'
+            params += (mois,)
+        return self._balance(self._fetchone('get_class_balance', query, params))
+
+    def get_student_balances_by_month(self, student_id, annee_scolaire=None):
+        condition, params = self._balance_year_filter(annee_scolaire)
+        rows = self._fetchall('get_student_balances_by_month', f'''
+            SELECT mois, SUM(du), SUM(paye) FROM soldes_eleves WHERE student_id = ?{condition} GROUP BY mois
+        ''', (student_id,) + params)
+        return {mois: self._balance((du, paye)) for mois, du, paye in rows}
+
+    def get_class_balances_by_month(self, class_id, annee_scolaire=None):
+        condition, params = self._balance_year_filter(annee_scolaire)
+        rows = self._fetchall('get_class_balances_by_month', f'''
+            SELECT mois, SUM(du), SUM(paye) FROM soldes_classes WHERE classe_id = ?{condition} GROUP BY mois
+        ''', (class_id or 0,) + params)
+        return {mois: self._balance((du, paye)) for mois, du, paye in rows}
+
+    def get_school_balance(self, annee_scolaire=None):
+        condition, params = self._balance_year_filter(annee_scolaire)
+        return self._balance(self._fetchone('get_school_balance', f'''
+            SELECT SUM(du), SUM(paye) FROM soldes_classes WHERE 1{condition}
+        ''', params))
+
+    def rebuild_balances(self):
+        # Compare les soldes matérialisés à un recalcul complet, puis les remplace
+        # par ce recalcul. Retourne les écarts trouvés :
+        # [(table, clé, annee_scolaire, mois, (du, paye) matérialisé, (du, paye) recalculé)]
+        recompute = balance_recompute_sql(BALANCE_PAID_SQL, BALANCE_BY_YEAR)
+        discrepancies = []
+        with self.transaction():
+            for table, key in (('soldes_eleves', 'student_id'), ('soldes_classes', 'classe_id')):
+                stored = {tuple(row[:3]): (row[3], row[4]) for row in self._fetchall(
+                    'rebuild_balances', f'SELECT {key}, annee_scolaire, mois, du, paye FROM {table}')}
+                expected = {tuple(row[:3]): (row[3], row[4])
+                            for row in self._fetchall('rebuild_balances', recompute[table])}
+                for k in sorted(stored.keys() | expected.keys(), key=lambda k: (k[0], k[1] or '', k[2] or '')):
+                    got = stored.get(k, (0, 0))
+                    want = expected.get(k, (0, 0))
+                    if got != want:
+                        discrepancies.append((table,) + k + (got, want))
+            rebuild_balance_tables(self.conn, BALANCE_PAID_SQL, BALANCE_BY_YEAR)
+        return discrepancies
+
+    # ---------------- Lectures paginées et en flux ----------------
+    # Pagination par clé (keyset) sur id : la page suivante repart de l'id
+    # retourné comme curseur, sans OFFSET, donc à coût constant quelle que soit
+    # la page. Le curseur vaut None sur la dernière page.
+    def _page(self, name, query, params, page_size, cursor, strip_key=False, row_type=None):
+        if page_size < 1:
+            raise ValueError(f'page_size doit être au moins 1 : {page_size}')
+        rows = self._fetchall(name, query, params + (cursor or 0, page_size + 1), row_type)
+        next_cursor = rows[page_size - 1][0] if len(rows) > page_size else None
+        rows = rows[:page_size]
+        if strip_key:
+            rows = [row[1:] for row in rows]
+        return rows, next_cursor
+
+    # Générateurs : les lignes sont lues par paquets avec fetchmany sur un
+    # curseur dédié, la mémoire utilisée ne dépend pas de la taille de la table
+    def _stream(self, name, query, params=(), batch_size=500, row_type=None):
+        # La requête est relevée à l'appel : le corps du générateur ne
+        # s'exécute qu'au premier next(), hors de la méthode appelante
+        self._capture(query, params)
+        return self._stream_rows(name, query, params, batch_size, row_type)
 
-    def get_unpaid_fees(self):
-        self.cursor.execute('''
+    def _stream_rows(self, name, query, params, batch_size, row_type):
+        # La connexion de lecture reste réservée jusqu'à la fin du parcours.
+        # Seul le temps passé dans SQLite est mesuré, pas celui de l'appelant.
+        elapsed = 0.0
+        count = 0
+        with self.pool.read() as conn:
+            start = clock()
+            cursor = self._cursor(conn, row_type).execute(query, params)
+            try:
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    elapsed += clock() - start
+                    if not rows:
+                        break
+                    count += len(rows)
+                    yield from rows
+                    start = clock()
+            finally:
+                cursor.close()
+                self.statements.record(name, query, elapsed, count)
+
+    def get_students_page(self, page_size=100, cursor=None):
+        return self._page('get_students_page', '''
+            SELECT * FROM students WHERE id > ? ORDER BY id LIMIT ?
+        ''', (), page_size, cursor, row_type=Student)
+
+    def get_responsables_page(self, page_size=100, cursor=None):
+        return self._page('get_responsables_page', '''
+            SELECT * FROM responsables WHERE id > ? ORDER BY id LIMIT ?
+        ''', (), page_size, cursor, row_type=Responsable)
+
+    def get_students_in_class_page(self, class_id, page_size=100, cursor=None):
+        return self._page('get_students_in_class_page', '''
+            SELECT * FROM students WHERE classe_id = ? AND id > ? ORDER BY id LIMIT ?
+        ''', (class_id,), page_size, cursor, row_type=Student)
+
+    def get_unpaid_fees_page(self, page_size=100, cursor=None, annee_scolaire=None):
+        # Mêmes colonnes que get_unpaid_fees ; le curseur est l'id de l'échéance
+        condition, params = self._school_year_filter(annee_scolaire)
+        return self._page('get_unpaid_fees_page', f'''
+            SELECT e.id, s.nom, s.prenom, e.mois, e.montant
+            FROM echeancier e
+            JOIN frais_scolarite f ON f.id = e.frais_id
+            JOIN students s ON s.id = f.student_id
+            WHERE e.paye = 0{condition} AND e.id > ?
+            ORDER BY e.id
+            LIMIT ?
+        ''', params, page_size, cursor, strip_key=True)
+
+    def iter_students(self, batch_size=500):
+        return self._stream('iter_students', 'SELECT * FROM students', (), batch_size, Student)
+
+    def iter_responsables(self, batch_size=500):
+        return self._stream('iter_responsables', 'SELECT * FROM responsables', (), batch_size, Responsable)
+
+    def iter_students_in_class(self, class_id, batch_size=500):
+        return self._stream('iter_students_in_class', 'SELECT * FROM students WHERE classe_id = ?',
+                            (class_id,), batch_size, Student)
+
+    def iter_unpaid_fees(self, batch_size=500, annee_scolaire=None):
+        condition, params = self._school_year_filter(annee_scolaire)
+        return self._stream('iter_unpaid_fees', f'''
             SELECT s.nom, s.prenom, e.mois, e.montant
             FROM students s
             JOIN frais_scolarite f ON s.id = f.student_id
             JOIN echeancier e ON f.id = e.frais_id
-            WHERE e.paye = 0
-        ''')
-        return self.cursor.fetchall()
+            WHERE e.paye = 0{condition}
+        ''', params, batch_size)
+
+    # Flux des exports (voir database/export.py). Les ordres de tri suivent les
+    # index (classe_id puis id, clés primaires) : pas de tri en mémoire.
+    def iter_roster(self, class_id=None, batch_size=500):
+        # Une ligne par couple élève-responsable ; un élève sans responsable
+        # apparaît une fois avec des colonnes responsable vides
+        where, params = ('WHERE s.classe_id = ?', (class_id,)) if class_id is not None else ('', ())
+        return self._stream('iter_roster', f'''
+            SELECT c.nom, s.id, s.nom, s.prenom, s.date_naissance, s.sexe, s.statut,
+                   r.type, r.nom, r.prenom, r.tel1, r.tel2, r.email
+            FROM students s
+            LEFT JOIN classes c ON c.id = s.classe_id
+            LEFT JOIN student_responsable sr ON sr.student_id = s.id
+            LEFT JOIN responsables r ON r.id = sr.responsable_id
+            {where}
+            ORDER BY s.classe_id, s.id, sr.responsable_id
+        ''', params, batch_size)
+
+    def iter_schedules(self, student_id=None, class_id=None, batch_size=500):
+        # CROSS JOIN impose l'ordre élèves -> frais -> échéances : sans lui,
+        # l'export complet parcourt echeancier puis trie tout le résultat
+        conditions, params = [], ()
+        if student_id is not None:
+            conditions.append('s.id = ?')
+            params += (student_id,)
+        if class_id is not None:
+            conditions.append('s.classe_id = ?')
+            params += (class_id,)
+        where = f'WHERE {" AND ".join(conditions)}' if conditions else ''
+        return self._stream('iter_schedules', f'''
+            SELECT s.id, s.nom, s.prenom, f.id, e.mois, e.type, e.montant, e.montant_paye,
+                   e.montant - e.montant_paye, e.paye
+            FROM students s
+            CROSS JOIN frais_scolarite f ON f.student_id = s.id
+            CROSS JOIN echeancier e ON e.frais_id = f.id
+            {where}
+            ORDER BY s.id, f.id, e.id
+        ''', params, batch_size)
+
+    def iter_unpaid_balances(self, batch_size=500):
+        # Soldes matérialisés (migration 4), agrégés par élève dans l'ordre de la
+        # clé primaire, toutes années confondues : un impayé ancien reste dû
+        return self._stream('iter_unpaid_balances', '''
+            SELECT se.student_id, s.nom, s.prenom, c.nom, SUM(se.du), SUM(se.paye), SUM(se.du) - SUM(se.paye)
+            FROM soldes_eleves se
+            JOIN students s ON s.id = se.student_id
+            LEFT JOIN classes c ON c.id = s.classe_id
+            GROUP BY se.student_id
+            HAVING SUM(se.du) > SUM(se.paye)
+            ORDER BY se.student_id
+        ''', (), batch_size)
 
     def get_class_teacher(self, class_id):
-        self.cursor.execute('''
+        return self._cached(('get_class_teacher', class_id), lambda: self._fetchone('get_class_teacher', '''
             SELECT e.* FROM enseignants e
             JOIN classes c ON e.id = c.enseignant_id
             WHERE c.id = ?
-        ''', (class_id,))
-        return self.cursor.fetchone()
-    
-    # Méthode pour calculer les frais de scolarités : 
+        ''', (class_id,), Enseignant))
+
+    # ---------------- Lectures composées ----------------
+    # Fiche complète d'un élève ou d'une classe en un nombre fixe de requêtes
+    # (élèves, responsables, frais, échéances), quel que soit l'effectif, au
+    # lieu de cinq requêtes par élève. Classe et enseignant viennent du cache
+    # des données de référence. Chaque élève est un dictionnaire :
+    #     {'eleve': ligne students, 'classe': ligne classes, 'enseignant': ligne enseignants,
+    #      'responsables': [lignes responsables],
+    #      'frais': [{'frais': ligne frais_scolarite, 'echeances': [lignes]}]}
+    def _fetch_snapshot(self, name, queries):
+        # queries : [(requête, paramètres, type de ligne ou None)]
+        # Plusieurs lectures sur une même connexion, dans une même transaction
+        # de lecture : les résultats sont cohérents entre eux
+        results = []
+        with self.pool.read() as conn:
+            snapshot = not conn.in_transaction
+            if snapshot:
+                conn.execute('BEGIN')
+            try:
+                for query, params, row_type in queries:
+                    self._capture(query, params)
+                    start = clock()
+                    rows = self._cursor(conn, row_type).execute(query, params).fetchall()
+                    self.statements.record(name, query, clock() - start, len(rows))
+                    results.append(rows)
+            finally:
+                if snapshot:
+                    conn.execute('COMMIT')
+        return results
+
+    def _students_full(self, name, condition, params):
+        # condition : filtre sur students (alias s), réutilisé par chaque requête
+        students, responsables, frais, echeances = self._fetch_snapshot(name, [
+            (f'SELECT s.* FROM students s WHERE {condition} ORDER BY s.id', params, Student),
+            (f'''
+                SELECT sr.student_id, r.*
+                FROM students s
+                JOIN student_responsable sr ON sr.student_id = s.id
+                JOIN responsables r ON r.id = sr.responsable_id
+                WHERE {condition}
+                ORDER BY sr.student_id, r.id
+            ''', params, None),
+            (f'''
+                SELECT f.* FROM students s
+                JOIN frais_scolarite f ON f.student_id = s.id
+                WHERE {condition}
+                ORDER BY f.student_id, f.id
+            ''', params, Frais),
+            (f'''
+                SELECT e.* FROM students s
+                JOIN frais_scolarite f ON f.student_id = s.id
+                JOIN echeancier e ON e.frais_id = f.id
+                WHERE {condition}
+                ORDER BY e.frais_id, e.id
+            ''', params, Echeance),
+        ])
+        records = {}
+        for student in students:
+            classe_id = student.classe_id
+            records[student.id] = {
+                'eleve': student,
+                'classe': self.get_class(classe_id) if classe_id is not None else None,
+                'enseignant': self.get_class_teacher(classe_id) if classe_id is not None else None,
+                'responsables': [],
+                'frais': [],
+            }
+        for row in responsables:
+            records[row[0]]['responsables'].append(Responsable._make(row[1:]))
+        by_frais = {}
+        for row in frais:
+            by_frais[row.id] = {'frais': row, 'echeances': []}
+            records[row.student_id]['frais'].append(by_frais[row.id])
+        for row in echeances:
+            by_frais[row.frais_id]['echeances'].append(row)
+        return list(records.values())
+
+    def get_student_full(self, student_id):
+        # Fiche de l'élève (voir ci-dessus), None s'il n'existe pas
+        records = self._students_full('get_student_full', 's.id = ?', (student_id,))
+        return records[0] if records else None
+
+    def get_class_roster_full(self, class_id):
+        # {'classe', 'enseignant', 'eleves': [fiches des élèves par id]}
+        return {
+            'classe': self.get_class(class_id),
+            'enseignant': self.get_class_teacher(class_id),
+            'eleves': self._students_full('get_class_roster_full', 's.classe_id = ?', (class_id,)),
+        }
+
+    # ---------------- Plans d'exécution des requêtes ----------------
+    # Appels utilisés pour vérifier les plans : {méthode: arguments}
+    QUERY_PLAN_PROBES = {
+        'get_student': (1,),
+        'get_students_in_class': (1,),
+        'get_student_responsables': (1,),
+        'get_responsable_students': (1,),
+        'search_responsables': ('Dur',),
+        'search_students': ('Dur',),
+        'is_responsable_linked': (1, 1),
+        'get_echeances_by_student_id': (1,),
+        'get_unpaid_fees': (),
+        'get_students_page': (),
+        'get_students_in_class_page': (1,),
+        'get_unpaid_fees_page': (),
+        'get_class_teacher': (1,),
+        'get_student_full': (1,),
+        'get_class_roster_full': (1,),
+        'changes_since': (0,),
+    }
+
+    def explain_query_plans(self, probes=None):
+        # Exécute chaque méthode en relevant les requêtes qu'elle lance elle-même
+        # (pas celles que SQLite exécute en interne, ex. configuration FTS5),
+        # puis retourne {méthode: [(requête, [étapes EXPLAIN QUERY PLAN])]}
+        probes = self.QUERY_PLAN_PROBES if probes is None else probes
+        plans = {}
+        # Dans une transaction, toutes les lectures passent par la connexion d'écriture
+        with self.transaction():
+            for method_name, args in probes.items():
+                statements = self._local.captured = []
+                try:
+                    getattr(self, method_name)(*args)
+                finally:
+                    self._local.captured = None
+                plans[method_name] = [
+                    (sql, [row[3] for row in self.conn.execute('EXPLAIN QUERY PLAN ' + sql, params)])
+                    for sql, params in statements
+                ]
+        return plans
+
+    def find_full_scans(self, probes=None):
+        # Étapes qui parcourent une table entière sans aucun index
+        return [
+            (method_name, sql, step)
+            for method_name, statements in self.explain_query_plans(probes).items()
+            for sql, steps in statements
+            for step in steps
+            if step.startswith('SCAN ') and 'INDEX' not in step and not step.startswith('SCAN (')
+        ]
+
+    # ---------------- Calcul des frais (voir database/fee_rules.py) ----------------
+    def get_fee_rules(self):
+        # Règles compilées, gardées dans le cache des données de référence
+        return self._cached(('fee_rules',), self._load_fee_rules)
+
+    def _load_fee_rules(self):
+        with self.pool.read() as conn:
+            return FeeRules.from_connection(conn)
+
     def calculate_fees(self, student_id):
         student = self.get_student(student_id)
-        nationalite = student[4]  
+        return self.calculate_fees_for_student(student)
 
-        if nationalite == 'Français' or 'Française' or 'FR':
-            total_annee = 1095000
-        elif nationalite == 'Gabonais' or 'Gabonaise' or 'GA':
-            total_annee = 795000
-        else:
-            total_annee = 1245000
-
-        frais_inscription = 100000
-        return total_annee, frais_inscription
+    def calculate_fees_for_student(self, student, rules=None, annee_scolaire=None):
+        # Même calcul que calculate_fees, à partir d'une ligne students déjà lue
+        # (Student, ou tuple dans l'ordre des colonnes)
+        rules = rules or self.get_fee_rules()
+        return rules.fees_for(Student._make(student), annee_scolaire)
 
     def apply_bourse(self, total_annee, bourse_pourcentage):
-        bourse_montant = total_annee * (bourse_pourcentage / 100)
+        # Montants entiers en FCFA (database/money.py)
+        bourse_montant = percentage_of(total_annee, bourse_pourcentage)
         total_apres_bourse = total_annee - bourse_montant
         return total_apres_bourse, bourse_montant
 
-    def generate_echeancier(self, frais_id, total_annee, type_inscription, mode_paiement):
-        frais_inscription = 100000
-        reste_a_payer = total_annee - frais_inscription
-        mode_paiement = mode_paiement.lower()
-        echeances = []
-        echeances.append((frais_id, 'Septembre', frais_inscription, False, 'frais_inscription'))
-
-        if mode_paiement == 'standard':
-            if type_inscription == 'inscription':
-                montant_echeance = reste_a_payer / 3
-                for mois in ['Septembre', 'Décembre', 'Mars']:
-                    echeances.append((frais_id, mois, montant_echeance, False, 'paiement_standard'))
-            else:  # réinscription
-                # si c'est une réinscription, les frais ont été payé l'année précédente en Juin, on les repaye pas et en Mars on les récupère
-                montant_echeance = reste_a_payer / 3
-                echeances.append((frais_id, 'Septembre', montant_echeance, False, 'paiement_standard'))
-                echeances.append((frais_id, 'Décembre', montant_echeance, False, 'paiement_standard'))
-                echeances.append((frais_id, 'Mars', montant_echeance - frais_inscription, False, 'paiement_standard'))
-        elif mode_paiement == 'echéancier':
-            montant_mensuel = reste_a_payer / 8
-            for mois in ['Octobre', 'Novembre', 'Décembre', 'Janvier', 'Février', 'Mars', 'Avril', 'Mai']:
-                echeances.append((frais_id, mois, montant_mensuel, False, 'echéancier_mensuel'))
-
-        return echeances
-
-    def add_frais_scolarite(self, student_id, mode_paiement, bourse_pourcentage=0):
-        total_annee, frais_inscription = self.calculate_fees(student_id)
-        
+    def generate_echeancier(self, frais_id, total_annee, type_inscription, mode_paiement,
+                            frais_inscription=None, rules=None, annee_scolaire=None):
+        rules = rules or self.get_fee_rules()
+        if frais_inscription is None:
+            frais_inscription = rules.tarif(None, annee_scolaire=annee_scolaire)[1]
+        return rules.schedule(frais_id, total_annee, frais_inscription, type_inscription, mode_paiement,
+                              annee_scolaire)
+
+    def _fee_rows(self, rules, student, frais_id, mode_paiement, bourse_pourcentage, annee_scolaire):
+        # Ligne frais_scolarite et échéances d'un élève pour une année scolaire
+        total_annee, frais_inscription = self.calculate_fees_for_student(student, rules, annee_scolaire)
         if bourse_pourcentage > 0:
             total_apres_bourse, bourse_montant = self.apply_bourse(total_annee, bourse_pourcentage)
         else:
             total_apres_bourse, bourse_montant = total_annee, 0
+        frais_row = (frais_id, student.id, total_apres_bourse, bourse_pourcentage,
+                     bourse_montant, frais_inscription, mode_paiement, annee_scolaire)
+        echeances = self.generate_echeancier(frais_id, total_apres_bourse, student.statut, mode_paiement,
+                                             frais_inscription, rules, annee_scolaire)
+        return frais_row, echeances
 
-        self.cursor.execute('''
-            INSERT INTO frais_scolarite (student_id, total_annee, bourse_pourcentage, bourse_montant, frais_inscription, mode_paiement)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (student_id, total_apres_bourse, bourse_pourcentage, bourse_montant, frais_inscription, mode_paiement))
-        self.conn.commit()
-        
-        frais_id = self.cursor.lastrowid
+    def add_frais_scolarite(self, student_id, mode_paiement, bourse_pourcentage=0, annee_scolaire=None):
         student = self.get_student(student_id)
-        type_inscription = student[6] # statut de l'étudiant 
-        
-        echeances = self.generate_echeancier(frais_id, total_apres_bourse, type_inscription, mode_paiement)
-        
-        for echeance in echeances:
-            self.cursor.execute('''
-                INSERT INTO echeancier (frais_id, mois, montant, paye, type)
-                VALUES (?, ?, ?, ?, ?)
-            ''', echeance)
-        
-        self.conn.commit()
+        rules = self.get_fee_rules()
+        annee_scolaire = annee_scolaire or current_school_year()
+
+        # Frais et échéances sont validés ensemble
+        with self.transaction():
+            frais_id = self._fetchone('add_frais_scolarite', NEXT_FRAIS_ID)[0]
+            frais_row, echeances = self._fee_rows(rules, student, frais_id, mode_paiement, bourse_pourcentage,
+                                                  annee_scolaire)
+            self._execute('add_frais_scolarite', INSERT_FRAIS, frais_row)
+            self._executemany('add_frais_scolarite', INSERT_ECHEANCE, echeances)
+
         return frais_id
     
+    def generate_fees_for_year(self, student_ids=None, class_id=None, mode_paiement='standard', bourse_map=None,
+                               annee_scolaire=None):
+        # Génère les frais annuels et l'échéancier d'un ensemble d'élèves en une passe :
+        # liste d'identifiants, une classe, ou toute l'école si aucun filtre n'est donné.
+        # bourse_map : {student_id: pourcentage de bourse}. Retourne {student_id: frais_id}.
+        # annee_scolaire : année en cours par défaut. Les élèves qui ont déjà des
+        # frais pour cette année sont ignorés : relancer la génération ne crée
+        # pas de doublons.
+        bourse_map = bourse_map or {}
+        annee_scolaire = annee_scolaire or current_school_year()
+        conditions = ['NOT EXISTS (SELECT 1 FROM frais_scolarite f WHERE f.annee_scolaire = ? AND f.student_id = s.id)']
+        params = (annee_scolaire,)
+        if student_ids is not None:
+            conditions.append('s.id IN (SELECT value FROM json_each(?))')
+            params += (json.dumps(list(student_ids)),)
+        elif class_id is not None:
+            conditions.append('s.classe_id = ?')
+            params += (class_id,)
+        query = f'SELECT s.* FROM students s WHERE {" AND ".join(conditions)} ORDER BY s.id'
+
+        rules = self.get_fee_rules()
+        with self.transaction():
+            students = self._fetchall('generate_fees_for_year', query, params, Student)
+            frais_id = self._fetchone('generate_fees_for_year', NEXT_FRAIS_ID)[0]
+            frais_rows = []
+            echeance_rows = []
+            frais_ids = {}
+            for student in students:
+                frais_row, echeances = self._fee_rows(rules, student, frais_id, mode_paiement,
+                                                      bourse_map.get(student.id, 0), annee_scolaire)
+                frais_rows.append(frais_row)
+                echeance_rows.extend(echeances)
+                frais_ids[student.id] = frais_id
+                frais_id += 1
+
+            self._executemany('generate_fees_for_year', INSERT_FRAIS, frais_rows)
+            self._executemany('generate_fees_for_year', INSERT_ECHEANCE, echeance_rows)
+        return frais_ids
+
+    def recompute_fees(self, annee_scolaire=None):
+        # Réapplique les tarifs en vigueur aux frais d'une année (l'année en
+        # cours par défaut, ANY pour toutes) en une passe : les frais dont le
+        # total change sont recalculés avec leur échéancier. Les frais dont une
+        # échéance figure au registre des paiements ne sont pas modifiés, même
+        # si le paiement a été contre-passé (le registre la référence toujours).
+        # Les frais saisis à la main (add_frais_scolarite_manuel, sans
+        # mode_paiement) ne suivent pas les tarifs : ils sont ignorés.
+        # Retourne {'updated': [frais_id], 'skipped': [frais_id]}.
+        rules = self.get_fee_rules()
+        condition, params = self._school_year_filter(annee_scolaire)
+        result = {'updated': [], 'skipped': []}
+        with self.transaction():
+            rows = self._fetchall('recompute_fees', f'''
+                SELECT f.id, f.bourse_pourcentage, f.mode_paiement, f.total_annee, f.annee_scolaire,
+                       EXISTS (SELECT 1 FROM echeancier e JOIN paiements p ON p.echeance_id = e.id
+                               WHERE e.frais_id = f.id),
+                       s.*
+                FROM frais_scolarite f JOIN students s ON s.id = f.student_id
+                WHERE f.mode_paiement IS NOT NULL{condition}
+                ORDER BY f.id
+            ''', params)
+            frais_rows = []
+            echeance_rows = []
+            for frais_id, bourse_pourcentage, mode_paiement, total_annee, annee, has_payments, *student in rows:
+                frais_row, echeances = self._fee_rows(rules, Student._make(student), frais_id,
+                                                      mode_paiement, bourse_pourcentage or 0, annee)
+                if frais_row[2] == total_annee:
+                    continue
+                if has_payments:
+                    result['skipped'].append(frais_id)
+                    continue
+                frais_rows.append(frais_row[2:6] + (frais_id,))
+                echeance_rows.extend(echeances)
+                result['updated'].append(frais_id)
+
+            self._execute('recompute_fees',
+                'DELETE FROM echeancier WHERE frais_id IN (SELECT value FROM json_each(?))',
+                (json.dumps(result['updated']),),
+            )
+            self._executemany('recompute_fees', '''
+                UPDATE frais_scolarite
+                SET total_annee=?, bourse_pourcentage=?, bourse_montant=?, frais_inscription=?
+                WHERE id=?
+            ''', frais_rows)
+            self._executemany('recompute_fees', INSERT_ECHEANCE, echeance_rows)
+        return result
+
+    # ---------------- Tarifs ----------------
+    # Toute modification vide le cache de référence : les règles sont
+    # recompilées au prochain calcul.
+    def set_nationalite_groupe(self, nationalite, groupe):
+        self._execute_reference('set_nationalite_groupe', '''
+            INSERT INTO tarif_nationalites (nationalite, groupe) VALUES (?, ?)
+            ON CONFLICT (nationalite) DO UPDATE SET groupe = excluded.groupe
+        ''', (nationalite, groupe))
+
+    def set_tarif(self, groupe, total_annee, frais_inscription, niveau='*', annee_scolaire='*'):
+        self._execute_reference('set_tarif', '''
+            INSERT INTO tarifs (groupe, niveau, annee_scolaire, total_annee, frais_inscription)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (groupe, niveau, annee_scolaire)
+            DO UPDATE SET total_annee = excluded.total_annee, frais_inscription = excluded.frais_inscription
+        ''', (groupe, niveau, annee_scolaire, to_fcfa(total_annee), to_fcfa(frais_inscription)))
+
+    def get_tarifs(self):
+        return self._fetchall('get_tarifs', 'SELECT * FROM tarifs ORDER BY groupe, niveau, annee_scolaire')
+
+    def set_calendrier(self, mode_paiement, echeances, statut='*', annee_scolaire='*'):
+        # echeances : [(mois, type, poids, coefficient du frais d'inscription)]
+        with self.transaction():
+            self._execute_reference('set_calendrier',
+                'DELETE FROM calendriers WHERE mode_paiement = ? AND statut = ? AND annee_scolaire = ?',
+                (mode_paiement, statut, annee_scolaire),
+            )
+            self._executemany('set_calendrier', '''
+                INSERT INTO calendriers (mode_paiement, statut, annee_scolaire, rang, mois, type, poids, inscription)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', [(mode_paiement, statut, annee_scolaire, rang) + tuple(echeance)
+                  for rang, echeance in enumerate(echeances)])
+
+    # ---------------- Archives des années closes (voir database/archive.py) ----------------
+    def archive_year(self, annee_scolaire, force=False, vacuum=False):
+        # Retourne {table: lignes déplacées} ; vacuum : rend la place libérée au système
+        moved = archive.archive_year(self, annee_scolaire, self.archive_path, force)
+        if vacuum:
+            with self.pool.write() as conn:
+                conn.execute('VACUUM main')
+        return moved
+
+    def _fetchall_archived(self, name, query, params=()):
+        # query est écrit pour un schéma {s} ; il est exécuté sur la base
+        # principale et, si elle existe, sur l'archive (UNION ALL)
+        start = clock()
+        with self.pool.read() as conn:
+            schemas = ['main'] + ([archive.SCHEMA] if archive.attach(conn, self.archive_path) else [])
+            query = ' UNION ALL '.join(query.format(s=schema) for schema in schemas) + ' ORDER BY 1, 2'
+            params = params * len(schemas)
+            self._capture(query, params)
+            rows = conn.execute(query, params).fetchall()
+        self.statements.record(name, query, clock() - start, len(rows))
+        return rows
+
+    def get_archived_years(self):
+        with self.pool.read() as conn:
+            if not archive.attach(conn, self.archive_path):
+                return []
+            return [row[0] for row in conn.execute(
+                f'SELECT DISTINCT annee_scolaire FROM {archive.SCHEMA}.frais_scolarite ORDER BY annee_scolaire')]
+
+    def get_student_history(self, student_id):
+        # Échéances de toutes les années, archivées comprises :
+        # [(annee_scolaire, id, frais_id, mois, montant, paye, type, montant_paye)]
+        return self._fetchall_archived('get_student_history', '''
+            SELECT f.annee_scolaire, e.id, e.frais_id, e.mois, e.montant, e.paye, e.type, e.montant_paye
+            FROM {s}.frais_scolarite f
+            JOIN {s}.echeancier e ON e.frais_id = f.id
+            WHERE f.student_id = ?
+        ''', (student_id,))
+
+    # ---------------- Journal des modifications (migration 9) ----------------
+    # Synchronisation d'une copie : noter get_change_seq(), charger les tables,
+    # puis appeler régulièrement changes_since(dernière séquence) et relire
+    # les lignes indiquées. Une ligne peut apparaître plusieurs fois ; seule
+    # sa dernière opération compte.
+    def get_change_seq(self):
+        # Dernière séquence attribuée (0 si le journal n'a jamais servi)
+        row = self._fetchone('get_change_seq', "SELECT seq FROM sqlite_sequence WHERE name = 'changes'")
+        return row[0] if row else 0
+
+    def changes_since(self, seq=0, limit=1000):
+        # Modifications de séquence > seq, les plus anciennes d'abord :
+        # [Change(seq, table_name, row_id, related_id, operation)]. related_id :
+        # responsable_id pour student_responsable (row_id = student_id).
+        # ValueError si le journal a été purgé au-delà de seq : la copie doit
+        # alors être rechargée entièrement.
+        horizon, changes = self._fetch_snapshot('changes_since', [
+            ('SELECT seq FROM changes_horizon WHERE id = 1', (), None),
+            ('SELECT * FROM changes WHERE seq > ? ORDER BY seq LIMIT ?', (seq, limit), Change),
+        ])
+        if seq < horizon[0][0]:
+            raise ValueError(f'Journal purgé jusqu\'à la séquence {horizon[0][0]} : rechargement complet nécessaire')
+        return changes
+
+    def compact_changes(self, before_seq=None):
+        # Ne garde que la dernière modification de chaque ligne, ce qui ne fait
+        # rien perdre aux copies. before_seq : purge en plus tout le journal
+        # jusqu'à cette séquence (déjà lue par toutes les copies), au plus la
+        # dernière attribuée : l'horizon ne dépasse jamais une séquence à venir.
+        # Retourne {'collapsed': lignes fusionnées, 'purged': lignes purgées}.
+        with self.transaction():
+            collapsed = self._execute('compact_changes', '''
+                DELETE FROM changes WHERE seq NOT IN (
+                    SELECT MAX(seq) FROM changes GROUP BY table_name, row_id, related_id
+                )
+            ''').rowcount
+            purged = 0
+            if before_seq is not None:
+                before_seq = min(before_seq, self.get_change_seq())
+                purged = self._execute('compact_changes', 'DELETE FROM changes WHERE seq <= ?', (before_seq,)).rowcount
+                self._execute('compact_changes', 'UPDATE changes_horizon SET seq = MAX(seq, ?) WHERE id = 1',
+                              (before_seq,))
+        return {'collapsed': collapsed, 'purged': purged}
+
+    # ---------------- Sauvegardes (voir database/backup.py) ----------------
+    def backup(self, dest, pages_per_step=backup.DEFAULT_PAGES_PER_STEP, progress_cb=None,
+               sleep=backup.DEFAULT_STEP_SLEEP):
+        # Copie à chaud, cohérente, sans bloquer les écritures ; sleep : pause entre deux paquets
+        backup.backup(self, dest, pages_per_step, progress_cb, sleep)
+
+    def snapshot(self, directory, compress=True):
+        # Sauvegarde horodatée, vérifiée et compressée ; retourne son chemin
+        return backup.snapshot(self, directory, compress)
+
+    def restore(self, source):
+        backup.restore(self, source)
+
+    def check_integrity(self, path=None):
+        # Problèmes trouvés par PRAGMA integrity_check, sur la base ou sur une sauvegarde
+        if path is not None:
+            return backup.check_integrity(path)
+        rows = [row[0] for row in self._fetchall('check_integrity', 'PRAGMA integrity_check')]
+        return [] if rows == ['ok'] else rows
+
     # Méthode pour les informations de l'école
     def add_school_info(self, school_info):
-        self.cursor.execute('''
+        return self._execute_reference('add_school_info', '''
             INSERT INTO school_info (school_name, phone_number, email, director_name, signature)
             VALUES (?, ?, ?, ?, ?)
-        ''', school_info)
-        self.conn.commit()
-        return self.cursor.lastrowid
+        ''', school_info).lastrowid
 
     def get_school_info(self):
-        self.cursor.execute('SELECT * FROM school_info WHERE id = 1')
-        return self.cursor.fetchone()
+        # La signature (BLOB) n'est relue qu'après une modification ou expiration
+        return self._cached(('get_school_info',),
+                            lambda: self._fetchone('get_school_info', 'SELECT * FROM school_info WHERE id = 1'))
 
     def update_school_info(self, school_info):
-        self.cursor.execute('''
+        self._execute_reference('update_school_info', '''
             UPDATE school_info
             SET school_name=?, phone_number=?, email=?, director_name=?, signature=?
             WHERE id=1
         ''', school_info)
-        self.conn.commit()
     
     # Méthode pour remplir la base de données avec des données de test
     def populate_test_data(self):
         print("Populating test data...")
-        # Ajouter des enseignants
-        teacher1_id = self.add_teacher(('Dupont', 'Jean', 'jean.dupont@example.com', '0102030405'))
-        teacher2_id = self.add_teacher(('Martin', 'Marie', 'marie.martin@example.com', '0607080910'))
-        teacher3_id = self.add_teacher(('Lefebvre', 'Sophie', 'sophie.lefebvre@example.com', '0708091011'))
-
-        # Ajouter des classes
-        class1_id = self.add_class(('CP', teacher1_id))
-        class2_id = self.add_class(('CE1', teacher2_id))
-        class3_id = self.add_class(('CE2', teacher3_id))
-
-        stud_1 = self.add_student(('Durand', 'Paul', '2017-05-15', 'Française', 'M', 'Inscription', class1_id))
-        stud_2 = self.add_student(('Leroy', 'Sophie', '2016-08-22', 'Française', 'F', 'Réinscription', class2_id))
-        stud_3 = self.add_student(('Mbongo', 'Jean', '2015-03-10', 'Gabonaise', 'M', 'Inscription', class3_id))
-        stud_4 = self.add_student(('Smith', 'Emma', '2016-11-30', 'Américaine', 'F', 'Inscription', class2_id))
-        stud_5 = self.add_student(('Dubois', 'Lucas', '2015-07-05', 'Française', 'M', 'Réinscription', class3_id))
-
-        # Ajouter des responsables
+        # Une seule validation pour tout le jeu de données
+        with self.transaction():
+            # Ajouter des enseignants
+            teacher1_id = self.add_teacher(('Dupont', 'Jean', 'jean.dupont@example.com', '0102030405'))
+            teacher2_id = self.add_teacher(('Martin', 'Marie', 'marie.martin@example.com', '0607080910'))
+            teacher3_id = self.add_teacher(('Lefebvre', 'Sophie', 'sophie.lefebvre@example.com', '0708091011'))
+
+            # Ajouter des classes
+            class1_id = self.add_class(('CP', teacher1_id))
+            class2_id = self.add_class(('CE1', teacher2_id))
+            class3_id = self.add_class(('CE2', teacher3_id))
+
+            stud_1 = self.add_student(('Durand', 'Paul', '2017-05-15', 'Française', 'M', 'Inscription', class1_id))
+            stud_2 = self.add_student(('Leroy', 'Sophie', '2016-08-22', 'Française', 'F', 'Réinscription', class2_id))
+            stud_3 = self.add_student(('Mbongo', 'Jean', '2015-03-10', 'Gabonaise', 'M', 'Inscription', class3_id))
+            stud_4 = self.add_student(('Smith', 'Emma', '2016-11-30', 'Américaine', 'F', 'Inscription', class2_id))
+            stud_5 = self.add_student(('Dubois', 'Lucas', '2015-07-05', 'Française', 'M', 'Réinscription', class3_id))
+
+            # Ajouter des responsables
         
-        resp_1 = self.add_responsable(('Père', 'Durand', 'Pierre', '0101010101', '0202020202', 'pierre.durand@example.com'))
-        resp_2 = self.add_responsable(('Mère', 'Durand', 'Marie', '0303030303', '0404040404', 'marie.durand@example.com'))
-        resp_3 = self.add_responsable(('Mère', 'Leroy', 'Claire', '0505050505', '0606060606', 'claire.leroy@example.com'))
-        resp_4 = self.add_responsable(('Père', 'Mbongo', 'Robert', '0707070707', '0808080808', 'robert.mbongo@example.com'))
-        resp_5 = self.add_responsable(('Mère', 'Smith', 'Sarah', '0909090909', '1010101010', 'sarah.smith@example.com'))
-        resp_6 = self.add_responsable(('Père', 'Dubois', 'Thomas', '1111111111', '1212121212', 'thomas.dubois@example.com'))
-        resp_7 = self.add_responsable(('Tuteur', 'Martin', 'Paul', '1313131313', '1414141414', 'paul.martin@example.com'))
+            resp_1 = self.add_responsable(('Père', 'Durand', 'Pierre', '0101010101', '0202020202', 'pierre.durand@example.com'))
+            resp_2 = self.add_responsable(('Mère', 'Durand', 'Marie', '0303030303', '0404040404', 'marie.durand@example.com'))
+            resp_3 = self.add_responsable(('Mère', 'Leroy', 'Claire', '0505050505', '0606060606', 'claire.leroy@example.com'))
+            resp_4 = self.add_responsable(('Père', 'Mbongo', 'Robert', '0707070707', '0808080808', 'robert.mbongo@example.com'))
+            resp_5 = self.add_responsable(('Mère', 'Smith', 'Sarah', '0909090909', '1010101010', 'sarah.smith@example.com'))
+            resp_6 = self.add_responsable(('Père', 'Dubois', 'Thomas', '1111111111', '1212121212', 'thomas.dubois@example.com'))
+            resp_7 = self.add_responsable(('Tuteur', 'Martin', 'Paul', '1313131313', '1414141414', 'paul.martin@example.com'))
     
 
-        # Lier étudiants et responsables
-        self.link_student_responsable(stud_1, resp_1)
-        self.link_student_responsable(stud_1, resp_2)
-        self.link_student_responsable(stud_2, resp_3)
-        self.link_student_responsable(stud_3, resp_4)
-        self.link_student_responsable(stud_4, resp_5)
-        self.link_student_responsable(stud_5, resp_6)
-        self.link_student_responsable(stud_5, resp_7)
-
-        # Ajouter des frais de scolarité avec différents modes de paiement et bourses
-        self.add_frais_scolarite(stud_1, 'standard', 10)  # Inscription, bourse 10%
-        self.add_frais_scolarite(stud_2, 'echéancier', 0)  # Réinscription, pas de bourse
-        self.add_frais_scolarite(stud_3, 'standard', 20)  # Inscription, bourse 20%
-        self.add_frais_scolarite(stud_4, 'echéancier', 5)  # Inscription, bourse 5%
-        self.add_frais_scolarite(stud_5, 'standard', 0)  # Réinscription, pas de bourse
+            # Lier étudiants et responsables
+            self.link_student_responsable(stud_1, resp_1)
+            self.link_student_responsable(stud_1, resp_2)
+            self.link_student_responsable(stud_2, resp_3)
+            self.link_student_responsable(stud_3, resp_4)
+            self.link_student_responsable(stud_4, resp_5)
+            self.link_student_responsable(stud_5, resp_6)
+            self.link_student_responsable(stud_5, resp_7)
+
+            # Ajouter des frais de scolarité avec différents modes de paiement et bourses
+            self.add_frais_scolarite(stud_1, 'standard', 10)  # Inscription, bourse 10%
+            self.add_frais_scolarite(stud_2, 'echéancier', 0)  # Réinscription, pas de bourse
+            self.add_frais_scolarite(stud_3, 'standard', 20)  # Inscription, bourse 20%
+            self.add_frais_scolarite(stud_4, 'echéancier', 5)  # Inscription, bourse 5%
+            self.add_frais_scolarite(stud_5, 'standard', 0)  # Réinscription, pas de bourse
+
+    def close(self):
+        if getattr(self, 'pool', None) is not None:
+            self.pool.close()
 
     def __del__(self):
-        self.conn.close()
\ No newline at end of file
+        self.close()
\ No newline at end of file
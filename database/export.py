@@ -0,0 +1,138 @@
+import csv
+import os
+import threading
+
+# Export des listes de classe, échéanciers et impayés en CSV ou XLSX.
+# Les lignes vont directement du curseur (lectures en flux de DatabaseManager,
+# par paquets de fetchmany) au fichier : la mémoire utilisée ne dépend pas du
+# nombre de lignes. Le XLSX utilise le mode write_only d'openpyxl, dépendance
+# optionnelle importée seulement pour ce format.
+#
+#     export_roster(db, 'cp.csv', class_id=1)
+#     job = ExportJob(export_unpaid_balances, db, 'impayes.xlsx')
+#     job.wait()
+
+ROSTER_HEADER = ('classe', 'eleve_id', 'nom', 'prenom', 'date_naissance', 'sexe', 'statut',
+                 'responsable_type', 'responsable_nom', 'responsable_prenom', 'tel1', 'tel2', 'email')
+SCHEDULE_HEADER = ('eleve_id', 'nom', 'prenom', 'frais_id', 'mois', 'type', 'montant', 'montant_paye',
+                   'reste', 'paye')
+UNPAID_HEADER = ('eleve_id', 'nom', 'prenom', 'classe', 'du', 'paye', 'reste')
+
+FORMATS = ('csv', 'xlsx')
+
+
+def _format_for(dest, format):
+    if format is None:
+        name = dest if isinstance(dest, (str, os.PathLike)) else ''
+        format = os.path.splitext(os.fspath(name))[1].lstrip('.').lower() or 'csv'
+    if format not in FORMATS:
+        raise ValueError(f'Format d\'export inconnu : {format} ({", ".join(FORMATS)})')
+    return format
+
+
+def write_csv(rows, header, dest, delimiter=';', progress=None):
+    # dest : chemin ou fichier texte ouvert. utf-8-sig et ';' pour Excel en français.
+    if not isinstance(dest, (str, os.PathLike)):
+        return _write_csv(rows, header, dest, delimiter, progress)
+    with open(dest, 'w', newline='', encoding='utf-8-sig') as f:
+        return _write_csv(rows, header, f, delimiter, progress)
+
+
+def _write_csv(rows, header, f, delimiter, progress):
+    writer = csv.writer(f, delimiter=delimiter)
+    writer.writerow(header)
+    count = 0
+    for row in rows:
+        writer.writerow(row)
+        count += 1
+        if progress is not None:
+            progress(count)
+    return count
+
+
+def write_xlsx(rows, header, dest, sheet_title='Export', progress=None):
+    try:
+        from openpyxl import Workbook
+    except ImportError:
+        raise ImportError('L\'export XLSX nécessite openpyxl (pip install openpyxl)') from None
+    # write_only : les lignes sont écrites au fil de l'eau, jamais gardées en mémoire
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(sheet_title)
+    sheet.append(header)
+    count = 0
+    for row in rows:
+        sheet.append(row)
+        count += 1
+        if progress is not None:
+            progress(count)
+    workbook.save(dest)
+    return count
+
+
+def export_rows(rows, header, dest, format=None, sheet_title='Export', progress=None):
+    # Retourne le nombre de lignes écrites (hors en-tête)
+    if _format_for(dest, format) == 'xlsx':
+        return write_xlsx(rows, header, dest, sheet_title, progress)
+    return write_csv(rows, header, dest, progress=progress)
+
+
+def export_roster(db, dest, class_id=None, format=None, progress=None):
+    return export_rows(db.iter_roster(class_id), ROSTER_HEADER, dest, format, 'Liste de classe', progress)
+
+
+def export_schedules(db, dest, student_id=None, class_id=None, format=None, progress=None):
+    return export_rows(db.iter_schedules(student_id, class_id), SCHEDULE_HEADER, dest, format,
+                       'Échéanciers', progress)
+
+
+def export_unpaid_balances(db, dest, format=None, progress=None):
+    return export_rows(db.iter_unpaid_balances(), UNPAID_HEADER, dest, format, 'Impayés', progress)
+
+
+class ExportCancelled(Exception):
+    pass
+
+
+class ExportJob:
+    """Exécute une fonction d'export dans un thread de fond.
+
+    Les lectures passent par les connexions de lecture du pool : l'export ne
+    bloque pas les écritures de l'interface. rows donne la progression,
+    cancel() arrête l'export à la ligne suivante (le fichier est alors
+    incomplet), wait() attend la fin et retourne le nombre de lignes ou lève
+    l'erreur de l'export.
+    """
+
+    def __init__(self, export, db, dest, **kwargs):
+        self.rows = 0
+        self.error = None
+        self.result = None
+        self._cancelled = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(export, db, dest, kwargs),
+                                        name='export', daemon=True)
+        self._thread.start()
+
+    def _progress(self, count):
+        self.rows = count
+        if self._cancelled.is_set():
+            raise ExportCancelled()
+
+    def _run(self, export, db, dest, kwargs):
+        try:
+            self.result = export(db, dest, progress=self._progress, **kwargs)
+        except BaseException as e:
+            self.error = e
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def done(self):
+        return not self._thread.is_alive()
+
+    def wait(self, timeout=None):
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            raise TimeoutError('Export toujours en cours')
+        if self.error is not None:
+            raise self.error
+        return self.result
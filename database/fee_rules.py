@@ -0,0 +1,105 @@
+from datetime import date
+
+from database.money import split_amount
+
+# Règles de tarification compilées en mémoire.
+# Les tables tarif_nationalites, tarifs et calendriers (migration 7) sont lues
+# une fois et rangées dans des dictionnaires : le calcul des frais d'un élève
+# devient une suite de recherches par clé, sans requête. DatabaseManager garde
+# les règles compilées dans le cache des données de référence, vidé à chaque
+# modification d'un tarif ou d'une classe.
+
+# Valeur joker des colonnes niveau, annee_scolaire et statut
+ANY = '*'
+# Groupe des nationalités absentes de tarif_nationalites
+DEFAULT_GROUP = 'AUTRE'
+
+
+def current_school_year(today=None):
+    # L'année scolaire commence en septembre : '2024-2025' du 1er septembre 2024 au 31 août 2025
+    today = today or date.today()
+    start = today.year if today.month >= 9 else today.year - 1
+    return f'{start}-{start + 1}'
+
+
+def normalize(value):
+    return (value or '').strip().lower()
+
+
+def normalize_statut(statut):
+    # Les saisies mélangent 'Inscription' et 'inscription' ; tout autre statut
+    # est traité comme une réinscription, comme l'ancien calcul
+    return 'inscription' if normalize(statut) == 'inscription' else 'réinscription'
+
+
+class FeeRules:
+    def __init__(self, groups, tarifs, calendars, class_levels):
+        # {nationalité normalisée: groupe}
+        self.groups = groups
+        # {(groupe, niveau, annee_scolaire): (total_annee, frais_inscription)}
+        self.tarifs = tarifs
+        # {(mode_paiement, statut, annee_scolaire): [(mois, type, poids, coefficient inscription)]}
+        self.calendars = calendars
+        # {classe_id: niveau}
+        self.class_levels = class_levels
+
+    @classmethod
+    def from_connection(cls, conn):
+        groups = {
+            normalize(nationalite): groupe
+            for nationalite, groupe in conn.execute('SELECT nationalite, groupe FROM tarif_nationalites')
+        }
+        tarifs = {
+            (groupe, niveau, annee): (total, inscription)
+            for groupe, niveau, annee, total, inscription in conn.execute(
+                'SELECT groupe, niveau, annee_scolaire, total_annee, frais_inscription FROM tarifs'
+            )
+        }
+        calendars = {}
+        for mode, statut, annee, mois, type_, poids, inscription in conn.execute('''
+            SELECT mode_paiement, statut, annee_scolaire, mois, type, poids, inscription
+            FROM calendriers ORDER BY rang, id
+        '''):
+            key = (normalize(mode), statut if statut == ANY else normalize_statut(statut), annee)
+            calendars.setdefault(key, []).append((mois, type_, poids, inscription))
+        class_levels = dict(conn.execute('SELECT id, nom FROM classes'))
+        return cls(groups, tarifs, calendars, class_levels)
+
+    def group_for(self, nationalite):
+        return self.groups.get(normalize(nationalite), DEFAULT_GROUP)
+
+    def tarif(self, nationalite, classe_id=None, annee_scolaire=None):
+        # Du plus précis au plus général : niveau et année, niveau, année, défaut
+        groupe = self.group_for(nationalite)
+        niveau = self.class_levels.get(classe_id, ANY)
+        annee = annee_scolaire or current_school_year()
+        for key in ((groupe, niveau, annee), (groupe, niveau, ANY), (groupe, ANY, annee), (groupe, ANY, ANY)):
+            if key in self.tarifs:
+                return self.tarifs[key]
+        raise LookupError(f'Aucun tarif pour le groupe {groupe}')
+
+    def fees_for(self, student, annee_scolaire=None):
+        # student : ligne Student (database/rows.py) ; retourne (total_annee, frais_inscription)
+        return self.tarif(student.nationalite, student.classe_id, annee_scolaire)
+
+    def calendar(self, mode_paiement, statut, annee_scolaire=None):
+        mode = normalize(mode_paiement)
+        statut = normalize_statut(statut)
+        annee = annee_scolaire or current_school_year()
+        for key in ((mode, statut, annee), (mode, statut, ANY), (mode, ANY, annee), (mode, ANY, ANY)):
+            if key in self.calendars:
+                return self.calendars[key]
+        raise ValueError(f'Mode de paiement inconnu : {mode_paiement}')
+
+    def schedule(self, frais_id, total_annee, frais_inscription, statut, mode_paiement, annee_scolaire=None):
+        # Lignes (frais_id, mois, montant, paye, type) de l'échéancier. Le reste
+        # (total - inscription) est réparti au prorata des poids, au plus fort
+        # reste ; chaque ligne ajoute en plus coefficient x frais d'inscription.
+        calendar = self.calendar(mode_paiement, statut, annee_scolaire)
+        weights = [poids for _, _, poids, _ in calendar if poids > 0]
+        shares = iter(split_amount(total_annee - frais_inscription, weights) if weights else [])
+        echeances = []
+        for mois, type_, poids, inscription in calendar:
+            montant = (next(shares) if poids > 0 else 0) + inscription * frais_inscription
+            echeances.append((frais_id, mois, montant, False, type_))
+        return echeances
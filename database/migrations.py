@@ -0,0 +1,955 @@
+import sqlite3
+
+from database.fee_rules import current_school_year
+
+# Migrations du schéma, appliquées dans l'ordre et suivies via PRAGMA user_version.
+# Chaque migration reçoit la connexion et s'exécute dans la transaction ouverte
+# par apply_migrations : une migration qui échoue ne laisse rien derrière elle.
+
+
+def _table_exists(conn, table):
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+    ).fetchone()
+    return row is not None
+
+
+def _table_sql(conn, table):
+    row = conn.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+    ).fetchone()
+    return row[0] if row else None
+
+
+def _columns(conn, table):
+    return [row[1] for row in conn.execute(f'PRAGMA table_info({table})')]
+
+
+def _add_missing_columns(conn, table, columns):
+    existing = _columns(conn, table)
+    for name, definition in columns:
+        if name not in existing:
+            conn.execute(f'ALTER TABLE {table} ADD COLUMN {name} {definition}')
+
+
+# ---------------- Migration 1 : schéma initial ----------------
+STUDENT_RESPONSABLE_DDL = '''
+    CREATE TABLE IF NOT EXISTS student_responsable (
+        student_id INTEGER,
+        responsable_id INTEGER,
+        FOREIGN KEY (student_id) REFERENCES students(id),
+        FOREIGN KEY (responsable_id) REFERENCES responsables(id),
+        PRIMARY KEY (student_id, responsable_id)
+    )
+'''
+
+
+def _upgrade_legacy_schema(conn):
+    # Les anciennes bases (dont l'ecole.db livré) utilisent parents/student_parent
+    if _table_exists(conn, 'parents') and not _table_exists(conn, 'responsables'):
+        conn.execute('ALTER TABLE parents RENAME TO responsables')
+
+    if _table_exists(conn, 'student_parent'):
+        conn.execute(STUDENT_RESPONSABLE_DDL)
+        conn.execute('''
+            INSERT OR IGNORE INTO student_responsable (student_id, responsable_id)
+            SELECT student_id, parent_id FROM student_parent
+        ''')
+        conn.execute('DROP TABLE student_parent')
+
+    # La clé étrangère de student_responsable pointait vers une table "repsonsables"
+    sql = _table_sql(conn, 'student_responsable')
+    if sql is not None and 'repsonsables' in sql:
+        conn.execute('ALTER TABLE student_responsable RENAME TO student_responsable_old')
+        conn.execute(STUDENT_RESPONSABLE_DDL)
+        conn.execute('''
+            INSERT INTO student_responsable (student_id, responsable_id)
+            SELECT student_id, responsable_id FROM student_responsable_old
+        ''')
+        conn.execute('DROP TABLE student_responsable_old')
+
+    # Colonnes ajoutées depuis la première version du schéma
+    if _table_exists(conn, 'frais_scolarite'):
+        _add_missing_columns(conn, 'frais_scolarite', [
+            ('bourse_montant', 'REAL'),
+            ('mode_paiement', 'TEXT'),
+        ])
+    if _table_exists(conn, 'echeancier'):
+        _add_missing_columns(conn, 'echeancier', [('type', 'TEXT')])
+    if _table_exists(conn, 'enseignants'):
+        _add_missing_columns(conn, 'enseignants', [
+            ('date_entree', 'DATE'),
+            ('contrat', 'TEXT'),
+            ('id_gabonais', 'INTEGER'),
+        ])
+
+
+def _migration_001_schema_initial(conn):
+    _upgrade_legacy_schema(conn)
+
+    # Table étudiants
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS students (
+            id INTEGER PRIMARY KEY,
+            nom TEXT NOT NULL,
+            prenom TEXT NOT NULL,
+            date_naissance TEXT,
+            nationalite TEXT,
+            sexe TEXT,
+            statut TEXT,
+            classe_id INTEGER,
+            FOREIGN KEY (classe_id) REFERENCES classes(id)
+        )
+    ''')
+
+    # Table responsables
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS responsables (
+            id INTEGER PRIMARY KEY,
+            type TEXT,
+            nom TEXT NOT NULL,
+            prenom TEXT NOT NULL,
+            tel1 TEXT NOT NULL,
+            tel2 TEXT,
+            email TEXT NOT NULL
+        )
+    ''')
+
+    # Table de liaison étudiants-responsables
+    conn.execute(STUDENT_RESPONSABLE_DDL)
+
+    # Table frais_scolarite
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS frais_scolarite (
+            id INTEGER PRIMARY KEY,
+            student_id INTEGER,
+            total_annee REAL,
+            bourse_pourcentage REAL,
+            bourse_montant REAL,
+            frais_inscription REAL,
+            mode_paiement TEXT,
+            FOREIGN KEY (student_id) REFERENCES students(id)
+        )
+    ''')
+
+    # Table echeancier
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS echeancier (
+            id INTEGER PRIMARY KEY,
+            frais_id INTEGER,
+            mois TEXT,
+            montant REAL,
+            paye BOOLEAN,
+            type TEXT,
+            FOREIGN KEY (frais_id) REFERENCES frais_scolarite(id)
+        )
+    ''')
+
+    # Table classes
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS classes (
+            id INTEGER PRIMARY KEY,
+            nom TEXT NOT NULL,
+            enseignant_id INTEGER,
+            FOREIGN KEY (enseignant_id) REFERENCES enseignants(id)
+        )
+    ''')
+
+    # Table enseignants
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS enseignants (
+            id INTEGER PRIMARY KEY,
+            nom TEXT NOT NULL,
+            prenom TEXT NOT NULL,
+            email TEXT,
+            tel TEXT,
+            date_entree DATE,
+            contrat TEXT, -- "Détaché Français", "Titulaire Gabonais", "Contractuel"
+            id_gabonais INTEGER
+        )
+    ''')
+
+    # Table avec informations sur l'école
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS school_info (
+            id INTEGER PRIMARY KEY,
+            school_name TEXT,
+            phone_number TEXT,
+            email TEXT,
+            director_name TEXT,
+            signature BLOB
+        )
+    ''')
+
+
+# ---------------- Migration 2 : index secondaires ----------------
+def _migration_002_index(conn):
+    # Clés étrangères parcourues par les requêtes fréquentes
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_students_classe_id ON students(classe_id)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_frais_scolarite_student_id ON frais_scolarite(student_id)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_echeancier_frais_id ON echeancier(frais_id)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_student_responsable_responsable_id ON student_responsable(responsable_id)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_classes_enseignant_id ON classes(enseignant_id)')
+    # Index partiel : seules les échéances impayées y figurent (get_unpaid_fees)
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_echeancier_impayes ON echeancier(frais_id) WHERE paye = 0')
+    # Recherche par début de nom/prénom (LIKE insensible à la casse)
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_responsables_nom ON responsables(nom COLLATE NOCASE)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_responsables_prenom ON responsables(prenom COLLATE NOCASE)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_students_nom ON students(nom, prenom)')
+
+
+# ---------------- Migration 3 : recherche plein texte (FTS5) ----------------
+# Tables FTS à contenu externe : le texte reste dans la table de base, l'index
+# est tenu à jour par des triggers. remove_diacritics rend la recherche
+# insensible aux accents ("Leroy" / "léroy") et les index de préfixe
+# accélèrent les requêtes "dur*" tapées dans la barre de recherche.
+FTS_TABLES = {
+    'responsables_fts': ('responsables', ('nom', 'prenom', 'email', 'tel1', 'tel2')),
+    'students_fts': ('students', ('nom', 'prenom')),
+}
+
+
+def _create_fts_table(conn, fts_table, table, columns, prefix='2 3'):
+    column_list = ', '.join(columns)
+    new_values = ', '.join(f'new.{column}' for column in columns)
+    old_values = ', '.join(f'old.{column}' for column in columns)
+    conn.execute(f'''
+        CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table} USING fts5(
+            {column_list},
+            content='{table}', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2', prefix='{prefix}'
+        )
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS {fts_table}_ai AFTER INSERT ON {table} BEGIN
+            INSERT INTO {fts_table} (rowid, {column_list}) VALUES (new.id, {new_values});
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS {fts_table}_ad AFTER DELETE ON {table} BEGIN
+            INSERT INTO {fts_table} ({fts_table}, rowid, {column_list}) VALUES ('delete', old.id, {old_values});
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS {fts_table}_au AFTER UPDATE ON {table} BEGIN
+            INSERT INTO {fts_table} ({fts_table}, rowid, {column_list}) VALUES ('delete', old.id, {old_values});
+            INSERT INTO {fts_table} (rowid, {column_list}) VALUES (new.id, {new_values});
+        END
+    ''')
+    # Indexe les lignes déjà présentes (bases existantes)
+    conn.execute(f"INSERT INTO {fts_table} ({fts_table}) VALUES ('rebuild')")
+
+
+def _migration_003_fts(conn):
+    for fts_table, (table, columns) in FTS_TABLES.items():
+        _create_fts_table(conn, fts_table, table, columns)
+
+
+# ---------------- Migration 4 : soldes matérialisés ----------------
+# Dû et payé par élève et par mois, et par classe et par mois, tenus à jour
+# par des triggers sur echeancier, frais_scolarite et students. Les tableaux de
+# bord lisent quelques lignes par clé primaire au lieu de rejoindre
+# students -> frais_scolarite -> echeancier. classe_id 0 = élève sans classe.
+BALANCE_TRIGGERS = (
+    'soldes_echeancier_ai', 'soldes_echeancier_ad', 'soldes_echeancier_au',
+    'soldes_frais_au', 'soldes_students_au',
+)
+
+UPSERT_SOLDE_ELEVE = '''
+    ON CONFLICT (student_id, mois) DO UPDATE SET du = du + excluded.du, paye = paye + excluded.paye'''
+UPSERT_SOLDE_CLASSE = '''
+    ON CONFLICT (classe_id, mois) DO UPDATE SET du = du + excluded.du, paye = paye + excluded.paye'''
+# Soldes par année scolaire (migration 11)
+UPSERT_SOLDE_ELEVE_ANNEE = '''
+    ON CONFLICT (student_id, annee_scolaire, mois) DO UPDATE SET du = du + excluded.du, paye = paye + excluded.paye'''
+UPSERT_SOLDE_CLASSE_ANNEE = '''
+    ON CONFLICT (classe_id, annee_scolaire, mois) DO UPDATE SET du = du + excluded.du, paye = paye + excluded.paye'''
+
+
+def _balance_layout(by_year, frais='f'):
+    # (colonne année des soldes, valeur lue sur le frais, upsert élève, upsert classe)
+    if by_year:
+        return ', annee_scolaire', f', {frais}.annee_scolaire', UPSERT_SOLDE_ELEVE_ANNEE, UPSERT_SOLDE_CLASSE_ANNEE
+    return '', '', UPSERT_SOLDE_ELEVE, UPSERT_SOLDE_CLASSE
+
+
+def _balance_delta_sql(row, sign, paid, by_year=False):
+    # Ajoute (sign = '') ou retire (sign = '-') une échéance des soldes
+    paid = paid.format(e=row)
+    year, year_value, upsert_eleve, upsert_classe = _balance_layout(by_year)
+    return f'''
+        INSERT INTO soldes_eleves (student_id{year}, mois, du, paye)
+        SELECT f.student_id{year_value}, {row}.mois, {sign}{row}.montant, {sign}({paid})
+        FROM frais_scolarite f WHERE f.id = {row}.frais_id AND f.student_id IS NOT NULL
+        {upsert_eleve};
+        INSERT INTO soldes_classes (classe_id{year}, mois, du, paye)
+        SELECT IFNULL(s.classe_id, 0){year_value}, {row}.mois, {sign}{row}.montant, {sign}({paid})
+        FROM frais_scolarite f JOIN students s ON s.id = f.student_id WHERE f.id = {row}.frais_id
+        {upsert_classe};
+    '''
+
+
+def _frais_delta_sql(frais, sign, paid, by_year=False):
+    # Déplace toutes les échéances d'un frais (changement d'élève ou d'année)
+    paid = paid.format(e='e')
+    year, year_value, upsert_eleve, upsert_classe = _balance_layout(by_year, frais)
+    return f'''
+        INSERT INTO soldes_eleves (student_id{year}, mois, du, paye)
+        SELECT {frais}.student_id{year_value}, e.mois, {sign}SUM(e.montant), {sign}SUM({paid})
+        FROM echeancier e WHERE e.frais_id = {frais}.id AND {frais}.student_id IS NOT NULL
+        GROUP BY e.mois
+        {upsert_eleve};
+        INSERT INTO soldes_classes (classe_id{year}, mois, du, paye)
+        SELECT IFNULL(s.classe_id, 0){year_value}, e.mois, {sign}SUM(e.montant), {sign}SUM({paid})
+        FROM echeancier e JOIN students s ON s.id = {frais}.student_id WHERE e.frais_id = {frais}.id
+        GROUP BY e.mois
+        {upsert_classe};
+    '''
+
+
+def create_balance_triggers(conn, paid, by_year=False):
+    # paid : expression du montant payé d'une échéance, "{e}" désignant la ligne ;
+    # by_year : soldes par année scolaire (migration 11)
+    for trigger in BALANCE_TRIGGERS:
+        conn.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+    conn.execute(f'''
+        CREATE TRIGGER soldes_echeancier_ai AFTER INSERT ON echeancier BEGIN
+            {_balance_delta_sql('new', '', paid, by_year)}
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER soldes_echeancier_ad AFTER DELETE ON echeancier BEGIN
+            {_balance_delta_sql('old', '-', paid, by_year)}
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER soldes_echeancier_au AFTER UPDATE ON echeancier BEGIN
+            {_balance_delta_sql('old', '-', paid, by_year)}
+            {_balance_delta_sql('new', '', paid, by_year)}
+        END
+    ''')
+    year, _, _, upsert_classe = _balance_layout(by_year)
+    if by_year:
+        frais_event = 'UPDATE OF student_id, annee_scolaire'
+        frais_moved = 'old.student_id IS NOT new.student_id OR old.annee_scolaire IS NOT new.annee_scolaire'
+    else:
+        frais_event = 'UPDATE OF student_id'
+        frais_moved = 'old.student_id IS NOT new.student_id'
+    conn.execute(f'''
+        CREATE TRIGGER soldes_frais_au AFTER {frais_event} ON frais_scolarite
+        WHEN {frais_moved} BEGIN
+            {_frais_delta_sql('old', '-', paid, by_year)}
+            {_frais_delta_sql('new', '', paid, by_year)}
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER soldes_students_au AFTER UPDATE OF classe_id ON students
+        WHEN IFNULL(old.classe_id, 0) <> IFNULL(new.classe_id, 0) BEGIN
+            INSERT INTO soldes_classes (classe_id{year}, mois, du, paye)
+            SELECT IFNULL(old.classe_id, 0){year}, mois, -du, -paye FROM soldes_eleves WHERE student_id = old.id
+            {upsert_classe};
+            INSERT INTO soldes_classes (classe_id{year}, mois, du, paye)
+            SELECT IFNULL(new.classe_id, 0){year}, mois, du, paye FROM soldes_eleves WHERE student_id = new.id
+            {upsert_classe};
+        END
+    ''')
+
+
+# Recalcul complet, utilisé à la création et par DatabaseManager.rebuild_balances.
+# Colonnes : clé, [annee_scolaire,] mois, du, paye
+def balance_recompute_sql(paid, by_year=False):
+    paid = paid.format(e='e')
+    year = ', f.annee_scolaire' if by_year else ''
+    return {
+        'soldes_eleves': f'''
+            SELECT f.student_id{year}, e.mois, SUM(e.montant), SUM({paid})
+            FROM echeancier e JOIN frais_scolarite f ON f.id = e.frais_id
+            WHERE f.student_id IS NOT NULL
+            GROUP BY f.student_id{year}, e.mois
+        ''',
+        'soldes_classes': f'''
+            SELECT IFNULL(s.classe_id, 0){year}, e.mois, SUM(e.montant), SUM({paid})
+            FROM echeancier e
+            JOIN frais_scolarite f ON f.id = e.frais_id
+            JOIN students s ON s.id = f.student_id
+            GROUP BY IFNULL(s.classe_id, 0){year}, e.mois
+        ''',
+    }
+
+
+def rebuild_balance_tables(conn, paid, by_year=False):
+    recompute = balance_recompute_sql(paid, by_year)
+    year = ', annee_scolaire' if by_year else ''
+    conn.execute('DELETE FROM soldes_eleves')
+    conn.execute(f"INSERT INTO soldes_eleves (student_id{year}, mois, du, paye) {recompute['soldes_eleves']}")
+    conn.execute('DELETE FROM soldes_classes')
+    conn.execute(f"INSERT INTO soldes_classes (classe_id{year}, mois, du, paye) {recompute['soldes_classes']}")
+
+
+PAID_FROM_FLAG = 'CASE WHEN {e}.paye THEN {e}.montant ELSE 0 END'
+
+
+def _migration_004_soldes(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS soldes_eleves (
+            student_id INTEGER NOT NULL,
+            mois TEXT NOT NULL,
+            du REAL NOT NULL DEFAULT 0,
+            paye REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (student_id, mois)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS soldes_classes (
+            classe_id INTEGER NOT NULL,
+            mois TEXT NOT NULL,
+            du REAL NOT NULL DEFAULT 0,
+            paye REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (classe_id, mois)
+        ) WITHOUT ROWID
+    ''')
+    create_balance_triggers(conn, PAID_FROM_FLAG)
+    rebuild_balance_tables(conn, PAID_FROM_FLAG)
+
+
+# ---------------- Migration 5 : registre des paiements ----------------
+# Chaque règlement (même partiel) est une ligne du registre paiements, jamais
+# modifiée ni supprimée : une correction s'enregistre comme une contre-passation
+# (montant négatif). echeancier.montant_paye et echeancier.paye sont tenus à
+# jour par trigger à partir du registre, et les soldes suivent montant_paye.
+PAID_FROM_LEDGER = '{e}.montant_paye'
+
+# Écart toléré sur des montants REAL pour considérer une échéance soldée
+PAYMENT_TOLERANCE = 0.005
+
+
+# Expression utilisée par les triggers du schéma courant
+BALANCE_PAID_SQL = PAID_FROM_LEDGER
+
+# Soldes du schéma courant tenus par année scolaire (migration 11)
+BALANCE_BY_YEAR = True
+
+
+PAYMENT_TRIGGERS = ('paiements_ai', 'paiements_no_update', 'paiements_no_delete')
+
+
+def create_payment_triggers(conn, tolerance=0):
+    for trigger in PAYMENT_TRIGGERS:
+        conn.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+    conn.execute(f'''
+        CREATE TRIGGER paiements_ai AFTER INSERT ON paiements BEGIN
+            UPDATE echeancier
+            SET montant_paye = montant_paye + new.montant,
+                paye = montant_paye + new.montant >= montant - {tolerance}
+            WHERE id = new.echeance_id;
+        END
+    ''')
+    for event in ('UPDATE', 'DELETE'):
+        conn.execute(f'''
+            CREATE TRIGGER paiements_no_{event.lower()} BEFORE {event} ON paiements BEGIN
+                SELECT RAISE(ABORT, 'registre des paiements en ajout seul');
+            END
+        ''')
+
+
+def _migration_005_paiements(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS paiements (
+            id INTEGER PRIMARY KEY,
+            echeance_id INTEGER NOT NULL,
+            montant REAL NOT NULL,
+            date_paiement TEXT NOT NULL,
+            methode TEXT,
+            reference TEXT,
+            FOREIGN KEY (echeance_id) REFERENCES echeancier(id)
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_paiements_echeance_id ON paiements(echeance_id)')
+    conn.execute(
+        'CREATE INDEX IF NOT EXISTS idx_paiements_reference ON paiements(reference) WHERE reference IS NOT NULL'
+    )
+    _add_missing_columns(conn, 'echeancier', [('montant_paye', 'REAL NOT NULL DEFAULT 0')])
+
+    create_payment_triggers(conn, PAYMENT_TOLERANCE)
+
+    # Les échéances déjà marquées payées entrent au registre comme reprise
+    conn.execute('''
+        INSERT INTO paiements (echeance_id, montant, date_paiement, methode)
+        SELECT id, montant - montant_paye, date('now'), 'reprise'
+        FROM echeancier WHERE paye AND montant_paye < montant
+    ''')
+    create_balance_triggers(conn, PAID_FROM_LEDGER)
+    rebuild_balance_tables(conn, PAID_FROM_LEDGER)
+
+
+# ---------------- Migration 6 : montants entiers en FCFA ----------------
+# Les colonnes de montants passent de REAL à INTEGER (voir database/money.py).
+# SQLite ne sait pas changer le type d'une colonne : chaque table est recréée
+# puis recopiée, ce qui normalise aussi l'ordre des colonnes des anciennes
+# bases. Les triggers qui lisent ces tables sont recréés à la fin.
+MONEY_TABLES = {
+    'frais_scolarite': ('''
+        CREATE TABLE frais_scolarite_new (
+            id INTEGER PRIMARY KEY,
+            student_id INTEGER,
+            total_annee INTEGER,
+            bourse_pourcentage REAL,
+            bourse_montant INTEGER,
+            frais_inscription INTEGER,
+            mode_paiement TEXT,
+            FOREIGN KEY (student_id) REFERENCES students(id)
+        )
+    ''', {
+        'id': 'id', 'student_id': 'student_id', 'total_annee': 'CAST(ROUND(total_annee) AS INTEGER)',
+        'bourse_pourcentage': 'bourse_pourcentage', 'bourse_montant': 'CAST(ROUND(bourse_montant) AS INTEGER)',
+        'frais_inscription': 'CAST(ROUND(frais_inscription) AS INTEGER)', 'mode_paiement': 'mode_paiement',
+    }),
+    'echeancier': ('''
+        CREATE TABLE echeancier_new (
+            id INTEGER PRIMARY KEY,
+            frais_id INTEGER,
+            mois TEXT,
+            montant INTEGER,
+            paye BOOLEAN,
+            type TEXT,
+            montant_paye INTEGER NOT NULL DEFAULT 0,
+            FOREIGN KEY (frais_id) REFERENCES frais_scolarite(id)
+        )
+    ''', {
+        'id': 'id', 'frais_id': 'frais_id', 'mois': 'mois', 'montant': 'CAST(ROUND(montant) AS INTEGER)',
+        'paye': 'paye', 'type': 'type', 'montant_paye': 'CAST(ROUND(montant_paye) AS INTEGER)',
+    }),
+    'paiements': ('''
+        CREATE TABLE paiements_new (
+            id INTEGER PRIMARY KEY,
+            echeance_id INTEGER NOT NULL,
+            montant INTEGER NOT NULL,
+            date_paiement TEXT NOT NULL,
+            methode TEXT,
+            reference TEXT,
+            FOREIGN KEY (echeance_id) REFERENCES echeancier(id)
+        )
+    ''', {
+        'id': 'id', 'echeance_id': 'echeance_id', 'montant': 'CAST(ROUND(montant) AS INTEGER)',
+        'date_paiement': 'date_paiement', 'methode': 'methode', 'reference': 'reference',
+    }),
+    'soldes_eleves': ('''
+        CREATE TABLE soldes_eleves_new (
+            student_id INTEGER NOT NULL,
+            mois TEXT NOT NULL,
+            du INTEGER NOT NULL DEFAULT 0,
+            paye INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (student_id, mois)
+        ) WITHOUT ROWID
+    ''', None),
+    'soldes_classes': ('''
+        CREATE TABLE soldes_classes_new (
+            classe_id INTEGER NOT NULL,
+            mois TEXT NOT NULL,
+            du INTEGER NOT NULL DEFAULT 0,
+            paye INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (classe_id, mois)
+        ) WITHOUT ROWID
+    ''', None),
+}
+
+
+def _rebuild_table(conn, table, ddl, columns):
+    # columns : {colonne: expression de recopie}, None pour une table recalculée
+    conn.execute(ddl)
+    if columns:
+        conn.execute(f'''
+            INSERT INTO {table}_new ({", ".join(columns)})
+            SELECT {", ".join(columns.values())} FROM {table}
+        ''')
+    conn.execute(f'DROP TABLE {table}')
+    conn.execute(f'ALTER TABLE {table}_new RENAME TO {table}')
+
+
+def _fix_rounding_drift(conn):
+    # Les échéances générées en REAL (ex. 995000 / 3) ne somment plus au total
+    # une fois arrondies : l'écart, au plus un demi-franc par échéance, va sur
+    # la dernière échéance non payée. Un écart plus grand (saisie manuelle) est
+    # laissé tel quel.
+    rows = conn.execute('''
+        SELECT f.id, f.total_annee - SUM(e.montant),
+               (SELECT MAX(id) FROM echeancier WHERE frais_id = f.id AND paye = 0)
+        FROM frais_scolarite f JOIN echeancier e ON e.frais_id = f.id
+        GROUP BY f.id
+        HAVING f.total_annee <> SUM(e.montant) AND ABS(f.total_annee - SUM(e.montant)) * 2 <= COUNT(*)
+    ''').fetchall()
+    conn.executemany(
+        'UPDATE echeancier SET montant = montant + ? WHERE id = ?',
+        [(drift, echeance_id) for _, drift, echeance_id in rows if echeance_id is not None],
+    )
+
+
+def _migration_006_montants_entiers(conn):
+    for trigger in BALANCE_TRIGGERS + PAYMENT_TRIGGERS:
+        conn.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+    for table, (ddl, columns) in MONEY_TABLES.items():
+        _rebuild_table(conn, table, ddl, columns)
+    _fix_rounding_drift(conn)
+    conn.execute('UPDATE echeancier SET paye = montant_paye >= montant')
+
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_frais_scolarite_student_id ON frais_scolarite(student_id)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_echeancier_frais_id ON echeancier(frais_id)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_echeancier_impayes ON echeancier(frais_id) WHERE paye = 0')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_paiements_echeance_id ON paiements(echeance_id)')
+    conn.execute(
+        'CREATE INDEX IF NOT EXISTS idx_paiements_reference ON paiements(reference) WHERE reference IS NOT NULL'
+    )
+    create_payment_triggers(conn)
+    create_balance_triggers(conn, PAID_FROM_LEDGER)
+    rebuild_balance_tables(conn, PAID_FROM_LEDGER)
+
+
+# ---------------- Migration 7 : règles de tarification ----------------
+# Tarifs et calendriers d'échéances en tables (voir database/fee_rules.py).
+# '*' dans niveau, annee_scolaire ou statut = valable pour toutes les valeurs.
+# Les données initiales reprennent les montants et mois de l'ancien calcul.
+DEFAULT_NATIONALITES = [
+    ('Français', 'FR'), ('Française', 'FR'), ('FR', 'FR'),
+    ('Gabonais', 'GA'), ('Gabonaise', 'GA'), ('GA', 'GA'),
+]
+
+DEFAULT_TARIFS = [
+    ('FR', 1095000, 100000),
+    ('GA', 795000, 100000),
+    ('AUTRE', 1245000, 100000),
+]
+
+# (mode_paiement, statut, [(mois, type, poids, coefficient du frais d'inscription)])
+DEFAULT_CALENDRIERS = [
+    ('standard', 'inscription', [
+        ('Septembre', 'frais_inscription', 0, 1),
+        ('Septembre', 'paiement_standard', 1, 0),
+        ('Décembre', 'paiement_standard', 1, 0),
+        ('Mars', 'paiement_standard', 1, 0),
+    ]),
+    # Réinscription : frais d'inscription payés en juin, récupérés en mars
+    ('standard', 'réinscription', [
+        ('Septembre', 'frais_inscription', 0, 1),
+        ('Septembre', 'paiement_standard', 1, 0),
+        ('Décembre', 'paiement_standard', 1, 0),
+        ('Mars', 'paiement_standard', 1, -1),
+    ]),
+    ('echéancier', '*', [('Septembre', 'frais_inscription', 0, 1)] + [
+        (mois, 'echéancier_mensuel', 1, 0)
+        for mois in ('Octobre', 'Novembre', 'Décembre', 'Janvier', 'Février', 'Mars', 'Avril', 'Mai')
+    ]),
+]
+
+
+def _migration_007_tarifs(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS tarif_nationalites (
+            nationalite TEXT PRIMARY KEY COLLATE NOCASE,
+            groupe TEXT NOT NULL
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS tarifs (
+            id INTEGER PRIMARY KEY,
+            groupe TEXT NOT NULL,
+            niveau TEXT NOT NULL DEFAULT '*',
+            annee_scolaire TEXT NOT NULL DEFAULT '*',
+            total_annee INTEGER NOT NULL,
+            frais_inscription INTEGER NOT NULL,
+            UNIQUE (groupe, niveau, annee_scolaire)
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS calendriers (
+            id INTEGER PRIMARY KEY,
+            mode_paiement TEXT NOT NULL,
+            statut TEXT NOT NULL DEFAULT '*',
+            annee_scolaire TEXT NOT NULL DEFAULT '*',
+            rang INTEGER NOT NULL,
+            mois TEXT NOT NULL,
+            type TEXT NOT NULL,
+            poids INTEGER NOT NULL DEFAULT 1,
+            inscription INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    conn.executemany(
+        'INSERT OR IGNORE INTO tarif_nationalites (nationalite, groupe) VALUES (?, ?)', DEFAULT_NATIONALITES
+    )
+    conn.executemany(
+        'INSERT OR IGNORE INTO tarifs (groupe, total_annee, frais_inscription) VALUES (?, ?, ?)', DEFAULT_TARIFS
+    )
+    if conn.execute('SELECT COUNT(*) FROM calendriers').fetchone()[0] == 0:
+        conn.executemany('''
+            INSERT INTO calendriers (mode_paiement, statut, rang, mois, type, poids, inscription)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', [
+            (mode, statut, rang) + echeance
+            for mode, statut, echeances in DEFAULT_CALENDRIERS
+            for rang, echeance in enumerate(echeances)
+        ])
+
+
+# ---------------- Migration 8 : année scolaire des frais ----------------
+# Chaque frais appartient à une année scolaire ('2024-2025') ; ses échéances et
+# paiements la suivent par frais_id. Les lectures courantes se limitent à
+# l'année en cours via l'index, les années closes peuvent être archivées
+# (database/archive.py). L'année des frais existants n'étant pas connue, ils
+# sont rattachés à l'année en cours.
+def _migration_008_annee_scolaire(conn):
+    _add_missing_columns(conn, 'frais_scolarite', [('annee_scolaire', 'TEXT')])
+    conn.execute('UPDATE frais_scolarite SET annee_scolaire = ? WHERE annee_scolaire IS NULL',
+                 (current_school_year(),))
+    conn.execute(
+        'CREATE INDEX IF NOT EXISTS idx_frais_scolarite_annee ON frais_scolarite(annee_scolaire, student_id)'
+    )
+
+
+# ---------------- Migration 9 : journal des modifications ----------------
+# Chaque insertion, modification ou suppression sur les tables suivies ajoute
+# une ligne à changes (numéro de séquence croissant, jamais réutilisé grâce à
+# AUTOINCREMENT). Une copie (réplique de rapports, portail parents, cache) se
+# synchronise en relisant seulement les lignes modifiées depuis sa dernière
+# séquence (DatabaseManager.changes_since). changes_horizon garde la séquence
+# jusqu'à laquelle le journal a été purgé.
+# {table: (colonne row_id, colonne related_id ou None)}
+CHANGE_TABLES = {
+    'students': ('id', None),
+    'responsables': ('id', None),
+    'student_responsable': ('student_id', 'responsable_id'),
+    'frais_scolarite': ('id', None),
+    'echeancier': ('id', None),
+}
+
+
+def _change_sql(table, row, operation, where=''):
+    key, related = CHANGE_TABLES[table]
+    related = f'{row}.{related}' if related else 'NULL'
+    return f'''
+        INSERT INTO changes (table_name, row_id, related_id, operation)
+        SELECT '{table}', {row}.{key}, {related}, '{operation}' {where};
+    '''
+
+
+def create_change_triggers(conn):
+    for table, (key, related) in CHANGE_TABLES.items():
+        for event in ('insert', 'update', 'delete'):
+            conn.execute(f'DROP TRIGGER IF EXISTS changes_{table}_{event}')
+        conn.execute(f'''
+            CREATE TRIGGER changes_{table}_insert AFTER INSERT ON {table} BEGIN
+                {_change_sql(table, 'new', 'INSERT')}
+            END
+        ''')
+        conn.execute(f'''
+            CREATE TRIGGER changes_{table}_delete AFTER DELETE ON {table} BEGIN
+                {_change_sql(table, 'old', 'DELETE')}
+            END
+        ''')
+        # Une clé modifiée équivaut à la suppression de l'ancienne ligne
+        moved = f'old.{key} IS NOT new.{key}' + (f' OR old.{related} IS NOT new.{related}' if related else '')
+        conn.execute(f'''
+            CREATE TRIGGER changes_{table}_update AFTER UPDATE ON {table} BEGIN
+                {_change_sql(table, 'old', 'DELETE', f'WHERE {moved}')}
+                {_change_sql(table, 'new', 'UPDATE')}
+            END
+        ''')
+
+
+def _migration_009_changes(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS changes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            table_name TEXT NOT NULL,
+            row_id INTEGER NOT NULL,
+            related_id INTEGER,
+            operation TEXT NOT NULL CHECK (operation IN ('INSERT', 'UPDATE', 'DELETE'))
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS changes_horizon (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            seq INTEGER NOT NULL
+        )
+    ''')
+    conn.execute('INSERT OR IGNORE INTO changes_horizon (id, seq) VALUES (1, 0)')
+    create_change_triggers(conn)
+
+
+# ---------------- Migration 10 : identifiants jamais réutilisés ----------------
+# Sans AUTOINCREMENT, SQLite réattribue MAX(id) + 1 : un frais, une échéance
+# ou un paiement créé après l'archivage ou la suppression des dernières lignes
+# reprenait l'identifiant d'une ligne archivée. Les trois tables archivées
+# passent en AUTOINCREMENT ; sqlite_sequence garde le plus grand identifiant
+# attribué, que les suppressions ne font jamais baisser (voir aussi
+# database/archive.py, qui l'aligne sur les identifiants archivés).
+SEQUENCE_TABLES = {
+    'frais_scolarite': '''
+        CREATE TABLE frais_scolarite_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            student_id INTEGER,
+            total_annee INTEGER,
+            bourse_pourcentage REAL,
+            bourse_montant INTEGER,
+            frais_inscription INTEGER,
+            mode_paiement TEXT,
+            annee_scolaire TEXT,
+            FOREIGN KEY (student_id) REFERENCES students(id)
+        )
+    ''',
+    'echeancier': '''
+        CREATE TABLE echeancier_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            frais_id INTEGER,
+            mois TEXT,
+            montant INTEGER,
+            paye BOOLEAN,
+            type TEXT,
+            montant_paye INTEGER NOT NULL DEFAULT 0,
+            FOREIGN KEY (frais_id) REFERENCES frais_scolarite(id)
+        )
+    ''',
+    'paiements': '''
+        CREATE TABLE paiements_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            echeance_id INTEGER NOT NULL,
+            montant INTEGER NOT NULL,
+            date_paiement TEXT NOT NULL,
+            methode TEXT,
+            reference TEXT,
+            FOREIGN KEY (echeance_id) REFERENCES echeancier(id)
+        )
+    ''',
+}
+
+
+def _migration_010_identifiants(conn):
+    for trigger in BALANCE_TRIGGERS + PAYMENT_TRIGGERS:
+        conn.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+    for table, ddl in SEQUENCE_TABLES.items():
+        _rebuild_table(conn, table, ddl, {name: name for name in _columns(conn, table)})
+
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_frais_scolarite_student_id ON frais_scolarite(student_id)')
+    conn.execute(
+        'CREATE INDEX IF NOT EXISTS idx_frais_scolarite_annee ON frais_scolarite(annee_scolaire, student_id)'
+    )
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_echeancier_frais_id ON echeancier(frais_id)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_echeancier_impayes ON echeancier(frais_id) WHERE paye = 0')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_paiements_echeance_id ON paiements(echeance_id)')
+    conn.execute(
+        'CREATE INDEX IF NOT EXISTS idx_paiements_reference ON paiements(reference) WHERE reference IS NOT NULL'
+    )
+    create_payment_triggers(conn)
+    create_balance_triggers(conn, PAID_FROM_LEDGER)
+    create_change_triggers(conn)
+
+
+# ---------------- Migration 11 : soldes par année scolaire ----------------
+# Les soldes étaient tenus par (élève ou classe, mois) : le mois de septembre
+# de deux années différentes s'additionnait. L'année scolaire du frais entre
+# dans la clé ; les lectures de soldes se limitent à une année (l'année en
+# cours par défaut, ANY pour toutes).
+SOLDES_PAR_ANNEE = {
+    'soldes_eleves': '''
+        CREATE TABLE soldes_eleves_new (
+            student_id INTEGER NOT NULL,
+            annee_scolaire TEXT NOT NULL,
+            mois TEXT NOT NULL,
+            du INTEGER NOT NULL DEFAULT 0,
+            paye INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (student_id, annee_scolaire, mois)
+        ) WITHOUT ROWID
+    ''',
+    'soldes_classes': '''
+        CREATE TABLE soldes_classes_new (
+            classe_id INTEGER NOT NULL,
+            annee_scolaire TEXT NOT NULL,
+            mois TEXT NOT NULL,
+            du INTEGER NOT NULL DEFAULT 0,
+            paye INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (classe_id, annee_scolaire, mois)
+        ) WITHOUT ROWID
+    ''',
+}
+
+
+def _migration_011_soldes_par_annee(conn):
+    for trigger in BALANCE_TRIGGERS:
+        conn.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+    for table, ddl in SOLDES_PAR_ANNEE.items():
+        _rebuild_table(conn, table, ddl, None)
+    create_balance_triggers(conn, PAID_FROM_LEDGER, by_year=True)
+    rebuild_balance_tables(conn, PAID_FROM_LEDGER, by_year=True)
+
+
+# ---------------- Migration 12 : index de préfixe d'un caractère ----------------
+# Juste après une frappe, le dernier mot tapé n'a souvent qu'une lettre
+# ("ondo c") : sans index de préfixe d'un caractère, "c"* fusionnait les listes
+# de tous les termes en c (dont "com" de chaque email). Les tables FTS sont
+# recréées avec prefix='1 2 3' ; les triggers de synchronisation, posés sur
+# les tables de contenu, sont conservés.
+def _migration_012_fts_prefixe_court(conn):
+    for fts_table, (table, columns) in FTS_TABLES.items():
+        conn.execute(f'DROP TABLE IF EXISTS {fts_table}')
+        _create_fts_table(conn, fts_table, table, columns, prefix='1 2 3')
+
+
+# Liste ordonnée (version, description, fonction). Ne jamais modifier une
+# migration publiée : ajouter une nouvelle entrée à la fin.
+MIGRATIONS = [
+    (1, 'schéma initial', _migration_001_schema_initial),
+    (2, 'index secondaires', _migration_002_index),
+    (3, 'recherche plein texte', _migration_003_fts),
+    (4, 'soldes matérialisés', _migration_004_soldes),
+    (5, 'registre des paiements', _migration_005_paiements),
+    (6, 'montants entiers en FCFA', _migration_006_montants_entiers),
+    (7, 'règles de tarification', _migration_007_tarifs),
+    (8, 'année scolaire des frais', _migration_008_annee_scolaire),
+    (9, 'journal des modifications', _migration_009_changes),
+    (10, 'identifiants jamais réutilisés', _migration_010_identifiants),
+    (11, 'soldes par année scolaire', _migration_011_soldes_par_annee),
+    (12, 'index de préfixe d\'un caractère', _migration_012_fts_prefixe_court),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version(conn):
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def apply_migrations(conn, target=SCHEMA_VERSION):
+    """Applique les migrations en attente et retourne la liste des versions appliquées.
+
+    Sur une base déjà à jour, seule la lecture de PRAGMA user_version est faite.
+    """
+    current = get_schema_version(conn)
+    pending = [m for m in MIGRATIONS if current < m[0] <= target]
+    if not pending:
+        return []
+
+    if conn.in_transaction:
+        conn.commit()
+
+    # Les reconstructions de tables doivent se faire clés étrangères désactivées,
+    # ce PRAGMA n'ayant aucun effet à l'intérieur d'une transaction.
+    foreign_keys = conn.execute('PRAGMA foreign_keys').fetchone()[0]
+    conn.execute('PRAGMA foreign_keys = OFF')
+    applied = []
+    try:
+        for version, description, migration in pending:
+            conn.execute('BEGIN')
+            try:
+                migration(conn)
+                violations = conn.execute('PRAGMA foreign_key_check').fetchall()
+                if foreign_keys and violations:
+                    raise sqlite3.IntegrityError(
+                        f'Migration {version} ({description}) : clés étrangères invalides {violations[:5]}'
+                    )
+                conn.execute(f'PRAGMA user_version = {version}')
+                conn.execute('COMMIT')
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+            applied.append(version)
+    finally:
+        conn.execute(f'PRAGMA foreign_keys = {foreign_keys}')
+    return applied
@@ -0,0 +1,48 @@
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+
+# Montants en unités entières de FCFA (le franc CFA n'a pas de subdivision en
+# usage). Tous les montants stockés et calculés sont des int : les échéances
+# d'un frais somment exactement à son total et les agrégats SQL sont exacts.
+
+
+def to_fcfa(value):
+    # Arrondi au franc le plus proche, demi vers le haut (pas d'arrondi bancaire)
+    if value is None:
+        return None
+    if isinstance(value, int):
+        return value
+    # Une saisie invalide ('150 000', '12.5.3', 'nan') lève ValueError, comme float()
+    try:
+        return int(Decimal(str(value)).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+    except InvalidOperation:
+        raise ValueError(f'montant invalide : {value!r}') from None
+
+
+def percentage_of(total, pourcentage):
+    # pourcentage de total, arrondi au franc (ex. montant d'une bourse)
+    amount = Decimal(int(total)) * Decimal(str(pourcentage)) / 100
+    return int(amount.quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def split_amount(total, parts):
+    """Répartit total en parts entières qui somment exactement à total.
+
+    parts est un nombre de parts égales ou une liste de poids. Méthode du plus
+    fort reste : chaque part reçoit la partie entière de sa quote-part, les
+    francs restants vont aux plus forts restes (à égalité, aux premières parts).
+    """
+    total = int(total)
+    weights = [1] * parts if isinstance(parts, int) else list(parts)
+    if not weights or sum(weights) <= 0:
+        raise ValueError('au moins une part de poids positif est nécessaire')
+    weight_sum = sum(weights)
+    sign = -1 if total < 0 else 1
+    shares = []
+    remainders = []
+    for index, weight in enumerate(weights):
+        share, remainder = divmod(abs(total) * weight, weight_sum)
+        shares.append(share)
+        remainders.append((-remainder, index))
+    for _, index in sorted(remainders)[:abs(total) - sum(shares)]:
+        shares[index] += 1
+    return [sign * share for share in shares]
@@ -0,0 +1,123 @@
+import json
+from collections import defaultdict, deque
+from datetime import date
+
+from database.money import to_fcfa
+
+# Registre des paiements et rapprochement bancaire.
+# Un relevé (itérable de virements) est rapproché en mémoire : les échéances
+# ouvertes des élèves concernés sont chargées en une requête, indexées par
+# élève, puis chaque virement est réparti sur les plus anciennes. Toutes les
+# écritures du relevé partent en un executemany dans une seule transaction ;
+# les triggers du registre mettent à jour echeancier et les soldes.
+
+TRANSFER_FIELDS = ('student_id', 'montant', 'date_paiement', 'methode', 'reference')
+DEFAULT_METHOD = 'virement'
+
+INSERT_PAYMENT = '''
+    INSERT INTO paiements (echeance_id, montant, date_paiement, methode, reference)
+    VALUES (?, ?, ?, ?, ?)
+'''
+
+
+class ReconciliationReport:
+    def __init__(self):
+        self.matched = 0
+        self.allocated = 0
+        # [(index, echeance_id, montant)]
+        self.allocations = []
+        # [(index, montant non affecté)] : virement supérieur au reste dû
+        self.excess = []
+        # [(index, message)] : virement sans échéance ouverte, invalide ou en double
+        self.unmatched = []
+
+    def __repr__(self):
+        return (f'ReconciliationReport(matched={self.matched}, allocations={len(self.allocations)}, '
+                f'excess={len(self.excess)}, unmatched={len(self.unmatched)})')
+
+
+def today():
+    return date.today().isoformat()
+
+
+def _normalize(transfer):
+    # Accepte un tuple dans l'ordre de TRANSFER_FIELDS ou un dictionnaire
+    if isinstance(transfer, dict):
+        values = [transfer.get(field) for field in TRANSFER_FIELDS]
+    else:
+        values = list(transfer) + [None] * (len(TRANSFER_FIELDS) - len(transfer))
+        if len(values) != len(TRANSFER_FIELDS):
+            raise ValueError(f'{len(TRANSFER_FIELDS)} colonnes attendues au plus, {len(transfer)} reçues')
+    student_id, montant, date_paiement, methode, reference = values
+    if student_id is None:
+        raise ValueError('élève non renseigné')
+    montant = to_fcfa(montant)
+    if montant <= 0:
+        raise ValueError(f'montant invalide : {montant}')
+    return int(student_id), montant, date_paiement or today(), methode or DEFAULT_METHOD, reference or None
+
+
+def _open_instalments(db, student_ids):
+    # {student_id: deque([echeance_id, reste dû])}, la plus ancienne en premier
+    index = defaultdict(deque)
+    rows = db._fetchall('reconcile_payments', '''
+        SELECT f.student_id, e.id, e.montant - e.montant_paye
+        FROM echeancier e
+        JOIN frais_scolarite f ON f.id = e.frais_id
+        WHERE e.paye = 0 AND f.student_id IN (SELECT value FROM json_each(?))
+        ORDER BY f.student_id, e.id
+    ''', (json.dumps(sorted(student_ids)),))
+    for student_id, echeance_id, reste in rows:
+        if reste > 0:
+            index[student_id].append([echeance_id, reste])
+    return index
+
+
+def _known_references(db, references):
+    rows = db._fetchall('reconcile_payments', '''
+        SELECT reference FROM paiements
+        WHERE reference IN (SELECT value FROM json_each(?))
+    ''', (json.dumps(sorted(references)),))
+    return {row[0] for row in rows}
+
+
+def reconcile_payments(db, transfers):
+    report = ReconciliationReport()
+    parsed = []
+    for index, transfer in enumerate(transfers):
+        try:
+            parsed.append((index,) + _normalize(transfer))
+        except (ValueError, TypeError) as e:
+            report.unmatched.append((index, str(e)))
+
+    with db.transaction():
+        open_by_student = _open_instalments(db, {p[1] for p in parsed})
+        # Un relevé importé deux fois ne doit pas payer deux fois
+        seen = _known_references(db, {p[5] for p in parsed if p[5] is not None})
+        rows = []
+        for index, student_id, montant, date_paiement, methode, reference in parsed:
+            if reference is not None:
+                if reference in seen:
+                    report.unmatched.append((index, f'référence déjà enregistrée : {reference}'))
+                    continue
+                seen.add(reference)
+            instalments = open_by_student.get(student_id)
+            if not instalments:
+                report.unmatched.append((index, f'aucune échéance ouverte pour l\'élève {student_id}'))
+                continue
+            reste = montant
+            while instalments and reste > 0:
+                instalment = instalments[0]
+                part = min(reste, instalment[1])
+                rows.append((instalment[0], part, date_paiement, methode, reference))
+                report.allocations.append((index, instalment[0], part))
+                instalment[1] -= part
+                reste -= part
+                if instalment[1] == 0:
+                    instalments.popleft()
+            report.matched += 1
+            report.allocated += montant - reste
+            if reste > 0:
+                report.excess.append((index, reste))
+        db._executemany('reconcile_payments', INSERT_PAYMENT, rows)
+    return report
@@ -0,0 +1,126 @@
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from database.profiles import DATABASE_PRAGMAS, DEFERRED_PRAGMAS, apply_pragmas, resolve_profile
+
+# Pool de connexions SQLite partageable entre threads (interface, tâches de fond).
+# Une seule connexion d'écriture, protégée par un verrou réentrant, et jusqu'à
+# N connexions de lecture. En mode WAL les lectures ne bloquent pas l'écriture
+# et inversement : un long rapport peut tourner pendant une saisie. Chaque
+# connexion reçoit les PRAGMA du profil choisi (database/profiles.py).
+
+DEFAULT_READERS = 4
+DEFAULT_BUSY_TIMEOUT = 5000  # ms
+# Requêtes préparées gardées par connexion (128 par défaut dans sqlite3) : les
+# requêtes de DatabaseManager sont des textes constants, réutilisés à chaque appel
+DEFAULT_CACHED_STATEMENTS = 256
+
+
+class ConnectionPool:
+    def __init__(self, db_name, readers=DEFAULT_READERS, busy_timeout=DEFAULT_BUSY_TIMEOUT, profile=None,
+                 cached_statements=DEFAULT_CACHED_STATEMENTS):
+        self.db_name = db_name
+        self.busy_timeout = busy_timeout
+        self.cached_statements = cached_statements
+        # Profil de connexion (voir database/profiles.py)
+        self.profile = resolve_profile(profile)
+        # Une base en mémoire n'est visible que par sa propre connexion
+        self.max_readers = 0 if db_name == ':memory:' else readers
+        self.writer_lock = threading.RLock()
+        self.writer = self._connect()
+        apply_pragmas(self.writer, self.profile, include=DATABASE_PRAGMAS)
+        self._readers = queue.LifoQueue()
+        self._all_readers = []
+        self._readers_lock = threading.Lock()
+        # Threads détenant la connexion d'écriture (transaction en cours) : leurs
+        # lectures doivent voir leurs propres écritures non validées
+        self._local = threading.local()
+        self._closed = False
+
+    def _connect(self, read_only=False):
+        conn = sqlite3.connect(
+            self.db_name,
+            timeout=self.busy_timeout / 1000,
+            check_same_thread=False,
+            cached_statements=self.cached_statements,
+            # Les lecteurs ne gardent pas de transaction ouverte entre deux requêtes
+            isolation_level=None if read_only else '',
+        )
+        conn.execute(f'PRAGMA busy_timeout = {int(self.busy_timeout)}')
+        apply_pragmas(conn, self.profile, exclude=DATABASE_PRAGMAS + DEFERRED_PRAGMAS)
+        if read_only:
+            conn.execute('PRAGMA query_only = ON')
+        return conn
+
+    def apply_deferred_pragmas(self):
+        # PRAGMA à poser une fois le schéma à jour (query_only du profil reporting)
+        with self.write() as conn:
+            apply_pragmas(conn, self.profile, include=DEFERRED_PRAGMAS)
+
+    # ---------------- Écriture ----------------
+    @contextmanager
+    def write(self):
+        with self.writer_lock:
+            yield self.writer
+
+    def pin_writer(self):
+        # Réserve la connexion d'écriture au thread courant (début de transaction)
+        self.writer_lock.acquire()
+        self._local.pinned = getattr(self._local, 'pinned', 0) + 1
+
+    def unpin_writer(self):
+        self._local.pinned -= 1
+        self.writer_lock.release()
+
+    def holds_writer(self):
+        return getattr(self._local, 'pinned', 0) > 0
+
+    # ---------------- Lecture ----------------
+    def _acquire_reader(self):
+        try:
+            return self._readers.get_nowait()
+        except queue.Empty:
+            pass
+        with self._readers_lock:
+            if len(self._all_readers) < self.max_readers:
+                conn = self._connect(read_only=True)
+                self._all_readers.append(conn)
+                return conn
+        try:
+            return self._readers.get(timeout=self.busy_timeout / 1000)
+        except queue.Empty:
+            raise sqlite3.OperationalError(
+                f'Aucune connexion de lecture disponible après {self.busy_timeout} ms'
+            ) from None
+
+    @contextmanager
+    def read(self):
+        # Dans une transaction, ou sans lecteur possible, on lit sur l'écrivain
+        if self.holds_writer() or self.max_readers == 0:
+            with self.write() as conn:
+                yield conn
+            return
+        conn = self._acquire_reader()
+        try:
+            yield conn
+        finally:
+            self._readers.put(conn)
+
+    def interrupt(self):
+        # Interrompt les requêtes en cours sur toutes les connexions (elles
+        # échouent avec sqlite3.OperationalError: interrupted)
+        self.writer.interrupt()
+        with self._readers_lock:
+            for conn in self._all_readers:
+                conn.interrupt()
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        for conn in self._all_readers:
+            conn.close()
+        self._all_readers = []
+        self.writer.close()
@@ -0,0 +1,63 @@
+# Profils de connexion SQLite appliqués à l'ouverture de chaque connexion.
+#
+#   interactive : usage courant de l'application (WAL, synchronous NORMAL)
+#   bulk_import : imports et générations en masse ; synchronous OFF et grand
+#                 cache, une coupure de courant peut perdre le dernier import
+#   reporting   : rapports en lecture seule, grand cache et mmap
+#
+# cache_size négatif = taille en Kio ; mmap_size en octets.
+
+PROFILES = {
+    'interactive': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -16000,
+        'mmap_size': 64 * 1024 * 1024,
+        'temp_store': 'MEMORY',
+        'foreign_keys': 'ON',
+    },
+    'bulk_import': {
+        'journal_mode': 'WAL',
+        'synchronous': 'OFF',
+        'cache_size': -128000,
+        'mmap_size': 256 * 1024 * 1024,
+        'temp_store': 'MEMORY',
+        'foreign_keys': 'ON',
+    },
+    'reporting': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -64000,
+        'mmap_size': 256 * 1024 * 1024,
+        'temp_store': 'MEMORY',
+        'foreign_keys': 'ON',
+        'query_only': 'ON',
+    },
+}
+
+DEFAULT_PROFILE = 'interactive'
+
+# journal_mode est persistant et s'applique à la base : réglé une seule fois
+# sur la connexion d'écriture. query_only est posé après les migrations.
+DATABASE_PRAGMAS = ('journal_mode',)
+DEFERRED_PRAGMAS = ('query_only',)
+
+
+def resolve_profile(profile=None, **overrides):
+    # Accepte un nom de profil ou un dictionnaire de PRAGMA, complété par overrides
+    if profile is None:
+        profile = DEFAULT_PROFILE
+    if isinstance(profile, str):
+        if profile not in PROFILES:
+            raise ValueError(f'Profil de connexion inconnu : {profile} ({", ".join(PROFILES)})')
+        profile = PROFILES[profile]
+    resolved = dict(profile)
+    resolved.update(overrides)
+    return resolved
+
+
+def apply_pragmas(conn, profile, include=None, exclude=()):
+    for name, value in profile.items():
+        if name in exclude or (include is not None and name not in include):
+            continue
+        conn.execute(f'PRAGMA {name} = {value}')
@@ -0,0 +1,42 @@
+from collections import namedtuple
+from functools import lru_cache
+
+# Types des lignes retournées par DatabaseManager.
+# Ce sont des namedtuple : même empreinte mémoire qu'un tuple (pas de
+# __dict__, les noms de colonnes sont portés par la classe), comparaison et
+# indexation par position inchangées pour le code existant, et accès par nom
+# (student.nationalite plutôt que student[4]). Les champs suivent l'ordre des
+# colonnes de la table (SELECT *) ; tests/test_rows.py vérifie qu'ils
+# correspondent au schéma après migrations.
+#
+# benchmarks/row_memory.py mesure le coût par ligne face aux tuples, à
+# sqlite3.Row et aux dictionnaires.
+
+Student = namedtuple('Student', 'id nom prenom date_naissance nationalite sexe statut classe_id')
+Responsable = namedtuple('Responsable', 'id type nom prenom tel1 tel2 email')
+Frais = namedtuple('Frais', 'id student_id total_annee bourse_pourcentage bourse_montant frais_inscription '
+                           'mode_paiement annee_scolaire')
+Echeance = namedtuple('Echeance', 'id frais_id mois montant paye type montant_paye')
+Classe = namedtuple('Classe', 'id nom enseignant_id')
+Enseignant = namedtuple('Enseignant', 'id nom prenom email tel date_entree contrat id_gabonais')
+Change = namedtuple('Change', 'seq table_name row_id related_id operation')
+
+# {table: type de ligne}
+ROW_TYPES = {
+    'students': Student,
+    'responsables': Responsable,
+    'frais_scolarite': Frais,
+    'echeancier': Echeance,
+    'classes': Classe,
+    'enseignants': Enseignant,
+    'changes': Change,
+}
+
+
+@lru_cache(maxsize=None)
+def row_factory(row_type):
+    # Fabrique pour Cursor.row_factory : la ligne est construite directement
+    # depuis le tuple lu par sqlite3, sans passer par sqlite3.Row ni par un
+    # dictionnaire. _make vérifie le nombre de colonnes.
+    make = row_type._make
+    return lambda cursor, row: make(row)
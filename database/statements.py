@@ -0,0 +1,93 @@
+import logging
+import threading
+import time
+from collections import deque
+
+# Registre des requêtes nommées et mesure de leur coût.
+# Chaque requête passée par les méthodes d'exécution de DatabaseManager est
+# nommée à l'appel (la méthode publique qui la lance) : le registre garde
+# le texte SQL associé et, par nom, le nombre d'appels, les lignes retournées
+# ou modifiées et les dernières durées pour estimer p50 / p95. Une requête
+# plus lente que slow_query_ms est journalisée sur le logger
+# "database.statements".
+
+logger = logging.getLogger('database.statements')
+
+# Durées conservées par requête pour le calcul des percentiles
+DEFAULT_SAMPLES = 1000
+
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class _Stats:
+    __slots__ = ('count', 'rows', 'total', 'max', 'samples')
+
+    def __init__(self, samples):
+        self.count = 0
+        self.rows = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples = deque(maxlen=samples)
+
+
+class StatementRegistry:
+    def __init__(self, slow_query_ms=None, samples=DEFAULT_SAMPLES):
+        self.slow_query_ms = slow_query_ms
+        self._samples = samples
+        self._lock = threading.Lock()
+        # {nom: {texte SQL}}
+        self._sql = {}
+        # {nom: _Stats}
+        self._stats = {}
+
+    def record(self, name, sql, elapsed, rows=0):
+        # elapsed en secondes
+        with self._lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                stats = self._stats[name] = _Stats(self._samples)
+                self._sql[name] = set()
+            self._sql[name].add(sql)
+            stats.count += 1
+            stats.rows += max(rows, 0)
+            stats.total += elapsed
+            stats.max = max(stats.max, elapsed)
+            stats.samples.append(elapsed)
+        if self.slow_query_ms is not None and elapsed * 1000 >= self.slow_query_ms:
+            logger.warning('Requête lente %s : %.1f ms\n%s', name, elapsed * 1000, ' '.join(sql.split()))
+
+    def statements(self):
+        with self._lock:
+            return {name: sorted(sqls) for name, sqls in self._sql.items()}
+
+    def stats(self):
+        # {nom: {count, rows, total_ms, p50_ms, p95_ms, max_ms}}, le plus coûteux en premier
+        with self._lock:
+            snapshot = {name: (s.count, s.rows, s.total, s.max, sorted(s.samples))
+                        for name, s in self._stats.items()}
+        result = {}
+        for name, (count, rows, total, maximum, samples) in sorted(
+                snapshot.items(), key=lambda item: item[1][2], reverse=True):
+            result[name] = {
+                'count': count,
+                'rows': rows,
+                'total_ms': total * 1000,
+                'p50_ms': _percentile(samples, 0.50) * 1000,
+                'p95_ms': _percentile(samples, 0.95) * 1000,
+                'max_ms': maximum * 1000,
+            }
+        return result
+
+    def reset(self):
+        with self._lock:
+            self._sql.clear()
+            self._stats.clear()
+
+
+def clock():
+    return time.perf_counter()
@@ -0,0 +1,118 @@
+import os
+import sqlite3
+import unittest
+from benchmarks.datagen import generate
+from database.db_manager import DatabaseManager
+from database.fee_rules import ANY, current_school_year
+
+
+def _year(offset):
+    start = int(current_school_year()[:4]) + offset
+    return f'{start}-{start + 1}'
+
+
+class TestArchive(unittest.TestCase):
+    def setUp(self):
+        self.db_manager = DatabaseManager('test_archive.db')
+        generate(self.db_manager, students=60, years=3, seed=11)
+
+    def tearDown(self):
+        self.db_manager.__del__()
+        for name in ('test_archive.db', 'test_archive_archive.db'):
+            for suffix in ('', '-wal', '-shm'):
+                if os.path.exists(name + suffix):
+                    os.remove(name + suffix)
+
+    def count(self, table, annee):
+        return self.db_manager.conn.execute('''
+            SELECT COUNT(*) FROM frais_scolarite f WHERE f.annee_scolaire = ?
+        ''' if table == 'frais_scolarite' else '''
+            SELECT COUNT(*) FROM frais_scolarite f JOIN echeancier e ON e.frais_id = f.id
+            WHERE f.annee_scolaire = ?
+        ''', (annee,)).fetchone()[0]
+
+    def test_fees_carry_their_school_year(self):
+        for offset in (-2, -1, 0):
+            self.assertEqual(self.count('frais_scolarite', _year(offset)), 60)
+        # Années passées soldées : seuls les impayés de l'année en cours sont listés
+        self.assertEqual(self.db_manager.get_unpaid_fees(_year(-1)), [])
+        self.assertEqual(sorted(self.db_manager.get_unpaid_fees()), sorted(self.db_manager.get_unpaid_fees(ANY)))
+
+    def test_archive_year_moves_rows(self):
+        history = self.db_manager.get_student_history(1)
+        balance = self.db_manager.get_student_balance(1, annee_scolaire=ANY)
+        echeances = self.count('echeancier', _year(-2))
+
+        moved = self.db_manager.archive_year(_year(-2))
+        self.assertEqual(moved['frais_scolarite'], 60)
+        self.assertEqual(moved['echeancier'], echeances)
+        self.assertGreater(moved['paiements'], 0)
+        self.assertEqual(self.count('frais_scolarite', _year(-2)), 0)
+        self.assertEqual(self.db_manager.get_archived_years(), [_year(-2)])
+
+        # L'historique reste lisible, les soldes ne portent plus que la base principale
+        self.assertEqual(self.db_manager.get_student_history(1), history)
+        archived = sum(e[4] for e in history if e[0] == _year(-2))
+        self.assertEqual(self.db_manager.get_student_balance(1, annee_scolaire=ANY)[0], balance[0] - archived)
+        self.assertEqual(self.db_manager.get_student_balance(1, annee_scolaire=_year(-2)), (0, 0, 0))
+        self.assertEqual(self.db_manager.rebuild_balances(), [])
+
+        # Le registre des paiements est de nouveau en ajout seul
+        with self.assertRaises(Exception):
+            self.db_manager.conn.execute('DELETE FROM paiements')
+        self.db_manager.conn.rollback()
+
+        # Relancer l'archivage d'une année déjà archivée ne déplace plus rien
+        self.assertEqual(self.db_manager.archive_year(_year(-2))['frais_scolarite'], 0)
+
+    def test_archived_ids_are_never_reused(self):
+        # Frais ajouté après coup à une année close : il porte le plus grand id
+        late_id = self.db_manager.add_frais_scolarite(1, 'standard', annee_scolaire=_year(-2))
+        self.db_manager.archive_year(_year(-2), force=True)
+        # Les frais suivants ne reprennent pas l'id archivé
+        frais_id = self.db_manager.add_frais_scolarite(2, 'standard', annee_scolaire=_year(-1))
+        self.assertEqual(frais_id, late_id + 1)
+        self.assertEqual(self.db_manager.generate_fees_for_year([3], annee_scolaire=_year(-2)), {3: frais_id + 1})
+
+        # Deux archivages successifs : aucune ligne archivée n'est écrasée
+        self.assertEqual(self.db_manager.archive_year(_year(-1), force=True)['frais_scolarite'], 61)
+        self.assertEqual(self.db_manager.archive_year(_year(-2), force=True)['frais_scolarite'], 1)
+        for student_id, annee, expected in ((1, _year(-2), late_id), (2, _year(-1), frais_id),
+                                            (3, _year(-2), frais_id + 1)):
+            history = self.db_manager.get_student_history(student_id)
+            self.assertIn(expected, {e[2] for e in history if e[0] == annee})
+        self.assertEqual(len({e[2] for e in self.db_manager.get_student_history(1) if e[0] == _year(-2)}), 2)
+        self.assertEqual(self.db_manager.rebuild_balances(), [])
+
+    def test_archive_collision_is_refused(self):
+        self.db_manager.archive_year(_year(-2))
+        archived_id = self.db_manager.conn.execute(
+            'SELECT MIN(id) FROM frais_scolarite WHERE annee_scolaire = ?', (_year(-1),)
+        ).fetchone()[0] - 1
+        # Identifiant réutilisé par une base antérieure à la migration 10
+        self.db_manager.conn.execute('''
+            INSERT INTO frais_scolarite (id, student_id, total_annee, annee_scolaire) VALUES (?, 1, 0, ?)
+        ''', (archived_id, _year(-1)))
+        self.db_manager.conn.commit()
+        with self.assertRaises(sqlite3.IntegrityError):
+            self.db_manager.archive_year(_year(-1))
+        self.assertEqual(self.count('frais_scolarite', _year(-1)), 61)
+        self.assertEqual(self.db_manager.get_archived_years(), [_year(-2)])
+
+    def test_open_or_unpaid_years_are_refused(self):
+        with self.assertRaises(ValueError):
+            self.db_manager.archive_year(current_school_year())
+        echeance_id = self.db_manager.conn.execute('''
+            SELECT e.id FROM echeancier e JOIN frais_scolarite f ON f.id = e.frais_id
+            WHERE f.annee_scolaire = ? AND e.paye = 1 AND e.montant > 0 LIMIT 1
+        ''', (_year(-1),)).fetchone()[0]
+        self.db_manager.conn.execute('UPDATE echeancier SET paye = 0 WHERE id = ?', (echeance_id,))
+        self.db_manager.conn.commit()
+        with self.assertRaises(ValueError):
+            self.db_manager.archive_year(_year(-1))
+        self.assertEqual(self.count('frais_scolarite', _year(-1)), 60)
+        self.assertEqual(self.db_manager.archive_year(_year(-1), force=True)['frais_scolarite'], 60)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import asyncio
+import unittest
+import os
+from database.async_manager import AsyncDatabaseManager
+
+# Requête sans fin, arrêtée seulement par une interruption
+ENDLESS = 'WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c) SELECT MAX(x) FROM c'
+
+
+class TestAsyncDatabaseManager(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.db = await AsyncDatabaseManager.open('test_async.db', seed=True)
+
+    async def asyncTearDown(self):
+        await self.db.close()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists('test_async.db' + suffix):
+                os.remove('test_async.db' + suffix)
+
+    async def test_mirrors_public_methods(self):
+        student_id = await self.db.add_student(('Doe', 'John', '2015-01-01', 'Gabonaise', 'M', 'Inscription', 1))
+        self.assertEqual((await self.db.get_student(student_id))[2], 'John')
+        self.assertEqual(await self.db.get_student_count(), 6)
+        self.assertEqual(self.db.get_unpaid_fees.__name__, 'get_unpaid_fees')
+
+    async def test_identical_reads_are_coalesced(self):
+        self.db.db.reset_query_stats()
+        first, second, other = await asyncio.gather(
+            self.db.get_unpaid_fees(), self.db.get_unpaid_fees(), self.db.get_student(1))
+        self.assertEqual(first, second)
+        stats = self.db.db.query_stats()
+        self.assertEqual(stats['get_unpaid_fees']['count'], 1)
+        self.assertEqual(stats['get_student']['count'], 1)
+
+    async def test_timeout_interrupts_running_query(self):
+        with self.assertRaises(asyncio.TimeoutError):
+            await self.db.run(lambda db: db.conn.execute(ENDLESS).fetchone(), timeout=0.2)
+        # Le thread dédié est de nouveau libre
+        self.assertEqual(await self.db.get_student_count(timeout=2), 5)
+
+    async def test_cancelled_call_leaves_the_queue(self):
+        slow = asyncio.ensure_future(self.db.run(lambda db: db.conn.execute(ENDLESS).fetchone()))
+        await asyncio.sleep(0.05)
+        queued = asyncio.ensure_future(self.db.add_class(('CM2', None)))
+        await asyncio.sleep(0.05)
+        queued.cancel()
+        slow.cancel()
+        for task in (queued, slow):
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+        self.assertEqual(len(await self.db.get_all_classes()), 3)
+
+    async def test_async_iteration(self):
+        rows = [row async for row in self.db.iter_students(batch_size=2)]
+        self.assertEqual(rows, await self.db.get_students())
+
+
+if __name__ == '__main__':
+    unittest.main()
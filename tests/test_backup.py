@@ -0,0 +1,115 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import unittest
+from datetime import datetime
+from benchmarks.datagen import generate
+from database.backup import BackupScheduler, prune_snapshots
+from database.db_manager import DatabaseManager
+
+
+class TestBackup(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.db_name = os.path.join(self.directory.name, 'ecole.db')
+        self.db_manager = DatabaseManager(self.db_name)
+        generate(self.db_manager, students=200, years=1, seed=3)
+
+    def tearDown(self):
+        self.db_manager.__del__()
+        self.directory.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.directory.name, name)
+
+    def test_backup_is_a_consistent_copy_while_writing(self):
+        students = self.db_manager.get_student_count()
+        progress = []
+        stop = threading.Event()
+
+        def writer():
+            while not stop.is_set():
+                self.db_manager.add_student(('Doe', 'John', '2015-01-01', 'Gabonaise', 'M', 'Inscription', None))
+
+        thread = threading.Thread(target=writer)
+        thread.start()
+        try:
+            self.db_manager.backup(self.path('copie.db'), pages_per_step=5,
+                                   progress_cb=lambda status, remaining, total: progress.append(remaining))
+        finally:
+            stop.set()
+            thread.join()
+
+        self.assertGreater(len(progress), 1)
+        self.assertEqual(progress[-1], 0)
+        # Aucune reprise depuis le début : le reste à copier ne fait que décroître
+        self.assertEqual(progress, sorted(progress, reverse=True))
+        self.assertEqual(self.db_manager.check_integrity(self.path('copie.db')), [])
+        copy = DatabaseManager(self.path('copie.db'))
+        try:
+            self.assertGreaterEqual(copy.get_student_count(), students)
+            self.assertEqual(copy.rebuild_balances(), [])
+        finally:
+            copy.close()
+
+    def test_backup_pauses_between_steps(self):
+        progress = []
+        start = time.perf_counter()
+        self.db_manager.backup(self.path('copie.db'), pages_per_step=5, sleep=0.01,
+                               progress_cb=lambda status, remaining, total: progress.append(remaining))
+        elapsed = time.perf_counter() - start
+        self.assertGreater(len(progress), 5)
+        # Une pause après chaque paquet sauf le dernier
+        self.assertGreaterEqual(elapsed, (len(progress) - 1) * 0.01)
+
+    def test_snapshot_and_restore(self):
+        snapshot = self.db_manager.snapshot(self.path('sauvegardes'))
+        self.assertTrue(snapshot.endswith('.db.gz'))
+        self.assertEqual(self.db_manager.check_integrity(snapshot), [])
+
+        students = self.db_manager.get_students()
+        classes = self.db_manager.get_all_classes()
+        seq = self.db_manager.get_change_seq()
+        self.db_manager.add_class(('Nouvelle', None))
+        self.db_manager.add_student(('Doe', 'John', '2015-01-01', 'Gabonaise', 'M', 'Inscription', None))
+
+        self.db_manager.restore(snapshot)
+        self.assertEqual(self.db_manager.get_students(), students)
+        # Le cache des classes a été vidé
+        self.assertEqual(self.db_manager.get_all_classes(), classes)
+        self.assertEqual(self.db_manager.check_integrity(), [])
+        self.assertEqual(self.db_manager.conn.execute('PRAGMA journal_mode').fetchone()[0], 'wal')
+        # Les copies synchronisées doivent se recharger
+        with self.assertRaises(ValueError):
+            self.db_manager.changes_since(seq)
+        self.assertGreater(self.db_manager.get_change_seq(), seq)
+
+    def test_corrupt_backup_is_refused(self):
+        with open(self.path('corrompue.db'), 'wb') as f:
+            f.write(b'SQLite format 3\x00' + b'\xff' * 4096)
+        self.assertNotEqual(self.db_manager.check_integrity(self.path('corrompue.db')), [])
+        with self.assertRaises(sqlite3.DatabaseError):
+            self.db_manager.restore(self.path('corrompue.db'))
+        self.assertEqual(self.db_manager.get_student_count(), 200)
+
+    def test_scheduler_runs_during_school_hours_only(self):
+        directory = self.path('sauvegardes')
+        now = [datetime(2024, 10, 14, 20, 0)]
+        scheduler = BackupScheduler(self.db_manager, directory, keep=2, clock=lambda: now[0])
+        self.assertIsNone(scheduler.run_once())
+        now[0] = datetime(2024, 10, 14, 10, 0)
+        self.assertTrue(os.path.exists(scheduler.run_once()))
+
+        os.makedirs(directory, exist_ok=True)
+        for stamp in ('20240101-080000', '20240102-080000'):
+            open(os.path.join(directory, f'ecole-{stamp}.db.gz'), 'wb').close()
+        open(os.path.join(directory, 'autre.db'), 'wb').close()
+        removed = prune_snapshots(self.db_manager, directory, keep=2)
+        self.assertEqual([os.path.basename(p) for p in removed], ['ecole-20240101-080000.db.gz'])
+        self.assertTrue(os.path.exists(os.path.join(directory, 'autre.db')))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+import os
+from database.db_manager import DatabaseManager
+
+
+class TestBulkImport(unittest.TestCase):
+    def setUp(self):
+        self.db_manager = DatabaseManager('test_bulk_import.db')
+
+    def tearDown(self):
+        self.db_manager.__del__()
+        os.remove('test_bulk_import.db')
+
+    def test_import_students_in_chunks(self):
+        records = ((f'Nom{i}', f'Prenom{i}', '2015-01-01', 'Gabonaise', 'M', 'Inscription', None) for i in range(25))
+        report = self.db_manager.bulk_import_students(records, chunk_size=10)
+        self.assertEqual(report.inserted, 25)
+        self.assertEqual(report.errors, [])
+        self.assertEqual(self.db_manager.get_student_count(), 25)
+        self.assertEqual(self.db_manager.get_student(report.ids[24])[1], 'Nom24')
+
+    def test_invalid_rows_are_reported_without_aborting(self):
+        records = [
+            {'nom': 'Doe', 'prenom': 'John', 'date_naissance': '2015-01-01'},
+            {'nom': '', 'prenom': 'Sans nom'},
+            ('Trop', 'Court'),
+            {'nom': 'Doe', 'prenom': 'Jane', 'date_naissance': '2016-01-01'},
+        ]
+        report = self.db_manager.bulk_import_students(records)
+        self.assertEqual(report.inserted, 2)
+        self.assertEqual([index for index, _ in report.errors], [1, 2])
+
+    def test_import_responsables_links_by_natural_key(self):
+        self.db_manager.bulk_import_students([
+            ('Durand', 'Paul', '2017-05-15', 'Française', 'M', 'Inscription', None),
+            ('Durand', 'Léa', '2019-02-01', 'Française', 'F', 'Inscription', None),
+        ])
+        report = self.db_manager.bulk_import_responsables([
+            {'type': 'Père', 'nom': 'Durand', 'prenom': 'Pierre', 'tel1': '0101010101',
+             'email': 'pierre.durand@example.com',
+             'students': [('durand', 'paul', '2017-05-15'), ('Durand', 'Léa', '2019-02-01')]},
+            {'type': 'Mère', 'nom': 'Durand', 'prenom': 'Marie', 'tel1': '0303030303',
+             'email': 'marie.durand@example.com', 'students': [('Inconnu', 'X', '2000-01-01')]},
+        ])
+        self.assertEqual(report.inserted, 2)
+        self.assertEqual(report.linked, 2)
+        self.assertEqual(len(report.errors), 1)
+        self.assertEqual(len(self.db_manager.get_student_responsables(1)), 1)
+
+        report = self.db_manager.bulk_link_student_responsable([
+            (('Durand', 'Paul', '2017-05-15'), 'MARIE.DURAND@example.com'),
+            (('Durand', 'Paul', '2017-05-15'), 'absent@example.com'),
+        ])
+        self.assertEqual(report.linked, 1)
+        self.assertEqual(len(report.errors), 1)
+        self.assertEqual(len(self.db_manager.get_student_responsables(1)), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
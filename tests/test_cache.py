@@ -0,0 +1,76 @@
+import unittest
+import os
+from database.cache import ReferenceCache
+from database.db_manager import DatabaseManager
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestReferenceCache(unittest.TestCase):
+    def test_lru_eviction_and_ttl(self):
+        clock = FakeClock()
+        cache = ReferenceCache(maxsize=2, ttl=10, clock=clock)
+        loads = []
+
+        def loader(value):
+            return lambda: loads.append(value) or value
+
+        self.assertEqual(cache.get_or_load('a', loader('a')), 'a')
+        self.assertEqual(cache.get_or_load('b', loader('b')), 'b')
+        self.assertEqual(cache.get_or_load('a', loader('a')), 'a')
+        cache.get_or_load('c', loader('c'))  # évince "b", le moins récemment utilisé
+        cache.get_or_load('b', loader('b'))
+        self.assertEqual(loads, ['a', 'b', 'c', 'b'])
+
+        clock.now = 11
+        cache.get_or_load('b', loader('b'))
+        self.assertEqual(loads, ['a', 'b', 'c', 'b', 'b'])
+        self.assertEqual(cache.stats(), {'hits': 1, 'misses': 5, 'evictions': 2, 'size': 2})
+
+
+class TestDatabaseManagerCache(unittest.TestCase):
+    def setUp(self):
+        self.db_manager = DatabaseManager('test_cache.db', seed=True)
+
+    def tearDown(self):
+        self.db_manager.__del__()
+        os.remove('test_cache.db')
+
+    def test_reference_reads_hit_cache(self):
+        self.db_manager.add_school_info(('École', '0100', 'ecole@example.com', 'Directeur', b'signature'))
+        for _ in range(3):
+            self.assertEqual(self.db_manager.get_school_info()[-1], b'signature')
+            self.db_manager.get_class(1)
+            self.db_manager.get_class_teacher(1)
+            self.db_manager.get_all_classes_names()
+        stats = self.db_manager.cache_stats()
+        self.assertEqual(stats['misses'], 4)
+        self.assertEqual(stats['hits'], 8)
+
+    def test_writes_invalidate_cache(self):
+        self.assertEqual(self.db_manager.get_class(1)[1], 'CP')
+        self.db_manager.update_class(1, ('CP-A', 1))
+        self.assertEqual(self.db_manager.get_class(1)[1], 'CP-A')
+        self.assertEqual(self.db_manager.get_class_teacher(1)[1], 'Dupont')
+        self.db_manager.update_teacher(1, ('Durand', 'Jean', 'jean.durand@example.com', '0102030405'))
+        self.assertEqual(self.db_manager.get_class_teacher(1)[1], 'Durand')
+        names = self.db_manager.get_all_classes_names()
+        self.db_manager.add_class(('CM1', None))
+        self.assertEqual(len(self.db_manager.get_all_classes_names()), len(names) + 1)
+
+    def test_transaction_invalidates_on_commit(self):
+        self.db_manager.get_class(1)
+        with self.db_manager.transaction():
+            self.db_manager.update_class(1, ('CP-B', 1))
+            self.assertEqual(self.db_manager.get_class(1)[1], 'CP-B')
+        self.assertEqual(self.db_manager.get_class(1)[1], 'CP-B')
+
+
+if __name__ == '__main__':
+    unittest.main()
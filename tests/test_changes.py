@@ -0,0 +1,79 @@
+import unittest
+from database.db_manager import DatabaseManager
+
+
+class TestChanges(unittest.TestCase):
+    def setUp(self):
+        self.db_manager = DatabaseManager(':memory:', seed=True)
+        self.start = self.db_manager.get_change_seq()
+
+    def tearDown(self):
+        self.db_manager.close()
+
+    def operations(self, seq=None):
+        changes = self.db_manager.changes_since(self.start if seq is None else seq)
+        return [(c.table_name, c.row_id, c.related_id, c.operation) for c in changes]
+
+    def test_writes_are_logged_in_order(self):
+        student_id = self.db_manager.add_student(('Doe', 'John', '2015-01-01', 'Gabonaise', 'M', 'Inscription', 1))
+        self.db_manager.link_student_responsable(student_id, 1)
+        self.db_manager.update_student(student_id, ('Doe', 'Jack', '2015-01-01', 'Gabonaise', 'M', 'Inscription', 1))
+        self.db_manager.unlink_student_responsable(student_id, 1)
+        self.assertEqual(self.operations(), [
+            ('students', student_id, None, 'INSERT'),
+            ('student_responsable', student_id, 1, 'INSERT'),
+            ('students', student_id, None, 'UPDATE'),
+            ('student_responsable', student_id, 1, 'DELETE'),
+        ])
+        seqs = [c.seq for c in self.db_manager.changes_since(self.start)]
+        self.assertEqual(seqs, sorted(seqs))
+        self.assertEqual(self.db_manager.get_change_seq(), seqs[-1])
+        self.assertEqual(len(self.db_manager.changes_since(self.start, limit=2)), 2)
+        self.assertEqual(self.db_manager.changes_since(seqs[-1]), [])
+
+    def test_payments_log_instalment_updates(self):
+        frais_id = self.db_manager.add_frais_scolarite(1, 'standard')
+        echeance_id = self.db_manager.get_echeances_by_student_id(1)[0].id
+        seq = self.db_manager.get_change_seq()
+        self.db_manager.record_payment(echeance_id, 1000)
+        self.assertEqual(self.operations(seq), [('echeancier', echeance_id, None, 'UPDATE')])
+        self.assertIn(('frais_scolarite', frais_id, None, 'INSERT'), self.operations())
+
+    def test_rolled_back_writes_are_not_logged(self):
+        with self.assertRaises(RuntimeError):
+            with self.db_manager.transaction():
+                self.db_manager.add_student(('Doe', 'John', '2015-01-01', 'Gabonaise', 'M', 'Inscription', 1))
+                raise RuntimeError
+        self.assertEqual(self.operations(), [])
+
+    def test_compaction(self):
+        student_id = self.db_manager.add_student(('Doe', 'John', '2015-01-01', 'Gabonaise', 'M', 'Inscription', 1))
+        for prenom in ('Jack', 'Jim', 'Joe'):
+            self.db_manager.update_student(student_id, ('Doe', prenom, '2015-01-01', 'Gabonaise', 'M', 'Inscription', 1))
+        last = self.db_manager.get_change_seq()
+
+        result = self.db_manager.compact_changes()
+        self.assertGreaterEqual(result['collapsed'], 3)
+        self.assertEqual(self.operations(), [('students', student_id, None, 'UPDATE')])
+        self.assertEqual(self.db_manager.changes_since(self.start)[0].seq, last)
+
+        self.db_manager.compact_changes(before_seq=last)
+        self.assertEqual(self.db_manager.changes_since(last), [])
+        with self.assertRaises(ValueError):
+            self.db_manager.changes_since(self.start)
+        # Les séquences ne sont jamais réutilisées après une purge
+        self.db_manager.delete_student(student_id)
+        self.assertGreater(self.db_manager.get_change_seq(), last)
+
+    def test_compaction_horizon_is_capped_at_current_seq(self):
+        self.db_manager.add_student(('Doe', 'John', '2015-01-01', 'Gabonaise', 'M', 'Inscription', 1))
+        last = self.db_manager.get_change_seq()
+        self.db_manager.compact_changes(before_seq=last + 100)
+        # Une copie qui vient de se recharger complètement peut reprendre
+        self.assertEqual(self.db_manager.changes_since(last), [])
+        student_id = self.db_manager.add_student(('Doe', 'Jane', '2015-01-01', 'Gabonaise', 'F', 'Inscription', 1))
+        self.assertEqual([c.row_id for c in self.db_manager.changes_since(last)], [student_id])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,11 +1,15 @@
 import unittest
 import os
+import sqlite3
 from database.db_manager import DatabaseManager
+from database.fee_rules import ANY, current_school_year
+from database.migrations import SCHEMA_VERSION
 
 class TestDatabaseManager(unittest.TestCase):
     def setUp(self):
-        # Utiliser une base de données de test
-        self.db_manager = DatabaseManager('test_ecole.db')
+        # Utiliser une base de données de test, avec le jeu de données de démonstration
+        # (les clés étrangères étant vérifiées, classes, élèves et frais 1 doivent exister)
+        self.db_manager = DatabaseManager('test_ecole.db', seed=True)
 
     def tearDown(self):
         # Supprimer la base de données de test après chaque test
@@ -33,11 +37,11 @@ class TestDatabaseManager(unittest.TestCase):
         retrieved_student = self.db_manager.get_student(student_id)
         self.assertIsNone(retrieved_student)
 
-    def test_add_and_get_parent(self):
-        parent_data = ('père', 'Doe', 'John', '0123456789', '9876543210', 'john.doe@example.com')
-        parent_id = self.db_manager.add_parent(parent_data)
-        retrieved_parent = self.db_manager.get_parent(parent_id)
-        self.assertEqual(retrieved_parent[1:], parent_data)
+    def test_add_and_get_responsable(self):
+        responsable_data = ('père', 'Doe', 'John', '0123456789', '9876543210', 'john.doe@example.com')
+        responsable_id = self.db_manager.add_responsable(responsable_data)
+        retrieved_responsable = self.db_manager.get_responsable(responsable_id)
+        self.assertEqual(retrieved_responsable[1:], responsable_data)
 
     def test_add_and_get_class(self):
         class_data = ('CM1', 1)
@@ -49,29 +53,343 @@ class TestDatabaseManager(unittest.TestCase):
         teacher_data = ('Smith', 'Jane', 'jane.smith@example.com', '0123456789')
         teacher_id = self.db_manager.add_teacher(teacher_data)
         retrieved_teacher = self.db_manager.get_teacher(teacher_id)
-        self.assertEqual(retrieved_teacher[1:], teacher_data)
+        # date_entree, contrat et id_gabonais ne sont pas renseignés
+        self.assertEqual(retrieved_teacher[1:5], teacher_data)
 
     def test_add_and_get_frais_scolarite(self):
-        frais_data = (1, 1000.0, 0.0, 100.0)
-        frais_id = self.db_manager.add_frais_scolarite(frais_data)
+        frais_data = (1, 1000, 0.0, 100)
+        frais_id = self.db_manager.add_frais_scolarite_manuel(frais_data)
         retrieved_frais = self.db_manager.get_frais_scolarite(frais_id)
-        self.assertEqual(retrieved_frais[1:], frais_data)
+        # (id, student_id, total_annee, bourse_pourcentage, bourse_montant, frais_inscription, mode_paiement)
+        self.assertEqual(retrieved_frais[1:4] + retrieved_frais[5:6], frais_data)
 
     def test_add_and_get_echeance(self):
         echeance_data = (1, 'Septembre', 100.0, False)
         echeance_id = self.db_manager.add_echeance(echeance_data)
         retrieved_echeance = self.db_manager.get_echeance(echeance_id)
-        self.assertEqual(retrieved_echeance[1:], echeance_data)
+        self.assertEqual(retrieved_echeance[1:5], echeance_data)
 
-    def test_link_student_parent(self):
+    def test_link_student_responsable(self):
         student_data = ('Doe', 'John', '2000-01-01', 'Français', 'M', 'Inscription', 1)
         student_id = self.db_manager.add_student(student_data)
-        parent_data = ('père', 'Doe', 'John Sr.', '0123456789', '9876543210', 'john.sr.doe@example.com')
-        parent_id = self.db_manager.add_parent(parent_data)
-        self.db_manager.link_student_parent(student_id, parent_id)
-        student_parents = self.db_manager.get_student_parents(student_id)
-        self.assertEqual(len(student_parents), 1)
-        self.assertEqual(student_parents[0][1:], parent_data)
+        responsable_data = ('père', 'Doe', 'John Sr.', '0123456789', '9876543210', 'john.sr.doe@example.com')
+        responsable_id = self.db_manager.add_responsable(responsable_data)
+        self.db_manager.link_student_responsable(student_id, responsable_id)
+        student_responsables = self.db_manager.get_student_responsables(student_id)
+        self.assertEqual(len(student_responsables), 1)
+        self.assertEqual(student_responsables[0][1:], responsable_data)
+
+    def test_reset_database_on_populated_database(self):
+        self.db_manager.update_echeance_payment(1, True)
+        self.db_manager.add_student(('Doe', 'John', '2000-01-01', 'Français', 'M', 'Inscription', 1))
+        self.db_manager.reset_database()
+        self.assertEqual(self.db_manager.get_schema_version(), SCHEMA_VERSION)
+        self.assertEqual(self.db_manager.get_student_count(), 5)
+        self.assertEqual(self.db_manager.conn.execute('SELECT COUNT(*) FROM paiements').fetchone()[0], 0)
+        self.assertEqual([s[0] for s in self.db_manager.search_students('doe')], [])
+        self.assertEqual(self.db_manager.rebuild_balances(), [])
+        self.db_manager.reset_database(seed=False)
+        self.assertEqual(self.db_manager.get_student_count(), 0)
+
+    def test_transaction_commits_once(self):
+        student_data = ('Doe', 'John', '2000-01-01', 'Français', 'M', 'Inscription', 1)
+        with self.db_manager.transaction():
+            student_id = self.db_manager.add_student(student_data)
+            responsable_id = self.db_manager.add_responsable(('père', 'Doe', 'John Sr.', '0123456789', None, 'john.sr.doe@example.com'))
+            self.db_manager.link_student_responsable(student_id, responsable_id)
+            self.assertTrue(self.db_manager.conn.in_transaction)
+        self.assertFalse(self.db_manager.conn.in_transaction)
+        self.assertEqual(len(self.db_manager.get_student_responsables(student_id)), 1)
+
+    def test_transaction_rollback_on_exception(self):
+        student_data = ('Doe', 'John', '2000-01-01', 'Français', 'M', 'Inscription', 1)
+        with self.assertRaises(ValueError):
+            with self.db_manager.transaction():
+                student_id = self.db_manager.add_student(student_data)
+                raise ValueError('annulation')
+        self.assertIsNone(self.db_manager.get_student(student_id))
+
+    def test_nested_transaction_rolls_back_savepoint_only(self):
+        student_data = ('Doe', 'John', '2000-01-01', 'Français', 'M', 'Inscription', 1)
+        with self.db_manager.transaction():
+            kept_id = self.db_manager.add_student(student_data)
+            with self.assertRaises(ValueError):
+                with self.db_manager.transaction():
+                    dropped_id = self.db_manager.add_student(student_data)
+                    raise ValueError('annulation')
+        self.assertIsNotNone(self.db_manager.get_student(kept_id))
+        self.assertIsNone(self.db_manager.get_student(dropped_id))
+
+    def test_generate_fees_for_year_matches_single_student_path(self):
+        class_id = self.db_manager.add_class(('CM1', None))
+        student_ids = [
+            self.db_manager.add_student(('Doe', f'John{i}', '2015-01-01', 'Gabonaise', 'M', 'Inscription', class_id))
+            for i in range(3)
+        ]
+        frais_ids = self.db_manager.generate_fees_for_year(class_id=class_id, mode_paiement='echéancier',
+                                                           bourse_map={student_ids[0]: 10})
+        self.assertEqual(set(frais_ids), set(student_ids))
+
+        reference_id = self.db_manager.add_frais_scolarite(student_ids[0], 'echéancier', 10)
+        batch = self.db_manager.get_frais_scolarite(frais_ids[student_ids[0]])
+        single = self.db_manager.get_frais_scolarite(reference_id)
+        self.assertEqual(batch[2:], single[2:])
+        batch_echeances = [e[2:] for e in self.db_manager.get_echeances_by_student_id(student_ids[1])]
+        self.assertEqual(len(batch_echeances), 9)
+
+        # Une seconde génération pour la même année ne crée pas de doublons
+        count = self.db_manager.conn.execute('SELECT COUNT(*) FROM frais_scolarite').fetchone()[0]
+        self.assertEqual(self.db_manager.generate_fees_for_year(student_ids=student_ids[1:]), {})
+        self.assertEqual(self.db_manager.generate_fees_for_year(class_id=class_id), {})
+        self.assertEqual(self.db_manager.conn.execute('SELECT COUNT(*) FROM frais_scolarite').fetchone()[0], count)
+
+        frais_ids = self.db_manager.generate_fees_for_year(student_ids=student_ids[1:], annee_scolaire='2099-2100')
+        self.assertEqual(set(frais_ids), set(student_ids[1:]))
+
+    def test_hot_queries_use_indexes(self):
+        class_ids = [self.db_manager.add_class((f'Classe{i}', None)) for i in range(20)]
+        self.db_manager.bulk_import_students(
+            (f'Nom{i}', f'Prenom{i}', '2015-01-01', 'Gabonaise', 'M', 'Inscription', class_ids[i % 20]) for i in range(1000)
+        )
+        self.db_manager.generate_fees_for_year()
+        self.db_manager.conn.execute('ANALYZE')
+        self.db_manager.conn.commit()
+        # Connexion neuve : les requêtes internes de FTS5 (lecture de la
+        # configuration au premier accès) ne doivent pas être relevées
+        fresh = DatabaseManager('test_ecole.db')
+        try:
+            self.assertEqual(fresh.find_full_scans(), [])
+            plans = fresh.explain_query_plans()
+            self.assertEqual(set(plans), set(fresh.QUERY_PLAN_PROBES))
+            self.assertTrue(all(plans[name] for name in ('get_student', 'search_students', 'get_student_full')))
+            self.assertFalse(any('_fts_' in sql for statements in plans.values() for sql, _ in statements))
+        finally:
+            fresh.close()
+
+    def test_search_responsables_full_text(self):
+        ondo_id = self.db_manager.add_responsable(('Mère', 'Ondô', 'Claire', '0199199199', None, 'claire.ondo@example.com'))
+        kassa_id = self.db_manager.add_responsable(('Père', 'Kassa', 'Pierre', '0188188188', None, 'pierre.kassa@example.com'))
+        self.assertEqual([r[0] for r in self.db_manager.search_responsables('ondo')], [ondo_id])
+        self.assertEqual([r[0] for r in self.db_manager.search_responsables('Kas')], [kassa_id])
+        self.assertEqual([r[0] for r in self.db_manager.search_responsables('0188')], [kassa_id])
+        self.assertEqual([r[0] for r in self.db_manager.search_responsables('claire ond')], [ondo_id])
+        # Dernier mot d'une seule lettre, servi par l'index de préfixe d'un caractère
+        self.assertEqual([r[0] for r in self.db_manager.search_responsables('ondo c')], [ondo_id])
+        self.assertEqual([r[0] for r in self.db_manager.search_responsables('pierre k')], [kassa_id])
+        for fts_table in ('responsables_fts', 'students_fts'):
+            sql = self.db_manager.conn.execute('SELECT sql FROM sqlite_master WHERE name = ?', (fts_table,)).fetchone()[0]
+            self.assertIn("prefix='1 2 3'", sql)
+        self.assertEqual(len(self.db_manager.search_responsables('', limit=1)), 1)
+
+        self.db_manager.update_responsable(kassa_id, ('Père', 'Martin', 'Pierre', '0188188188', None, 'pierre.martin@example.com'))
+        self.assertEqual(self.db_manager.search_responsables('kassa'), [])
+        self.db_manager.delete_responsable(ondo_id)
+        self.assertEqual(self.db_manager.search_responsables('ondo'), [])
+
+    def test_search_students_full_text(self):
+        student_id = self.db_manager.add_student(('Mbongo', 'Jérôme', '2015-03-10', 'Gabonaise', 'M', 'Inscription', None))
+        self.assertEqual([s[0] for s in self.db_manager.search_students('jero')], [student_id])
+
+    def test_search_ranks_the_whole_match_set(self):
+        # Plus de correspondances que la limite : le meilleur résultat est
+        # retenu qu'il soit le plus ancien ou le plus récent
+        exact_id = self.db_manager.add_responsable(('Père', 'Nzé', 'Paul', '0100000000', None, 'paul.nze@example.com'))
+        self.db_manager.bulk_import_responsables(
+            ('Mère', 'Nzengue', f'Prisca{i}', f'01{i:08d}', None, f'prisca{i}@example.com') for i in range(300)
+        )
+        latest_id = self.db_manager.add_responsable(('Mère', 'Nzé', 'Zoé', '0200000000', None, 'zoe@example.com'))
+        results = [r[0] for r in self.db_manager.search_responsables('nze', limit=5)]
+        self.assertEqual(len(results), 5)
+        # Mots entiers avant les débuts de mots, puis les plus récents d'abord
+        self.assertEqual(results[:2], [latest_id, exact_id])
+        self.assertEqual([r[0] for r in self.db_manager.search_responsables('nz', limit=1)], [latest_id])
+        self.assertEqual([r[0] for r in self.db_manager.search_responsables('zoe nz')], [latest_id])
+
+    def test_keyset_pagination(self):
+        class_id = self.db_manager.add_class(('CM1', None))
+        student_ids = [
+            self.db_manager.add_student(('Doe', f'John{i}', '2000-01-01', 'Français', 'M', 'Inscription', class_id))
+            for i in range(7)
+        ]
+        seen = []
+        cursor = None
+        while True:
+            rows, cursor = self.db_manager.get_students_page(page_size=3, cursor=cursor)
+            seen.extend(row[0] for row in rows)
+            if cursor is None:
+                break
+        self.assertEqual(seen, [row[0] for row in self.db_manager.get_students()])
+        self.assertEqual(seen[-7:], student_ids)
+
+        rows, cursor = self.db_manager.get_students_in_class_page(class_id, page_size=10)
+        self.assertEqual(len(rows), 7)
+        self.assertIsNone(cursor)
+
+        # Une page vide renverrait indéfiniment le même curseur
+        with self.assertRaises(ValueError):
+            self.db_manager.get_students_page(page_size=0)
+
+    def test_streaming_readers(self):
+        class_id = self.db_manager.add_class(('CM1', None))
+        for i in range(7):
+            self.db_manager.add_student(('Doe', f'John{i}', '2000-01-01', 'Français', 'M', 'Inscription', class_id))
+        self.assertEqual(list(self.db_manager.iter_students(batch_size=2)), self.db_manager.get_students())
+        self.assertEqual(len(list(self.db_manager.iter_students_in_class(class_id))), 7)
+
+    def test_unpaid_fees_page_matches_get_unpaid_fees(self):
+        student_id = self.db_manager.add_student(('Doe', 'John', '2000-01-01', 'Gabonaise', 'M', 'Inscription', None))
+        self.db_manager.add_frais_scolarite(student_id, 'echéancier')
+        rows, cursor = self.db_manager.get_unpaid_fees_page(page_size=4)
+        self.assertEqual(len(rows), 4)
+        rest, cursor = self.db_manager.get_unpaid_fees_page(page_size=100, cursor=cursor)
+        self.assertIsNone(cursor)
+        self.assertEqual(rows + rest, self.db_manager.get_unpaid_fees())
+        self.assertEqual(list(self.db_manager.iter_unpaid_fees()), self.db_manager.get_unpaid_fees())
+
+    def test_get_all_classes_returns_rows(self):
+        class_id = self.db_manager.add_class(('CM1', None))
+        self.assertEqual(self.db_manager.get_all_classes()[-1], (class_id, 'CM1', None))
+
+    def test_foreign_keys_are_enforced(self):
+        with self.assertRaises(sqlite3.IntegrityError):
+            self.db_manager.add_student(('Doe', 'John', '2000-01-01', 'Français', 'M', 'Inscription', 999))
+        # Un élève avec des frais ne peut pas être supprimé, ses liens si
+        with self.assertRaises(sqlite3.IntegrityError):
+            self.db_manager.delete_student(1)
+        self.assertEqual(len(self.db_manager.get_student_responsables(1)), 2)
+
+    def test_connection_profile(self):
+        pragmas = {name: self.db_manager.conn.execute(f'PRAGMA {name}').fetchone()[0]
+                   for name in ('journal_mode', 'synchronous', 'foreign_keys', 'temp_store')}
+        self.assertEqual(pragmas, {'journal_mode': 'wal', 'synchronous': 1, 'foreign_keys': 1, 'temp_store': 2})
+
+        reporting = DatabaseManager('test_ecole.db', profile='reporting')
+        try:
+            self.assertEqual(len(reporting.get_students()), 5)
+            with self.assertRaises(sqlite3.OperationalError):
+                reporting.add_class(('CM2', None))
+        finally:
+            reporting.close()
+
+    def test_materialised_balances_follow_writes(self):
+        class_a = self.db_manager.add_class(('CM1', None))
+        class_b = self.db_manager.add_class(('CM2', None))
+        student_id = self.db_manager.add_student(('Doe', 'John', '2000-01-01', 'Gabonaise', 'M', 'Inscription', class_a))
+        frais_id = self.db_manager.add_frais_scolarite(student_id, 'echéancier')
+        echeances = self.db_manager.get_echeances_by_student_id(student_id)
+        total = sum(e[3] for e in echeances)
+        self.assertEqual(self.db_manager.get_student_balance(student_id), (total, 0, total))
+        self.assertEqual(self.db_manager.get_class_balance(class_a), (total, 0, total))
+
+        first = echeances[0]
+        self.db_manager.update_echeance_payment(first[0], True)
+        self.assertEqual(self.db_manager.get_student_balance(student_id, first[2]), (first[3], first[3], 0))
+        self.db_manager.delete_echeance(echeances[1][0])
+        du, paye, reste = self.db_manager.get_student_balance(student_id)
+        self.assertAlmostEqual(du, total - echeances[1][3])
+        self.assertAlmostEqual(reste, du - first[3])
+
+        # Changement de classe : le solde suit l'élève
+        self.db_manager.update_student(student_id, ('Doe', 'John', '2000-01-01', 'Gabonaise', 'M', 'Inscription', class_b))
+        self.assertEqual(self.db_manager.get_class_balance(class_a)[0], 0)
+        self.assertAlmostEqual(self.db_manager.get_class_balance(class_b)[0], du)
+        self.assertEqual(len(self.db_manager.get_student_balances_by_month(student_id)), len(echeances))
+        self.assertIsNotNone(frais_id)
+        self.assertEqual(self.db_manager.rebuild_balances(), [])
+
+    def test_balances_are_kept_per_school_year(self):
+        current = current_school_year()
+        start = int(current[:4]) - 1
+        previous = f'{start}-{start + 1}'
+        class_a = self.db_manager.add_class(('CM1', None))
+        class_b = self.db_manager.add_class(('CM2', None))
+        student_id = self.db_manager.add_student(('Doe', 'John', '2000-01-01', 'Gabonaise', 'M', 'Inscription', class_a))
+        old_frais = self.db_manager.add_frais_scolarite(student_id, 'echéancier', annee_scolaire=previous)
+        old_total = sum(e[3] for e in self.db_manager.get_echeances_by_student_id(student_id))
+        for echeance in self.db_manager.get_echeances_by_student_id(student_id):
+            self.db_manager.update_echeance_payment(echeance[0], True)
+        self.db_manager.add_frais_scolarite(student_id, 'echéancier')
+        total = sum(e[3] for e in self.db_manager.get_echeances_by_student_id(student_id)) - old_total
+
+        # Les mois de deux années ne s'additionnent pas
+        self.assertEqual(self.db_manager.get_student_balance(student_id), (total, 0, total))
+        self.assertEqual(self.db_manager.get_student_balance(student_id, annee_scolaire=previous),
+                         (old_total, old_total, 0))
+        self.assertEqual(self.db_manager.get_student_balance(student_id, annee_scolaire=ANY),
+                         (old_total + total, old_total, total))
+        self.assertEqual(sum(b[0] for b in self.db_manager.get_student_balances_by_month(student_id).values()), total)
+        self.assertEqual(self.db_manager.get_class_balance(class_a, annee_scolaire=previous), (old_total, old_total, 0))
+        self.assertEqual(self.db_manager.get_school_balance(previous), (old_total, old_total, 0))
+
+        # Changement de classe : les soldes de chaque année suivent l'élève
+        self.db_manager.update_student(student_id, ('Doe', 'John', '2000-01-01', 'Gabonaise', 'M', 'Inscription', class_b))
+        self.assertEqual(self.db_manager.get_class_balance(class_b), (total, 0, total))
+        self.assertEqual(self.db_manager.get_class_balance(class_b, annee_scolaire=previous), (old_total, old_total, 0))
+        self.assertEqual(self.db_manager.get_class_balance(class_a, annee_scolaire=ANY), (0, 0, 0))
+
+        # Frais rattaché à une autre année : ses échéances changent d'année
+        self.db_manager.conn.execute('UPDATE frais_scolarite SET annee_scolaire = ? WHERE id = ?', (current, old_frais))
+        self.db_manager.conn.commit()
+        self.assertEqual(self.db_manager.get_student_balance(student_id, annee_scolaire=previous), (0, 0, 0))
+        self.assertEqual(self.db_manager.get_student_balance(student_id), (old_total + total, old_total, total))
+        self.assertEqual(self.db_manager.rebuild_balances(), [])
+
+    def test_delete_frais_scolarite(self):
+        student_id = self.db_manager.add_student(('Doe', 'John', '2000-01-01', 'Gabonaise', 'M', 'Inscription', None))
+        frais_id = self.db_manager.add_frais_scolarite(student_id, 'echéancier')
+        self.db_manager.delete_frais_scolarite(frais_id)
+        self.assertIsNone(self.db_manager.get_frais_scolarite(frais_id))
+        self.assertEqual(self.db_manager.get_echeances_by_student_id(student_id), [])
+        self.assertEqual(self.db_manager.get_student_balance(student_id), (0, 0, 0))
+
+        # Un frais déjà réglé (même partiellement) reste au registre
+        frais_id = self.db_manager.add_frais_scolarite(student_id, 'echéancier')
+        echeance_id = self.db_manager.get_echeances_by_student_id(student_id)[0][0]
+        self.db_manager.record_payment(echeance_id, 1000)
+        with self.assertRaises(ValueError):
+            self.db_manager.delete_frais_scolarite(frais_id)
+        self.assertIsNotNone(self.db_manager.get_frais_scolarite(frais_id))
+        self.assertEqual(self.db_manager.rebuild_balances(), [])
+
+    def test_instalments_sum_exactly_to_total(self):
+        student_id = self.db_manager.add_student(('Doe', 'John', '2000-01-01', 'Gabonaise', 'M', 'inscription', None))
+        for mode, bourse in (('standard', 0), ('echéancier', 0), ('standard', 33.3)):
+            frais_id = self.db_manager.add_frais_scolarite(student_id, mode, bourse)
+            total = self.db_manager.conn.execute('SELECT total_annee FROM frais_scolarite WHERE id = ?', (frais_id,)).fetchone()[0]
+            montants = [row[0] for row in self.db_manager.conn.execute(
+                'SELECT montant FROM echeancier WHERE frais_id = ?', (frais_id,))]
+            self.assertTrue(all(isinstance(m, int) for m in montants))
+            self.assertEqual(sum(montants), total)
+
+    def test_rebuild_balances_reports_drift(self):
+        student_id = self.db_manager.add_student(('Doe', 'John', '2000-01-01', 'Gabonaise', 'M', 'Inscription', None))
+        self.db_manager.add_frais_scolarite(student_id, 'standard')
+        self.db_manager.conn.execute('UPDATE soldes_eleves SET du = du + 1 WHERE student_id = ?', (student_id,))
+        self.db_manager.conn.commit()
+        drift = self.db_manager.rebuild_balances()
+        self.assertEqual({(d[0], d[1]) for d in drift}, {('soldes_eleves', student_id)})
+        self.assertEqual(self.db_manager.rebuild_balances(), [])
+
+    def test_composite_reads_match_individual_queries(self):
+        for student_id in range(1, 6):
+            self.db_manager.add_frais_scolarite(student_id, 'echéancier')
+        self.db_manager.reset_query_stats()
+        record = self.db_manager.get_student_full(1)
+        self.assertEqual(self.db_manager.query_stats()['get_student_full']['count'], 4)
+        self.assertEqual(record['eleve'], self.db_manager.get_student(1))
+        self.assertEqual(record['classe'], self.db_manager.get_class(record['eleve'][7]))
+        self.assertEqual(record['enseignant'], self.db_manager.get_class_teacher(record['eleve'][7]))
+        self.assertEqual(sorted(record['responsables']), sorted(self.db_manager.get_student_responsables(1)))
+        echeances = [e for frais in record['frais'] for e in frais['echeances']]
+        self.assertEqual(sorted(echeances), sorted(self.db_manager.get_echeances_by_student_id(1)))
+        self.assertIsNone(self.db_manager.get_student_full(9999))
+
+        class_id = record['eleve'][7]
+        roster = self.db_manager.get_class_roster_full(class_id)
+        self.assertEqual(roster['classe'], self.db_manager.get_class(class_id))
+        self.assertEqual([r['eleve'] for r in roster['eleves']],
+                         sorted(self.db_manager.get_students_in_class(class_id)))
+        self.assertIn(record, roster['eleves'])
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
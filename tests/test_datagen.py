@@ -0,0 +1,42 @@
+import unittest
+import os
+from benchmarks.datagen import generate
+from database.db_manager import DatabaseManager
+
+
+class TestDatagen(unittest.TestCase):
+    def setUp(self):
+        self.db_manager = DatabaseManager('test_datagen.db')
+
+    def tearDown(self):
+        self.db_manager.__del__()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists('test_datagen.db' + suffix):
+                os.remove('test_datagen.db' + suffix)
+
+    def test_generated_dataset_is_consistent(self):
+        summary = generate(self.db_manager, students=200, schools=2, years=3, seed=7)
+        self.assertEqual(summary['students'], 200)
+        self.assertEqual(self.db_manager.get_student_count(), 200)
+        self.assertEqual(self.db_manager.conn.execute('SELECT COUNT(*) FROM frais_scolarite').fetchone()[0], 600)
+        self.assertGreater(summary['paiements'], 0)
+        self.assertEqual(self.db_manager.rebuild_balances(), [])
+        # Chaque élève a au moins un responsable
+        orphans = self.db_manager.conn.execute('''
+            SELECT COUNT(*) FROM students
+            WHERE id NOT IN (SELECT student_id FROM student_responsable)
+        ''').fetchone()[0]
+        self.assertEqual(orphans, 0)
+
+    def test_generation_is_reproducible(self):
+        generate(self.db_manager, students=50, seed=3)
+        other = DatabaseManager(':memory:')
+        try:
+            generate(other, students=50, seed=3)
+            self.assertEqual(self.db_manager.get_students(), other.get_students())
+        finally:
+            other.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
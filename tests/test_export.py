@@ -0,0 +1,105 @@
+import csv
+import os
+import tempfile
+import threading
+import unittest
+from benchmarks.datagen import generate
+from database import export
+from database.db_manager import DatabaseManager
+
+
+class TestExport(unittest.TestCase):
+    def setUp(self):
+        self.db_manager = DatabaseManager('test_export.db')
+        generate(self.db_manager, students=120, schools=1, years=2, seed=5)
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.db_manager.__del__()
+        self.directory.cleanup()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists('test_export.db' + suffix):
+                os.remove('test_export.db' + suffix)
+
+    def _read_csv(self, path):
+        with open(path, newline='', encoding='utf-8-sig') as f:
+            return list(csv.reader(f, delimiter=';'))
+
+    def test_roster_lists_every_student_guardian_pair(self):
+        path = os.path.join(self.directory.name, 'liste.csv')
+        count = export.export_roster(self.db_manager, path)
+        rows = self._read_csv(path)
+        links = self.db_manager.conn.execute('SELECT COUNT(*) FROM student_responsable').fetchone()[0]
+        self.assertEqual(count, links)
+        self.assertEqual(rows[0], list(export.ROSTER_HEADER))
+        self.assertEqual(len(rows) - 1, count)
+
+        class_id = self.db_manager.get_all_classes()[0][0]
+        path = os.path.join(self.directory.name, 'classe.csv')
+        export.export_roster(self.db_manager, path, class_id=class_id)
+        students = {int(row[1]) for row in self._read_csv(path)[1:]}
+        self.assertEqual(students, {row[0] for row in self.db_manager.conn.execute(
+            'SELECT id FROM students WHERE classe_id = ?', (class_id,))})
+
+    def test_schedules_and_unpaid_balances_match_database(self):
+        path = os.path.join(self.directory.name, 'echeances.csv')
+        count = export.export_schedules(self.db_manager, path)
+        self.assertEqual(count, self.db_manager.conn.execute('SELECT COUNT(*) FROM echeancier').fetchone()[0])
+        rows = self._read_csv(path)[1:]
+        for row in rows:
+            self.assertEqual(int(row[8]), int(row[6]) - int(row[7]))
+
+        path = os.path.join(self.directory.name, 'impayes.csv')
+        export.export_unpaid_balances(self.db_manager, path)
+        unpaid = {int(row[0]): int(row[6]) for row in self._read_csv(path)[1:]}
+        self.assertTrue(unpaid)
+        for student_id, reste in unpaid.items():
+            self.assertEqual(self.db_manager.get_student_balance(student_id)[2], reste)
+
+    def test_unknown_format_is_rejected(self):
+        with self.assertRaises(ValueError):
+            export.export_roster(self.db_manager, os.path.join(self.directory.name, 'liste.pdf'))
+
+    def test_background_job(self):
+        path = os.path.join(self.directory.name, 'echeances.csv')
+        job = export.ExportJob(export.export_schedules, self.db_manager, path)
+        count = job.wait(timeout=30)
+        self.assertTrue(job.done())
+        self.assertEqual(job.rows, count)
+        self.assertEqual(len(self._read_csv(path)) - 1, count)
+
+    def test_cancelled_job_raises(self):
+        path = os.path.join(self.directory.name, 'echeances.csv')
+        cancelled = threading.Event()
+        written = []
+
+        def waiting_export(db, dest, progress):
+            # Attend l'annulation après la première ligne
+            def tracking(count):
+                written.append(count)
+                cancelled.wait(10)
+                progress(count)
+            return export.export_schedules(db, dest, progress=tracking)
+
+        job = export.ExportJob(waiting_export, self.db_manager, path)
+        job.cancel()
+        cancelled.set()
+        with self.assertRaises(export.ExportCancelled):
+            job.wait(timeout=30)
+        self.assertEqual(written, [1])
+
+    def test_xlsx_export(self):
+        try:
+            import openpyxl
+        except ImportError:
+            with self.assertRaises(ImportError):
+                export.export_unpaid_balances(self.db_manager, os.path.join(self.directory.name, 'impayes.xlsx'))
+            self.skipTest('openpyxl non installé')
+        path = os.path.join(self.directory.name, 'impayes.xlsx')
+        count = export.export_unpaid_balances(self.db_manager, path)
+        sheet = openpyxl.load_workbook(path, read_only=True).active
+        self.assertEqual(sheet.max_row, count + 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+import unittest
+import os
+from datetime import date
+from database.db_manager import DatabaseManager
+from database.fee_rules import current_school_year
+
+
+class TestFeeRules(unittest.TestCase):
+    def setUp(self):
+        self.db_manager = DatabaseManager('test_fee_rules.db')
+
+    def tearDown(self):
+        self.db_manager.__del__()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists('test_fee_rules.db' + suffix):
+                os.remove('test_fee_rules.db' + suffix)
+
+    def add_student(self, nationalite, statut='Inscription', classe_id=None):
+        return self.db_manager.add_student(('Doe', 'John', '2015-01-01', nationalite, 'M', statut, classe_id))
+
+    def test_tariff_depends_on_nationality(self):
+        self.assertEqual(self.db_manager.calculate_fees(self.add_student('Française')), (1095000, 100000))
+        self.assertEqual(self.db_manager.calculate_fees(self.add_student('gabonaise')), (795000, 100000))
+        self.assertEqual(self.db_manager.calculate_fees(self.add_student('Américaine')), (1245000, 100000))
+
+    def test_class_level_and_year_overrides(self):
+        class_id = self.db_manager.add_class(('CM2', None))
+        student_id = self.add_student('GA', classe_id=class_id)
+        self.db_manager.set_tarif('GA', 845000, 100000, niveau='CM2')
+        self.db_manager.set_tarif('GA', 900000, 120000, niveau='CM2', annee_scolaire='2030-2031')
+        student = self.db_manager.get_student(student_id)
+        self.assertEqual(self.db_manager.calculate_fees_for_student(student), (845000, 100000))
+        self.assertEqual(self.db_manager.calculate_fees_for_student(student, annee_scolaire='2030-2031'),
+                         (900000, 120000))
+
+    def test_schedules_follow_calendar(self):
+        rules = self.db_manager.get_fee_rules()
+        inscription = rules.schedule(1, 795000, 100000, 'Inscription', 'standard')
+        self.assertEqual([e[1] for e in inscription], ['Septembre', 'Septembre', 'Décembre', 'Mars'])
+        self.assertEqual(sum(e[2] for e in inscription), 795000)
+        reinscription = rules.schedule(1, 795000, 100000, 'Réinscription', 'Standard')
+        self.assertEqual(reinscription[-1][2], 231666 - 100000)
+        mensuel = rules.schedule(1, 795000, 100000, 'Réinscription', 'echéancier')
+        self.assertEqual(len(mensuel), 9)
+        with self.assertRaises(ValueError):
+            rules.schedule(1, 795000, 100000, 'Inscription', 'trimestriel')
+
+        self.db_manager.set_calendrier('trimestriel', [('Septembre', 'frais_inscription', 0, 1),
+                                                       ('Janvier', 'trimestre', 1, 0),
+                                                       ('Avril', 'trimestre', 1, 0)])
+        trimestriel = self.db_manager.get_fee_rules().schedule(1, 795000, 100000, 'Inscription', 'trimestriel')
+        self.assertEqual([e[2] for e in trimestriel], [100000, 347500, 347500])
+
+    def test_recompute_fees_after_tariff_change(self):
+        paid_student = self.add_student('Gabonaise')
+        open_student = self.add_student('Gabonaise')
+        paid_frais = self.db_manager.add_frais_scolarite(paid_student, 'standard')
+        open_frais = self.db_manager.add_frais_scolarite(open_student, 'standard', 10)
+        self.db_manager.update_echeance_payment(self.db_manager.get_echeances_by_student_id(paid_student)[0][0], True)
+
+        self.db_manager.set_tarif('GA', 825000, 100000)
+        result = self.db_manager.recompute_fees()
+        self.assertEqual(result, {'updated': [open_frais], 'skipped': [paid_frais]})
+        self.assertEqual(self.db_manager.get_student_balance(open_student)[0], 825000 - 82500)
+        self.assertEqual(self.db_manager.recompute_fees(), {'updated': [], 'skipped': [paid_frais]})
+        self.assertEqual(self.db_manager.rebuild_balances(), [])
+
+    def test_recompute_fees_leaves_manual_fees_alone(self):
+        student_id = self.add_student('Gabonaise')
+        frais_id = self.db_manager.add_frais_scolarite_manuel((student_id, 500000, 0, 0))
+        self.db_manager.add_echeance((frais_id, 'Septembre', 500000, False))
+        echeances = self.db_manager.get_echeances_by_student_id(student_id)
+
+        self.db_manager.set_tarif('GA', 825000, 100000)
+        self.assertEqual(self.db_manager.recompute_fees(), {'updated': [], 'skipped': []})
+        self.assertEqual(self.db_manager.get_frais_scolarite(frais_id).total_annee, 500000)
+        self.assertEqual(self.db_manager.get_echeances_by_student_id(student_id), echeances)
+
+    def test_recompute_fees_skips_reversed_payments(self):
+        # Paiement puis contre-passation : montant_paye revient à 0, mais le
+        # registre référence toujours l'échéance
+        student_id = self.add_student('Gabonaise')
+        frais_id = self.db_manager.add_frais_scolarite(student_id, 'standard')
+        echeance_id = self.db_manager.get_echeances_by_student_id(student_id)[0][0]
+        self.db_manager.update_echeance_payment(echeance_id, True)
+        self.db_manager.update_echeance_payment(echeance_id, False)
+        self.assertEqual(self.db_manager.get_echeance(echeance_id).montant_paye, 0)
+
+        self.db_manager.set_tarif('GA', 825000, 100000)
+        self.assertEqual(self.db_manager.recompute_fees(), {'updated': [], 'skipped': [frais_id]})
+        self.assertEqual(len(self.db_manager.get_payments(echeance_id)), 2)
+        self.assertEqual(self.db_manager.rebuild_balances(), [])
+
+    def test_current_school_year(self):
+        self.assertEqual(current_school_year(date(2024, 9, 1)), '2024-2025')
+        self.assertEqual(current_school_year(date(2025, 8, 31)), '2024-2025')
+
+
+if __name__ == '__main__':
+    unittest.main()
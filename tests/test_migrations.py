@@ -0,0 +1,151 @@
+import unittest
+import os
+import shutil
+import sqlite3
+from database.db_manager import DatabaseManager
+from database.migrations import SCHEMA_VERSION, apply_migrations
+
+LEGACY_DB = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'ecole.db')
+
+
+class TestMigrations(unittest.TestCase):
+    def setUp(self):
+        self.db_name = 'test_migrations.db'
+
+    def tearDown(self):
+        for name in (self.db_name, 'test_migrations_archive.db'):
+            for suffix in ('', '-wal', '-shm', '-journal'):
+                if os.path.exists(name + suffix):
+                    os.remove(name + suffix)
+
+    def test_new_database_is_at_latest_version(self):
+        db_manager = DatabaseManager(self.db_name)
+        self.assertEqual(db_manager.get_schema_version(), SCHEMA_VERSION)
+        self.assertEqual(db_manager.get_student_count(), 0)
+        db_manager.__del__()
+
+    def test_reopening_keeps_data(self):
+        db_manager = DatabaseManager(self.db_name)
+        student_id = db_manager.add_student(('Doe', 'John', '2000-01-01', 'Français', 'M', 'Inscription', None))
+        db_manager.__del__()
+
+        db_manager = DatabaseManager(self.db_name)
+        self.assertEqual(db_manager.migrate(), [])
+        self.assertIsNotNone(db_manager.get_student(student_id))
+        db_manager.__del__()
+
+    def test_seed_is_opt_in(self):
+        db_manager = DatabaseManager(self.db_name, seed=True)
+        self.assertEqual(db_manager.get_student_count(), 5)
+        db_manager.__del__()
+
+        # Un second seed sur une base non vide n'ajoute rien
+        db_manager = DatabaseManager(self.db_name, seed=True)
+        self.assertEqual(db_manager.get_student_count(), 5)
+        db_manager.__del__()
+
+    def test_upgrade_legacy_parents_schema(self):
+        conn = sqlite3.connect(self.db_name)
+        conn.executescript('''
+            CREATE TABLE students (id INTEGER PRIMARY KEY, nom TEXT NOT NULL, prenom TEXT NOT NULL,
+                date_naissance TEXT, nationalite TEXT, sexe TEXT, statut TEXT, classe_id INTEGER);
+            CREATE TABLE parents (id INTEGER PRIMARY KEY, type TEXT, nom TEXT NOT NULL, prenom TEXT NOT NULL,
+                tel1 TEXT NOT NULL, tel2 TEXT, email TEXT NOT NULL);
+            CREATE TABLE student_parent (student_id INTEGER, parent_id INTEGER, PRIMARY KEY (student_id, parent_id));
+            CREATE TABLE frais_scolarite (id INTEGER PRIMARY KEY, student_id INTEGER, total_annee REAL,
+                bourse_pourcentage REAL, frais_inscription REAL);
+            CREATE TABLE echeancier (id INTEGER PRIMARY KEY, frais_id INTEGER, mois TEXT, montant REAL, paye BOOLEAN);
+            INSERT INTO students VALUES (1, 'Doe', 'John', '2000-01-01', 'Français', 'M', 'Inscription', NULL);
+            INSERT INTO parents VALUES (1, 'père', 'Doe', 'John Sr.', '0123456789', NULL, 'john.sr.doe@example.com');
+            INSERT INTO student_parent VALUES (1, 1);
+        ''')
+        conn.close()
+
+        db_manager = DatabaseManager(self.db_name)
+        self.assertEqual(db_manager.get_schema_version(), SCHEMA_VERSION)
+        responsables = db_manager.get_student_responsables(1)
+        self.assertEqual(len(responsables), 1)
+        self.assertEqual(responsables[0][2:4], ('Doe', 'John Sr.'))
+        student_id = db_manager.add_student(('Doe', 'Jane', '2002-01-01', 'Français', 'F', 'Inscription', None))
+        frais_id = db_manager.add_frais_scolarite(student_id, 'standard')
+        self.assertIsNotNone(db_manager.get_frais_scolarite(frais_id))
+        db_manager.__del__()
+
+    def test_real_amounts_become_exact_integers(self):
+        db_manager = DatabaseManager(self.db_name)
+        student_id = db_manager.add_student(('Doe', 'John', '2000-01-01', 'Gabonaise', 'M', 'Inscription', None))
+        db_manager.__del__()
+
+        # Base à la version 5 : montants REAL issus de l'ancien calcul 995000 / 3
+        from database.migrations import apply_migrations
+        conn = sqlite3.connect(self.db_name)
+        conn.executescript('''
+            DROP TABLE soldes_eleves; DROP TABLE soldes_classes;
+            DROP TABLE paiements; DROP TABLE echeancier; DROP TABLE frais_scolarite;
+            PRAGMA user_version = 0;
+        ''')
+        apply_migrations(conn, target=5)
+        conn.execute('INSERT INTO frais_scolarite (id, student_id, total_annee, frais_inscription) VALUES (1, ?, 1095000.0, 100000.0)',
+                     (student_id,))
+        conn.executemany('INSERT INTO echeancier (frais_id, mois, montant, paye) VALUES (1, ?, ?, 0)',
+                         [('Septembre', 100000.0)] + [(mois, 995000 / 3) for mois in ('Septembre', 'Décembre', 'Mars')])
+        conn.execute("INSERT INTO paiements (echeance_id, montant, date_paiement) VALUES (2, 995000.0 / 3, '2024-09-01')")
+        conn.commit()
+        conn.close()
+
+        db_manager = DatabaseManager(self.db_name)
+        rows = db_manager.conn.execute('SELECT montant, typeof(montant), paye FROM echeancier ORDER BY id').fetchall()
+        self.assertEqual({row[1] for row in rows}, {'integer'})
+        self.assertEqual(sum(row[0] for row in rows), 1095000)
+        self.assertEqual([row[2] for row in rows], [0, 1, 0, 0])
+        self.assertEqual(db_manager.get_student_balance(student_id), (1095000, 331667, 763333))
+        self.assertEqual(db_manager.rebuild_balances(), [])
+        db_manager.__del__()
+
+    def test_ids_above_existing_archive(self):
+        db_manager = DatabaseManager(self.db_name)
+        student_id = db_manager.add_student(('Doe', 'John', '2000-01-01', 'Gabonaise', 'M', 'Inscription', None))
+        db_manager.__del__()
+
+        # Base à la version 9 dont l'archive contient déjà des identifiants
+        # plus grands que ceux de la base principale
+        conn = sqlite3.connect(self.db_name)
+        conn.executescript('''
+            DROP TABLE soldes_eleves; DROP TABLE soldes_classes;
+            DROP TABLE paiements; DROP TABLE echeancier; DROP TABLE frais_scolarite;
+            PRAGMA user_version = 0;
+        ''')
+        apply_migrations(conn, target=9)
+        conn.close()
+        conn = sqlite3.connect('test_migrations_archive.db')
+        conn.execute('CREATE TABLE frais_scolarite (id INTEGER PRIMARY KEY, student_id INTEGER)')
+        conn.execute('INSERT INTO frais_scolarite (id, student_id) VALUES (500, ?)', (student_id,))
+        conn.commit()
+        conn.close()
+
+        db_manager = DatabaseManager(self.db_name)
+        self.assertEqual(db_manager.get_schema_version(), SCHEMA_VERSION)
+        self.assertEqual(db_manager.add_frais_scolarite(student_id, 'standard'), 501)
+        echeance_id = db_manager.get_echeances_by_student_id(student_id)[-1][0]
+        db_manager.__del__()
+
+        # Les suppressions ne font pas redescendre la séquence
+        db_manager = DatabaseManager(self.db_name)
+        db_manager.delete_echeance(echeance_id)
+        self.assertGreater(db_manager.add_echeance((501, 'Juin', 1000, False)), echeance_id)
+        db_manager.__del__()
+
+    def test_upgrade_shipped_database(self):
+        shutil.copy(LEGACY_DB, self.db_name)
+        db_manager = DatabaseManager(self.db_name)
+        self.assertEqual(db_manager.get_schema_version(), SCHEMA_VERSION)
+        tables = {row[0] for row in db_manager.conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        self.assertIn('responsables', tables)
+        self.assertIn('student_responsable', tables)
+        self.assertNotIn('parents', tables)
+        self.assertNotIn('student_parent', tables)
+        db_manager.__del__()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,35 @@
+import unittest
+from database.money import percentage_of, split_amount, to_fcfa
+
+
+class TestMoney(unittest.TestCase):
+    def test_split_sums_exactly(self):
+        self.assertEqual(split_amount(995000, 3), [331667, 331667, 331666])
+        self.assertEqual(split_amount(100, 8), [13, 13, 13, 13, 12, 12, 12, 12])
+        for total in (0, 1, 7, 695000, 1145000, 999999):
+            for parts in (1, 3, 8, 10):
+                shares = split_amount(total, parts)
+                self.assertEqual(sum(shares), total)
+                self.assertLessEqual(max(shares) - min(shares), 1)
+
+    def test_split_by_weights(self):
+        self.assertEqual(split_amount(1000, [1, 1, 2]), [250, 250, 500])
+        self.assertEqual(split_amount(10, [1, 1, 1]), [4, 3, 3])
+        self.assertEqual(split_amount(-10, 3), [-4, -3, -3])
+        with self.assertRaises(ValueError):
+            split_amount(10, [])
+
+    def test_rounding_is_half_up(self):
+        self.assertEqual(to_fcfa(2.5), 3)
+        self.assertEqual(to_fcfa(331666.666), 331667)
+        self.assertEqual(percentage_of(1095000, 33.3), 364635)
+        self.assertEqual(percentage_of(995, 50), 498)
+
+    def test_malformed_amounts_raise_value_error(self):
+        for value in ('150 000', '12.5.3', 'nan', ''):
+            with self.assertRaises(ValueError):
+                to_fcfa(value)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import unittest
+import os
+import sqlite3
+from database.db_manager import DatabaseManager
+
+
+class TestPayments(unittest.TestCase):
+    def setUp(self):
+        self.db_manager = DatabaseManager('test_payments.db')
+        self.student_id = self.db_manager.add_student(('Doe', 'John', '2015-01-01', 'Gabonaise', 'M', 'Inscription', None))
+        self.db_manager.add_frais_scolarite(self.student_id, 'echéancier')
+        self.echeances = self.db_manager.get_echeances_by_student_id(self.student_id)
+
+    def tearDown(self):
+        self.db_manager.__del__()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists('test_payments.db' + suffix):
+                os.remove('test_payments.db' + suffix)
+
+    def test_partial_payments_accumulate(self):
+        echeance_id, montant = self.echeances[0][0], self.echeances[0][3]
+        self.db_manager.record_payment(echeance_id, montant // 2, '2024-09-01', 'espèces')
+        self.assertFalse(self.db_manager.get_echeance(echeance_id)[4])
+        self.db_manager.record_payment(echeance_id, montant - montant // 2, '2024-09-15', 'espèces')
+        self.assertTrue(self.db_manager.get_echeance(echeance_id)[4])
+        self.assertEqual(len(self.db_manager.get_payments(echeance_id)), 2)
+        self.assertEqual(self.db_manager.get_student_balance(self.student_id)[1], montant)
+
+    def test_update_echeance_payment_writes_to_ledger(self):
+        echeance_id, montant = self.echeances[0][0], self.echeances[0][3]
+        self.db_manager.update_echeance_payment(echeance_id, True)
+        self.db_manager.update_echeance_payment(echeance_id, True)
+        self.db_manager.update_echeance_payment(echeance_id, False)
+        amounts = [p[2] for p in self.db_manager.get_payments(echeance_id)]
+        self.assertEqual(amounts, [montant, -montant])
+        self.assertFalse(self.db_manager.get_echeance(echeance_id)[4])
+
+    def test_ledger_is_append_only(self):
+        payment_id = self.db_manager.record_payment(self.echeances[0][0], 1000)
+        with self.assertRaises(sqlite3.IntegrityError):
+            self.db_manager.conn.execute('DELETE FROM paiements WHERE id = ?', (payment_id,))
+        with self.assertRaises(sqlite3.IntegrityError):
+            self.db_manager.conn.execute('UPDATE paiements SET montant = 0 WHERE id = ?', (payment_id,))
+        self.db_manager.conn.rollback()
+
+    def test_reconcile_statement(self):
+        other_id = self.db_manager.add_student(('Doe', 'Jane', '2016-01-01', 'Gabonaise', 'F', 'Inscription', None))
+        first, second = self.echeances[0][3], self.echeances[1][3]
+        half = second // 2
+        statement = [
+            # Couvre la première échéance et la moitié de la deuxième
+            {'student_id': self.student_id, 'montant': first + half, 'reference': 'VIR-1'},
+            (self.student_id, second - half, '2024-10-02', 'virement', 'VIR-2'),
+            (other_id, 5000, '2024-10-02', 'virement', 'VIR-3'),
+            (self.student_id, 10, '2024-10-03', 'virement', 'VIR-1'),
+            {'student_id': None, 'montant': 10},
+        ]
+        report = self.db_manager.reconcile_payments(statement)
+        self.assertEqual(report.matched, 2)
+        self.assertEqual([a[0] for a in report.allocations], [0, 0, 1])
+        self.assertEqual([u[0] for u in report.unmatched], [4, 2, 3])
+        paid = [e[4] for e in self.db_manager.get_echeances_by_student_id(self.student_id)]
+        self.assertEqual(paid[:3], [1, 1, 0])
+        self.assertEqual(self.db_manager.rebuild_balances(), [])
+
+        # Rejouer le même relevé n'enregistre rien de plus
+        again = self.db_manager.reconcile_payments(statement[:2])
+        self.assertEqual(again.matched, 0)
+        self.assertEqual(len(self.db_manager.get_student_payments(self.student_id)), 3)
+
+    def test_reconcile_reports_malformed_amounts(self):
+        montant = self.echeances[0][3]
+        report = self.db_manager.reconcile_payments([
+            (self.student_id, '150 000'),
+            (self.student_id, '12.5.3'),
+            (self.student_id, str(montant)),
+        ])
+        self.assertEqual([u[0] for u in report.unmatched], [0, 1])
+        self.assertEqual(report.matched, 1)
+        self.assertEqual(report.allocations, [(2, self.echeances[0][0], montant)])
+
+    def test_reconcile_reports_excess(self):
+        total = sum(e[3] for e in self.echeances)
+        report = self.db_manager.reconcile_payments([(self.student_id, total + 500)])
+        self.assertEqual(report.excess, [(0, 500)])
+        self.assertEqual(self.db_manager.get_student_balance(self.student_id)[2], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import unittest
+import os
+import sqlite3
+import threading
+from database.db_manager import DatabaseManager
+
+
+class TestConnectionPool(unittest.TestCase):
+    def setUp(self):
+        self.db_manager = DatabaseManager('test_pool.db', readers=2)
+
+    def tearDown(self):
+        self.db_manager.__del__()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists('test_pool.db' + suffix):
+                os.remove('test_pool.db' + suffix)
+
+    def test_database_is_in_wal_mode(self):
+        self.assertEqual(self.db_manager.conn.execute('PRAGMA journal_mode').fetchone()[0], 'wal')
+
+    def test_concurrent_writers_from_threads(self):
+        errors = []
+
+        def worker(n):
+            try:
+                for i in range(20):
+                    self.db_manager.add_student(('Doe', f'John{n}-{i}', '2000-01-01', 'Français', 'M', 'Inscription', None))
+                    self.db_manager.get_students_in_class(None)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(self.db_manager.get_student_count(), 80)
+
+    def test_failed_write_releases_the_write_lock(self):
+        with self.assertRaises(sqlite3.IntegrityError):
+            self.db_manager.add_student(('Doe', 'John', '2000-01-01', 'Français', 'M', 'Inscription', 999))
+        self.assertFalse(self.db_manager.conn.in_transaction)
+        other = DatabaseManager('test_pool.db', busy_timeout=100)
+        try:
+            other.add_student(('Doe', 'Jane', '2000-01-01', 'Français', 'F', 'Inscription', None))
+        finally:
+            other.close()
+        self.assertEqual(self.db_manager.get_student_count(), 1)
+
+    def test_reader_is_not_blocked_by_open_transaction(self):
+        student_id = self.db_manager.add_student(('Doe', 'John', '2000-01-01', 'Français', 'M', 'Inscription', None))
+        seen = []
+        with self.db_manager.transaction():
+            self.db_manager.update_student(student_id, ('Doe', 'Jane', '2000-01-01', 'Français', 'F', 'Inscription', None))
+            # Le thread en transaction voit sa propre écriture...
+            self.assertEqual(self.db_manager.get_student(student_id)[2], 'Jane')
+            # ...un autre thread lit l'état validé sans attendre le verrou d'écriture
+            reader = threading.Thread(target=lambda: seen.append(self.db_manager.get_student(student_id)[2]))
+            reader.start()
+            reader.join(timeout=2)
+            self.assertFalse(reader.is_alive())
+        self.assertEqual(seen, ['John'])
+        self.assertEqual(self.db_manager.get_student(student_id)[2], 'Jane')
+
+    def test_streaming_reader_alongside_writes(self):
+        for i in range(10):
+            self.db_manager.add_student(('Doe', f'John{i}', '2000-01-01', 'Français', 'M', 'Inscription', None))
+        rows = self.db_manager.iter_students(batch_size=3)
+        first = next(rows)
+        self.db_manager.add_student(('Doe', 'Late', '2000-01-01', 'Français', 'M', 'Inscription', None))
+        self.assertEqual(len([first] + list(rows)), 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,39 @@
+import unittest
+from database.db_manager import DatabaseManager
+from database.rows import ROW_TYPES, Classe, Echeance, Enseignant, Frais, Responsable, Student
+
+
+class TestRows(unittest.TestCase):
+    def setUp(self):
+        self.db_manager = DatabaseManager(':memory:', seed=True)
+
+    def tearDown(self):
+        self.db_manager.close()
+
+    def test_row_types_match_schema(self):
+        for table, row_type in ROW_TYPES.items():
+            columns = tuple(row[1] for row in self.db_manager.conn.execute(f'PRAGMA table_info({table})'))
+            self.assertEqual(row_type._fields, columns, table)
+
+    def test_getters_return_typed_rows(self):
+        self.db_manager.add_frais_scolarite(1, 'standard')
+        student = self.db_manager.get_student(1)
+        self.assertIsInstance(student, Student)
+        self.assertEqual(student.nationalite, student[4])
+        self.assertEqual(student, tuple(student))
+        self.assertIsInstance(self.db_manager.get_student_responsables(1)[0], Responsable)
+        self.assertIsInstance(self.db_manager.get_class(student.classe_id), Classe)
+        self.assertIsInstance(self.db_manager.get_class_teacher(student.classe_id), Enseignant)
+        echeance = self.db_manager.get_echeances_by_student_id(1)[0]
+        self.assertIsInstance(echeance, Echeance)
+        self.assertIsInstance(self.db_manager.get_frais_scolarite(echeance.frais_id), Frais)
+        self.assertTrue(all(isinstance(s, Student) for s in self.db_manager.iter_students()))
+
+    def test_typed_rows_are_as_small_as_tuples(self):
+        import sys
+        student = self.db_manager.get_student(1)
+        self.assertEqual(sys.getsizeof(student), sys.getsizeof(tuple(student)))
+
+
+if __name__ == '__main__':
+    unittest.main()
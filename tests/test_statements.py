@@ -0,0 +1,60 @@
+import unittest
+import os
+from database import payments
+from database.db_manager import DatabaseManager
+
+
+class TestStatements(unittest.TestCase):
+    def setUp(self):
+        self.db_manager = DatabaseManager('test_statements.db', seed=True)
+        self.db_manager.reset_query_stats()
+
+    def tearDown(self):
+        self.db_manager.__del__()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists('test_statements.db' + suffix):
+                os.remove('test_statements.db' + suffix)
+
+    def test_calls_are_recorded_under_public_method(self):
+        for _ in range(3):
+            self.db_manager.get_student(1)
+        self.db_manager.get_students_page(page_size=2)
+        list(self.db_manager.iter_students(batch_size=2))
+        self.db_manager.get_class(1)
+        stats = self.db_manager.query_stats()
+        self.assertEqual(stats['get_student']['count'], 3)
+        self.assertEqual(stats['get_student']['rows'], 3)
+        self.assertEqual(stats['get_students_page']['rows'], 3)
+        self.assertEqual(stats['iter_students']['rows'], 5)
+        self.assertIn('get_class', stats)
+        for values in stats.values():
+            self.assertLessEqual(values['p50_ms'], values['p95_ms'])
+            self.assertLessEqual(values['p95_ms'], values['max_ms'])
+        self.assertIn('SELECT * FROM students WHERE id = ?', self.db_manager.statements.statements()['get_student'])
+
+    def test_writes_record_affected_rows(self):
+        self.db_manager.update_echeance_payment(1, True)
+        stats = self.db_manager.query_stats()
+        # Chaque requête porte le nom donné par la méthode qui la lance
+        self.assertEqual(stats['update_echeance_payment']['count'], 1)
+        self.assertEqual(stats['record_payment']['rows'], 1)
+
+    def test_module_queries_are_recorded(self):
+        # Import en masse et rapprochement passent aussi par le registre
+        self.db_manager.bulk_import_students([('Doe', 'John', '2015-01-01', 'Gabonaise', 'M', 'Inscription', None)])
+        self.db_manager.reconcile_payments([(1, 1000)])
+        stats = self.db_manager.query_stats()
+        # Lecture du prochain id puis insertion
+        self.assertEqual(stats['bulk_import_students']['rows'], 2)
+        self.assertIn('reconcile_payments', stats)
+        self.assertIn(payments.INSERT_PAYMENT, self.db_manager.statements.statements()['reconcile_payments'])
+
+    def test_slow_query_log(self):
+        self.db_manager.statements.slow_query_ms = 0
+        with self.assertLogs('database.statements', level='WARNING') as logs:
+            self.db_manager.search_students('dur')
+        self.assertIn('search_students', logs.output[0])
+
+
+if __name__ == '__main__':
+    unittest.main()